@@ -0,0 +1,45 @@
+import json
+import logging
+import timeit
+
+from src import alerts
+
+RECORDS = 100_000
+
+
+def _record(i: int) -> logging.LogRecord:
+    record = logging.LogRecord(
+        "HIDSAlert", logging.WARNING, "", 0, f"Burst attack detected from IP 10.0.{i // 256 % 256}.{i % 256}", None, None
+    )
+    record.event_type = "SECURITY"
+    record.severity = "WARNING"
+    record.metadata = {"rule": "burst", "ip": f"10.0.{i // 256 % 256}.{i % 256}", "burst_count": i % 50, "window": 10}
+    return record
+
+
+def main() -> None:
+    records = [_record(i) for i in range(1000)]
+    stdlib_dumps = json.JSONEncoder(default=str, separators=(",", ":"), ensure_ascii=False).encode
+
+    formatters = [("text (StructuredAlertFormatter)", alerts.StructuredAlertFormatter())]
+    if alerts.orjson is not None:
+        formatters.append(("jsonl, orjson", alerts.JsonLinesAlertFormatter()))
+    formatters.append(("jsonl, stdlib json", alerts.JsonLinesAlertFormatter()))
+
+    print(f"{RECORDS} records:")
+    for label, formatter in formatters:
+        dumps = alerts.dumps_alert
+        if "stdlib" in label:
+            alerts.dumps_alert = stdlib_dumps
+        try:
+            def run():
+                for record in records:
+                    formatter.format(record)
+            seconds = min(timeit.repeat(run, number=RECORDS // len(records), repeat=3))
+        finally:
+            alerts.dumps_alert = dumps
+        print(f"  {label:<32} {RECORDS / seconds:>10,.0f} records/s  {seconds / RECORDS * 1e6:.2f} us/record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import random
+import tempfile
+import time
+
+from src.alert_store import AlertStore
+
+ALERTS = 1_000_000
+BATCH = 10_000
+SPAN_SECONDS = 30 * 24 * 3600
+RULES = ("burst", "risk", "baseline")
+
+
+def _batch(rng: random.Random, start: float, size: int) -> list:
+    # Alerts arrive in time order, as they do from a live sensor.
+    batch = []
+    step = SPAN_SECONDS / ALERTS
+    for i in range(size):
+        ip = f"{rng.choice((198, 203, 192))}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}"
+        rule = rng.choice(RULES)
+        batch.append({
+            "timestamp": start + i * step,
+            "event_type": "SECURITY",
+            "severity": "CRITICAL" if rule == "risk" else "WARNING",
+            "message": f"{rule} alert from IP {ip}",
+            "metadata": {"rule": rule, "ip": ip},
+        })
+    return batch
+
+
+def _timed(label: str, fn, repeat: int = 5) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<44} {best * 1000:>8.2f} ms  ({len(result) if isinstance(result, list) else result} rows)")
+
+
+def main() -> None:
+    rng = random.Random(7)
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, "alerts.db"), retention_seconds=None)
+        start = time.perf_counter()
+        for b in range(ALERTS // BATCH):
+            store.send(_batch(rng, now - SPAN_SECONDS + b * BATCH * SPAN_SECONDS / ALERTS, BATCH))
+        elapsed = time.perf_counter() - start
+        print(f"ingest: {ALERTS} alerts in {elapsed:.1f} s ({ALERTS / elapsed:,.0f} alerts/s, batches of {BATCH})")
+
+        print("queries:")
+        _timed("cidr=203.0.113.0/24, last 6h", lambda: store.query(cidr="203.0.113.0/24", last=6 * 3600))
+        _timed("cidr=203.0.0.0/16, last 6h", lambda: store.query(cidr="203.0.0.0/16", last=6 * 3600))
+        _timed("ip=203.0.113.7", lambda: store.query(ip="203.0.113.7"))
+        _timed("rule=risk, last 1h", lambda: store.query(rule="risk", last=3600))
+        _timed("text=risk \"203.0.113.\"*, limit 100", lambda: store.query(text='risk "203.0.113."*', limit=100))
+        _timed("count(last 24h)", lambda: store.count(last=24 * 3600))
+        start = time.perf_counter()
+        pruned = store.prune(older_than=SPAN_SECONDS // 2, now=now)
+        print(f"retention: pruned {pruned} alerts in {time.perf_counter() - start:.1f} s")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
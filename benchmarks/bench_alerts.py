@@ -0,0 +1,66 @@
+import logging
+import os
+import tempfile
+import time
+
+from src import alerts
+
+ALERTS = 20_000
+SLOW_FLUSH_SECONDS = 0.0005
+
+
+def _reset() -> None:
+    alerts.shutdown_alert_system()
+    logger = logging.getLogger("HIDSAlert")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    alerts._configured = False
+    alerts._logger = None
+
+
+def _slow_disk(logger: logging.Logger) -> None:
+    # Every flush pays a fixed device latency, as on a busy or network-backed disk.
+    handler = logger.handlers[0]
+    handler.stream = handler._open()
+    stream_flush = handler.stream.flush
+
+    def flush():
+        time.sleep(SLOW_FLUSH_SECONDS)
+        stream_flush()
+
+    handler.stream.flush = flush
+
+
+def _run(path: str, queued: bool, slow: bool) -> None:
+    logger = alerts.setup_alert_system(path, max_bytes=0, queued=queued)
+    if slow:
+        _slow_disk(logger)
+    start = time.perf_counter()
+    for i in range(ALERTS):
+        alerts.send_alert(f"Brute force from 10.0.{i // 256 % 256}.{i % 256}", metadata={"attempts": i})
+    caller = time.perf_counter() - start
+    stats = alerts.alert_writer_stats()
+    _reset()
+    total = time.perf_counter() - start
+    label = f"{'queued' if queued else 'sync':<6} {'slow disk' if slow else 'local disk':<10}"
+    line = f"  {label} caller {caller / ALERTS * 1e6:>7.1f} us/alert, until on disk {total:.2f} s"
+    if stats:
+        line += (
+            f", enqueue p99 {stats['enqueue_latency']['p99'] * 1e6:.0f} us (1 us resolution)"
+            f", {stats['batches']} batches, {stats['dropped_queue_full']} dropped"
+        )
+    print(line)
+
+
+def main() -> None:
+    print(f"{ALERTS} alerts:")
+    with tempfile.TemporaryDirectory() as tmp:
+        for slow in (False, True):
+            for queued in (False, True):
+                path = os.path.join(tmp, f"alerts-{int(queued)}{int(slow)}.log")
+                _run(path, queued, slow)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import queue
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from src import alerts
+from src.async_runtime import AsyncDetectionRuntime
+from src.detector import DetectionEngine
+from src.log_monitor import monitor_log
+from src.metrics import WorkerMetrics
+from src.worker import detection_worker
+
+SOURCES = 200
+LINES_PER_SOURCE = 100
+POLL_INTERVAL = 0.05
+
+
+def _paths(tmp: str):
+    paths = [os.path.join(tmp, f"auth{i}.log") for i in range(SOURCES)]
+    for path in paths:
+        open(path, "w").close()
+    return paths
+
+
+def _append_lines(paths) -> None:
+    for i, path in enumerate(paths):
+        with open(path, "a") as f:
+            for n in range(LINES_PER_SOURCE):
+                f.write(f"sshd[{n}]: Failed password for root from 10.{i // 256}.{i % 256}.{n} port 22\n")
+
+
+def _run_threaded(paths) -> tuple:
+    event_queue = queue.Queue()
+    shutdown = threading.Event()
+    metrics = WorkerMetrics()
+    tracemalloc.start()
+    tailers = [
+        threading.Thread(target=monitor_log, args=(p, event_queue, shutdown, POLL_INTERVAL), daemon=True)
+        for p in paths
+    ]
+    for t in tailers:
+        t.start()
+    worker = threading.Thread(
+        target=detection_worker,
+        args=(event_queue, DetectionEngine(), shutdown),
+        kwargs={"timeout": 0.1, "metrics": metrics},
+        daemon=True
+    )
+    worker.start()
+    time.sleep(0.5)
+
+    start = time.perf_counter()
+    _append_lines(paths)
+    while metrics.get_snapshot()["total_processed"] < SOURCES * LINES_PER_SOURCE:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    shutdown.set()
+    for t in tailers + [worker]:
+        t.join()
+    return elapsed, peak, len(tailers) + 1
+
+
+async def _run_async(paths) -> tuple:
+    tracemalloc.start()
+    runtime = AsyncDetectionRuntime(DetectionEngine(), poll_interval=POLL_INTERVAL)
+    for p in paths:
+        runtime.add_source(p)
+    await runtime.start()
+    await asyncio.sleep(0.5)
+
+    start = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(None, _append_lines, paths)
+    while runtime.metrics.get_snapshot()["total_processed"] < SOURCES * LINES_PER_SOURCE:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    batches = runtime.health_status()["batches"]
+    await runtime.stop()
+    return elapsed, peak, batches
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        alerts.setup_alert_system(os.path.join(tmp, "alerts.log"))
+        events = SOURCES * LINES_PER_SOURCE
+
+        elapsed, peak, threads = _run_threaded(_paths(os.path.join(tmp)))
+        print(f"threads ({threads} threads):   {elapsed:.2f}s  {events / elapsed:>9.0f} eps  peak alloc {peak / 1e6:.1f} MB")
+
+        async_dir = os.path.join(tmp, "async")
+        os.mkdir(async_dir)
+        elapsed, peak, batches = asyncio.run(_run_async(_paths(async_dir)))
+        print(f"asyncio (1 loop, {batches} batches): {elapsed:.2f}s  {events / elapsed:>9.0f} eps  peak alloc {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import random
+import statistics
+import timeit
+from collections import deque
+
+from src import baseline
+
+SAMPLES = 100_000
+QUERIES = 10_000
+
+
+def _legacy_threshold(history: deque) -> float:
+    data = list(history)
+    mean = statistics.mean(data)
+    stdev = statistics.stdev(data)
+    return mean + (2 * stdev)
+
+
+def _report(label: str, count: int, seconds: float) -> None:
+    print(f"{label:<40} {count / seconds:>14,.0f} ops/s  {seconds / count * 1e6:8.3f} us/op")
+
+
+def main() -> None:
+    rng = random.Random(42)
+    values = [int(rng.paretovariate(1.5)) for _ in range(SAMPLES)]
+
+    history = deque(maxlen=baseline.BASELINE_MAX_SIZE)
+    estimator = baseline.P2QuantileEstimator(baseline.THRESHOLD_QUANTILE)
+
+    _report("update: deque append (legacy)", SAMPLES,
+            timeit.timeit(lambda: [history.append(v) for v in values], number=1))
+    _report("update: P2 estimator", SAMPLES,
+            timeit.timeit(lambda: [estimator.update(v) for v in values], number=1))
+    _report("update: baseline.update_baseline", SAMPLES,
+            timeit.timeit(lambda: [baseline.update_baseline(v) for v in values], number=1))
+
+    _report("query: mean + 2*stdev over copy (legacy)", QUERIES,
+            timeit.timeit(lambda: _legacy_threshold(history), number=QUERIES))
+    _report("query: running-sum sigma threshold", QUERIES,
+            timeit.timeit(baseline._sigma_threshold, number=QUERIES))
+    _report("query: seasonal bucket threshold", QUERIES,
+            timeit.timeit(baseline.get_baseline_threshold, number=QUERIES))
+    _report("query: P2 p99 + margin", QUERIES,
+            timeit.timeit(baseline.get_quantile_threshold, number=QUERIES))
+
+    exact = sorted(values)[int(baseline.THRESHOLD_QUANTILE * (SAMPLES - 1))]
+    print(f"\np99 exact={exact} p2={estimator.value():.2f} "
+          f"legacy sigma threshold={_legacy_threshold(history):.2f}")
+
+
+if __name__ == "__main__":
+    main()
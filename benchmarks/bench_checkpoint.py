@@ -0,0 +1,49 @@
+import os
+import tempfile
+import time
+
+from src import alerts, detection_context
+from src.detector import DetectionEngine
+
+TRACKED_IPS = 10_000
+ATTEMPTS_PER_IP = 5
+PENDING_EVENTS = 10_000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        alerts.setup_alert_system(os.path.join(tmp, "alerts.log"))
+        detection_context.CHECKPOINT_PATH = os.path.join(tmp, "runtime.ckpt")
+        detection_context.QUEUE_MAXSIZE = 2 * PENDING_EVENTS
+
+        engine = DetectionEngine(clock=lambda: 1000.0)
+        engine.MAX_TRACKED_IPS = TRACKED_IPS
+        ips = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(TRACKED_IPS)]
+        for _ in range(ATTEMPTS_PER_IP):
+            engine.process_failed_logins(ips)
+
+        runtime = detection_context.DetectionRuntime(engine, num_workers=1, autoscale=False)
+        for i in range(PENDING_EVENTS):
+            runtime.submit_event(ips[i % TRACKED_IPS])
+        runtime.stop(timeout=1.0, drain=False)
+        stats = runtime.shutdown_stats
+        print(
+            f"checkpoint: {stats['checkpoint_events']} events + {TRACKED_IPS} IPs, "
+            f"{stats['checkpoint_bytes'] / 1e6:.1f} MB in {stats['checkpoint_seconds'] * 1000:.1f} ms"
+        )
+
+        start = time.perf_counter()
+        restarted = detection_context.DetectionRuntime(DetectionEngine(), num_workers=1, autoscale=False)
+        restarted.start()
+        ready = time.perf_counter() - start
+        startup = restarted.startup_stats
+        print(
+            f"restart-to-ready: {ready * 1000:.1f} ms "
+            f"(checkpoint load {startup['load_seconds'] * 1000:.1f} ms, "
+            f"{startup['restored_ips']} IPs, {startup['restored_events']} events)"
+        )
+        restarted.stop(timeout=1.0, drain=False)
+
+
+if __name__ == "__main__":
+    main()
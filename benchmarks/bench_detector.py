@@ -0,0 +1,37 @@
+import random
+import timeit
+
+from src import detector
+
+PROCESSES = 50_000
+ROUNDS = 5
+
+
+def main() -> None:
+    rng = random.Random(7)
+    names = [f"proc-{i}" for i in range(PROCESSES)]
+    scores = [rng.uniform(0, 100) for _ in range(PROCESSES)]
+    events = [
+        {"process": name, "activity_score": score, "pid": i}
+        for i, (name, score) in enumerate(zip(names, scores))
+    ]
+
+    def per_event():
+        return [i for i, event in enumerate(events) if detector.analyze_event(event)["detected"]]
+
+    def batch():
+        return detector.analyze_events_batch(names, scores).indices
+
+    loop_time = timeit.timeit(per_event, number=ROUNDS) / ROUNDS
+    batch_time = timeit.timeit(batch, number=ROUNDS) / ROUNDS
+
+    backend = "numpy" if detector.np is not None else "pure python"
+    print(f"{PROCESSES} processes per snapshot, batch backend: {backend}")
+    print(f"per-event analyze_event loop   {loop_time * 1e3:9.2f} ms/snapshot")
+    print(f"analyze_events_batch           {batch_time * 1e3:9.2f} ms/snapshot")
+    print(f"speedup                        {loop_time / batch_time:9.1f}x")
+    assert list(batch()) == per_event()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import timeit
+
+from src.executor import PipelineExecutor
+
+CALLS = 1_000_000
+
+
+def _step(ip):
+    return ip
+
+
+def main() -> None:
+    guarded = PipelineExecutor.wrap(_step, default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit))
+    guarded_positional = PipelineExecutor.wrap(
+        _step, default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit), positional=True
+    )
+
+    def direct():
+        _step("10.0.0.1")
+
+    def execute():
+        PipelineExecutor.execute(_step, "10.0.0.1", default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit))
+
+    def execute_closure():
+        # The common call-site shape before: a fresh _inner closure per call.
+        def _inner():
+            return _step("10.0.0.1")
+        PipelineExecutor.execute(_inner, default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit))
+
+    def wrapped():
+        guarded("10.0.0.1")
+
+    def wrapped_positional():
+        guarded_positional("10.0.0.1")
+
+    baseline = min(timeit.repeat(direct, number=CALLS, repeat=3)) / CALLS
+    print(f"{CALLS} calls, overhead per call over a direct call ({baseline * 1e9:.0f} ns):")
+    for label, fn in (
+        ("execute + per-call closure", execute_closure),
+        ("execute", execute),
+        ("wrap (pre-bound)", wrapped),
+        ("wrap positional=True", wrapped_positional),
+    ):
+        per_call = min(timeit.repeat(fn, number=CALLS, repeat=3)) / CALLS
+        print(f"  {label:<28} {(per_call - baseline) * 1e9:>6.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+from src.logger import _BASE_FORMATTER, DeferredQueueHandler, _LogListener
+
+EVENTS = 100_000
+
+
+def _handlers(tmp: str) -> list:
+    console = logging.StreamHandler(open(os.devnull, "w"))
+    files = RotatingFileHandler(os.path.join(tmp, "runtime.log"), maxBytes=2 * 1024 * 1024, backupCount=3)
+    for handler in (console, files):
+        handler.setFormatter(_BASE_FORMATTER)
+    return [console, files]
+
+
+def _logger(name: str, level: int, handlers: list) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = handlers
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def _report(label: str, seconds: float) -> None:
+    print(f"  {label:<46} {seconds / EVENTS * 1e6:>7.2f} us/event")
+
+
+def main() -> None:
+    ips = [f"10.0.{i // 256 % 256}.{i % 256}" for i in range(EVENTS)]
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{EVENTS} 'Detected IP' messages, console (to /dev/null) + rotating file:")
+
+        handlers = _handlers(tmp)
+        logger = _logger("bench.sync", logging.INFO, handlers)
+        start = time.perf_counter()
+        for ip in ips:
+            logger.info(f"Detected IP: {ip}")
+        _report("before: sync handlers, INFO, f-string", time.perf_counter() - start)
+        for handler in handlers:
+            handler.close()
+
+        for level, listener_running in ((logging.INFO, True), (logging.DEBUG, False), (logging.DEBUG, True)):
+            handlers = _handlers(tmp)
+            log_queue = queue.SimpleQueue()
+            logger = _logger("bench.queued", level, [DeferredQueueHandler(log_queue, handlers, EVENTS)])
+            listener = _LogListener(log_queue)
+            if listener_running:
+                listener.start()
+            start = time.perf_counter()
+            for ip in ips:
+                logger.debug("Detected IP: %s", ip)
+            caller = time.perf_counter() - start
+            if not listener_running:
+                listener.start()
+            listener.stop()
+            total = time.perf_counter() - start
+            name = logging.getLevelName(level)
+            if level == logging.INFO:
+                _report(f"after: queued, {name} (debug message gated)", caller)
+            elif not listener_running:
+                # Enqueue cost alone: the listener only starts once the loop is done.
+                _report(f"after: queued, {name}, enqueue only", caller)
+            else:
+                # Both threads compete for the GIL at full speed here.
+                _report(f"after: queued, {name}, caller with busy listener", caller)
+                _report(f"after: queued, {name}, until written", total)
+            for handler in handlers:
+                handler.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from src import alerts
+from src.detector import DetectionEngine
+from src.event_queue import BoundedEventQueue, CoalescingEventQueue, SpillingEventQueue
+from src.metrics import WorkerMetrics
+from src.worker import detection_worker
+
+EVENTS = 200_000
+DISTINCT_IPS = 2_000
+
+
+FLOOD_IPS = 10
+BURST_EVENTS = 300_000
+SPILL_MEMORY_ITEMS = 10_000
+
+
+def _run(batch_size: int, events, event_queue=None) -> float:
+    event_queue = event_queue if event_queue is not None else queue.Queue()
+    start = time.perf_counter()
+    for ip in events:
+        event_queue.put(ip)
+
+    shutdown = threading.Event()
+    metrics = WorkerMetrics()
+    t = threading.Thread(
+        target=detection_worker,
+        args=(event_queue, DetectionEngine(), shutdown),
+        kwargs={"timeout": 0.1, "metrics": metrics, "batch_size": batch_size},
+        daemon=True
+    )
+    t.start()
+    event_queue.join()
+    elapsed = time.perf_counter() - start
+    shutdown.set()
+    t.join()
+    assert metrics.get_snapshot()["total_processed"] == len(events)
+    return elapsed
+
+
+def _burst(event_queue) -> tuple:
+    # Fresh strings per event, as a parser would produce them, so memory held by the queue is visible.
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(BURST_EVENTS):
+        event_queue.put(f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    shutdown = threading.Event()
+    metrics = WorkerMetrics()
+    t = threading.Thread(
+        target=detection_worker,
+        args=(event_queue, DetectionEngine(), shutdown),
+        kwargs={"timeout": 0.1, "metrics": metrics},
+        daemon=True
+    )
+    t.start()
+    event_queue.join()
+    elapsed = time.perf_counter() - start
+    shutdown.set()
+    t.join()
+    return elapsed, peak
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        alerts.setup_alert_system(os.path.join(tmp, "alerts.log"))
+        rng = random.Random(3)
+        ips = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(DISTINCT_IPS)]
+        events = [rng.choice(ips) for _ in range(EVENTS)]
+
+        print(f"{EVENTS} events from {DISTINCT_IPS} IPs, enqueue + processing:")
+        for batch_size in (1, 64, 256, 1024):
+            elapsed = _run(batch_size, events)
+            print(f"  queue.Queue batch_size={batch_size:<5} {EVENTS / elapsed:>12,.0f} events/s")
+
+        flood = [ips[i % FLOOD_IPS] for i in range(EVENTS)]
+        print(f"{EVENTS} events from {FLOOD_IPS} IPs (flood), enqueue + processing:")
+        for label, event_queue in (
+            ("BoundedEventQueue", BoundedEventQueue(EVENTS)),
+            ("CoalescingEventQueue", CoalescingEventQueue(EVENTS)),
+        ):
+            elapsed = _run(256, flood, event_queue)
+            print(f"  {label:<22} {EVENTS / elapsed:>12,.0f} events/s")
+
+        print(f"{BURST_EVENTS} events enqueued before a worker drains them (burst):")
+        for label, event_queue in (
+            ("BoundedEventQueue", BoundedEventQueue(BURST_EVENTS)),
+            ("SpillingEventQueue", SpillingEventQueue(
+                BURST_EVENTS, os.path.join(tmp, "spill"), memory_items=SPILL_MEMORY_ITEMS
+            )),
+        ):
+            elapsed, peak = _burst(event_queue)
+            print(f"  {label:<22} {BURST_EVENTS / elapsed:>12,.0f} events/s  queue peak alloc {peak / 1e6:>6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import ipaddress
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+AGGREGATION_WINDOW = 60.0
+MAX_GROUPS = 10_000
+# Sources are grouped by network prefix; a prefix of 0 groups every source of a rule together.
+GROUP_PREFIX_V4 = 24
+GROUP_PREFIX_V6 = 64
+TOP_SOURCE_SLOTS = 16
+TOP_SOURCES_REPORTED = 5
+DISTINCT_SOURCE_LIMIT = 1024
+
+SummaryEmitter = Callable[[str, Dict[str, Any]], Any]
+
+
+def group_key(source: Optional[str], prefix_v4: int = GROUP_PREFIX_V4, prefix_v6: int = GROUP_PREFIX_V6) -> str:
+    if not source:
+        return "*"
+    try:
+        address = ipaddress.ip_address(source)
+    except ValueError:
+        # Not an address (a user, file or host name): the target itself is the group.
+        return source
+    prefix = prefix_v4 if address.version == 4 else prefix_v6
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+
+class _AlertGroup:
+    __slots__ = ("rule", "key", "first_seen", "last_seen", "count", "top", "distinct", "deadline")
+
+    def __init__(self, rule: str, key: str, now: float, deadline: float):
+        self.rule = rule
+        self.key = key
+        self.first_seen = now
+        self.last_seen = now
+        self.count = 0
+        self.top: Dict[str, int] = {}
+        self.distinct: set = set()
+        self.deadline = deadline
+
+    def add(self, source: Optional[str], now: float) -> None:
+        self.count += 1
+        self.last_seen = now
+        if not source:
+            return
+        if len(self.distinct) < DISTINCT_SOURCE_LIMIT:
+            self.distinct.add(source)
+        # Space-Saving: a new source replaces the smallest counter and inherits its count,
+        # so the top sources are exact up to that overestimate with a fixed number of slots.
+        top = self.top
+        if source in top:
+            top[source] += 1
+        elif len(top) < TOP_SOURCE_SLOTS:
+            top[source] = 1
+        else:
+            victim = min(top, key=top.__getitem__)
+            top[source] = top.pop(victim) + 1
+
+    def top_sources(self) -> List[Tuple[str, int]]:
+        return sorted(self.top.items(), key=lambda item: -item[1])[:TOP_SOURCES_REPORTED]
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class AlertAggregator:
+    # The first alert of a (rule, group) passes straight through. Repeats within the window are
+    # only counted, and one summary is emitted when the window closes. All groups share the
+    # same window length, so a deque in creation order is also in deadline order, and the
+    # flush only needs to look at its head.
+    def __init__(
+        self,
+        emit: SummaryEmitter,
+        window: float = AGGREGATION_WINDOW,
+        max_groups: int = MAX_GROUPS,
+        prefix_v4: int = GROUP_PREFIX_V4,
+        prefix_v6: int = GROUP_PREFIX_V6,
+        clock: Callable[[], float] = time.time
+    ):
+        self.emit = emit
+        self.window = window
+        self.max_groups = max(1, max_groups)
+        self.prefix_v4 = prefix_v4
+        self.prefix_v6 = prefix_v6
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._groups: Dict[Tuple[str, str], _AlertGroup] = {}
+        self._order: deque = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.submitted = 0
+        self.passed = 0
+        self.suppressed = 0
+        self.summaries = 0
+        self.evicted = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="AlertAggregator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush(force=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(min(1.0, self.window)):
+            self.flush()
+
+    def submit(self, rule: str, source: Optional[str], message: str) -> bool:
+        # Returns True when the alert should be sent as is.
+        now = self.clock()
+        key = (rule, group_key(source, self.prefix_v4, self.prefix_v6))
+        expired: List[_AlertGroup] = []
+        with self._lock:
+            self.submitted += 1
+            order = self._order
+            while order and order[0].deadline <= now:
+                expired.append(self._close(order.popleft()))
+            group = self._groups.get(key)
+            first = group is None
+            if first:
+                if len(self._groups) >= self.max_groups:
+                    expired.append(self._close(order.popleft()))
+                    self.evicted += 1
+                group = _AlertGroup(rule, key[1], now, now + self.window)
+                self._groups[key] = group
+                order.append(group)
+                self.passed += 1
+            else:
+                self.suppressed += 1
+            group.add(source, now)
+        self._emit_summaries(expired)
+        return first
+
+    def flush(self, force: bool = False) -> int:
+        now = self.clock()
+        expired: List[_AlertGroup] = []
+        with self._lock:
+            order = self._order
+            while order and (force or order[0].deadline <= now):
+                expired.append(self._close(order.popleft()))
+        return self._emit_summaries(expired)
+
+    def _close(self, group: _AlertGroup) -> _AlertGroup:
+        del self._groups[(group.rule, group.key)]
+        return group
+
+    def _emit_summaries(self, groups: List[_AlertGroup]) -> int:
+        emitted = 0
+        for group in groups:
+            if group.count < 2:
+                continue
+            distinct = len(group.distinct)
+            distinct_label = f"{distinct}+" if distinct >= DISTINCT_SOURCE_LIMIT else str(distinct)
+            top = group.top_sources()
+            message = (
+                f"Aggregated {group.rule} alerts for {group.key}: {group.count} alerts from "
+                f"{distinct_label} sources between {_isoformat(group.first_seen)} and "
+                f"{_isoformat(group.last_seen)}; top sources: "
+                + ", ".join(f"{source} ({count})" for source, count in top)
+            )
+            metadata = {
+                "rule": group.rule,
+                "group": group.key,
+                "count": group.count,
+                "suppressed": group.count - 1,
+                "distinct_sources": distinct,
+                "first_seen": _isoformat(group.first_seen),
+                "last_seen": _isoformat(group.last_seen),
+                "top_sources": top,
+            }
+            self.emit(message, metadata)
+            emitted += 1
+        with self._lock:
+            self.summaries += emitted
+        return emitted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "groups": len(self._groups),
+                "submitted": self.submitted,
+                "passed": self.passed,
+                "suppressed": self.suppressed,
+                "summaries": self.summaries,
+                "evicted": self.evicted,
+            }
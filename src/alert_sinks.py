@@ -0,0 +1,344 @@
+import http.client
+import logging
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from src.alerts import add_alert_listener, dumps_alert, remove_alert_listener
+from src.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+SINK_QUEUE_SIZE = 10_000
+SINK_BATCH_SIZE = 100
+SINK_FLUSH_INTERVAL = 0.5
+SINK_MAX_RETRIES = 3
+SINK_RETRY_BACKOFF = 0.2
+WEBHOOK_TIMEOUT = 5.0
+
+SYSLOG_SOCKET = "/dev/log"
+SYSLOG_FACILITY_AUTHPRIV = 10
+_SYSLOG_SEVERITY = {"CRITICAL": 2, "ERROR": 3, "WARNING": 4, "INFO": 6}
+
+
+class PermanentSinkError(Exception):
+    # Raised by send() when retrying cannot help, e.g. a webhook rejecting the payload.
+    pass
+
+
+class AlertSink(ABC):
+    # Each sink owns a bounded queue and a delivery thread, so a slow or failing sink only
+    # backs up (and eventually drops) its own alerts. Subclasses implement send(batch).
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = SINK_QUEUE_SIZE,
+        batch_size: int = SINK_BATCH_SIZE,
+        flush_interval: float = SINK_FLUSH_INTERVAL,
+        max_retries: int = SINK_MAX_RETRIES,
+        retry_backoff: float = SINK_RETRY_BACKOFF
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._pending: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped_queue_full = 0
+        self.dropped_failed = 0
+        self.dropped_rejected = 0
+        self.send_latency = LatencyHistogram()
+
+    @abstractmethod
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def start(self) -> None:
+        if self._thread is not None:
+            if self._thread.is_alive():
+                if self._stop.is_set():
+                    logger.warning("Alert sink %s is still finishing a send, not restarted", self.name)
+                return
+            # Left behind by a stop() that timed out; it has exited since.
+            self._thread = None
+            self.close()
+        # A stopped sink can be started again.
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"AlertSink-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # Closing now would pull the connection from under the running send.
+                logger.warning("Alert sink %s did not stop within %.1fs", self.name, timeout)
+                return
+            self._thread = None
+        self.close()
+
+    def submit(self, alert: Dict[str, Any]) -> bool:
+        pending = self._pending
+        if len(pending) >= self.maxsize:
+            self.dropped_queue_full += 1
+            return False
+        pending.append(alert)
+        if len(pending) >= self.batch_size and not self._wake.is_set():
+            self._wake.set()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self) -> None:
+        pending = self._pending
+        while pending:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(pending.popleft())
+            except IndexError:
+                pass
+            self._deliver(batch)
+
+    def _deliver(self, batch: List[Dict[str, Any]]) -> None:
+        backoff = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            start = perf_counter()
+            try:
+                self.send(batch)
+            except PermanentSinkError as e:
+                self.dropped_rejected += len(batch)
+                logger.warning("Alert sink %s rejected %d alerts: %s", self.name, len(batch), e)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.dropped_failed += len(batch)
+                    logger.warning("Alert sink %s dropped %d alerts: %s", self.name, len(batch), e)
+                    return
+                self.retries += 1
+                # During shutdown, retries are attempted without sleeping.
+                self._stop.wait(backoff)
+                backoff *= 2
+                continue
+            self.send_latency.record(perf_counter() - start)
+            self.sent += len(batch)
+            self.batches += 1
+            return
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._pending),
+            "sent": self.sent,
+            "batches": self.batches,
+            "retries": self.retries,
+            "dropped_queue_full": self.dropped_queue_full,
+            "dropped_failed": self.dropped_failed,
+            "dropped_rejected": self.dropped_rejected,
+            "send_latency": self.send_latency.summary(),
+        }
+
+
+class FileAlertSink(AlertSink):
+    def __init__(self, path: str, name: str = "file", **kwargs):
+        super().__init__(name, **kwargs)
+        self.path = path
+        self._file = None
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        try:
+            self._file.write("".join(dumps_alert(alert) + "\n" for alert in batch))
+            self._file.flush()
+        except OSError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+
+class SyslogAlertSink(AlertSink):
+    # RFC 5424 messages, one datagram per alert, over a single connected Unix datagram socket.
+    def __init__(
+        self,
+        address: str = SYSLOG_SOCKET,
+        facility: int = SYSLOG_FACILITY_AUTHPRIV,
+        app_name: str = "core-hids",
+        name: str = "syslog",
+        **kwargs
+    ):
+        super().__init__(name, **kwargs)
+        self.address = address
+        self.facility = facility
+        self.header_suffix = f" {socket.gethostname() or '-'} {app_name} {os.getpid()} - - "
+        self._socket: Optional[socket.socket] = None
+
+    def _format(self, alert: Dict[str, Any]) -> bytes:
+        priority = self.facility * 8 + _SYSLOG_SEVERITY.get(alert.get("severity"), 4)
+        timestamp = alert.get("timestamp") or "-"
+        return f"<{priority}>1 {timestamp}{self.header_suffix}{dumps_alert(alert)}".encode("utf-8")
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        if self._socket is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            try:
+                sock.connect(self.address)
+            except OSError:
+                sock.close()
+                raise
+            self._socket = sock
+        delivered = 0
+        try:
+            for alert in batch:
+                self._socket.send(self._format(alert))
+                delivered += 1
+        except OSError:
+            # Trim what went out so a retry does not duplicate it.
+            del batch[:delivered]
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class WebhookAlertSink(AlertSink):
+    # One keep-alive HTTP connection; each batch is a single POST of a JSON array.
+    def __init__(self, url: str, timeout: float = WEBHOOK_TIMEOUT, name: str = "webhook", **kwargs):
+        super().__init__(name, **kwargs)
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported webhook URL: {url}")
+        self.url = url
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self._connection = connection_class(self.host, self.port, timeout=self.timeout)
+            self.connections_opened += 1
+        return self._connection
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        body = ("[" + ",".join(dumps_alert(alert) for alert in batch) + "]").encode("utf-8")
+        connection = self._connect()
+        try:
+            connection.request("POST", self.path, body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        if response.will_close:
+            self.close()
+        if 400 <= response.status < 500 and response.status != 429:
+            # The receiver refused this payload; sending it again gets the same answer.
+            raise PermanentSinkError(f"webhook returned HTTP {response.status}")
+        if not 200 <= response.status < 300:
+            raise http.client.HTTPException(f"webhook returned HTTP {response.status}")
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["connections_opened"] = self.connections_opened
+        return stats
+
+
+class AlertFanout:
+    # Registered as an alert listener: publish() only appends to each sink's queue, so the
+    # alerting thread never waits on a sink.
+    def __init__(self, sinks: Optional[List[AlertSink]] = None):
+        self.sinks: Dict[str, AlertSink] = {}
+        self.running = False
+        for sink in sinks or ():
+            self.add_sink(sink)
+
+    def add_sink(self, sink: AlertSink) -> None:
+        if sink.name in self.sinks:
+            raise ValueError(f"duplicate alert sink name: {sink.name}")
+        self.sinks[sink.name] = sink
+        if self.running:
+            sink.start()
+
+    def publish(self, alert: Dict[str, Any]) -> None:
+        for sink in self.sinks.values():
+            sink.submit(alert)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        for sink in self.sinks.values():
+            sink.start()
+        add_alert_listener(self.publish)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if not self.running:
+            return
+        self.running = False
+        remove_alert_listener(self.publish)
+        deadline = time.monotonic() + timeout
+        for sink in self.sinks.values():
+            sink.stop(max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: sink.stats() for name, sink in self.sinks.items()}
+
+
+def build_fanout(
+    syslog_address: Optional[str] = None,
+    webhook_url: Optional[str] = None,
+    file_path: Optional[str] = None
+) -> AlertFanout:
+    fanout = AlertFanout()
+    if file_path:
+        fanout.add_sink(FileAlertSink(file_path))
+    if syslog_address:
+        fanout.add_sink(SyslogAlertSink(syslog_address))
+    if webhook_url:
+        fanout.add_sink(WebhookAlertSink(webhook_url))
+    return fanout
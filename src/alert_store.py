@@ -0,0 +1,306 @@
+import ipaddress
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.alert_sinks import AlertSink
+from src.alerts import dumps_alert
+from src.config import ALERT_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+STORE_BATCH_SIZE = 1000
+STORE_FLUSH_INTERVAL = 1.0
+RETENTION_SECONDS = 30 * 24 * 3600
+RETENTION_INTERVAL = 3600.0
+RETENTION_CHUNK = 10_000
+QUERY_LIMIT = 1000
+_QUERY_COLUMNS = ("timestamp", "severity", "event_type", "rule", "ip", "message", "metadata")
+
+# IPv4 addresses are stored IPv4-mapped, so every key is 16 bytes and a CIDR block of either
+# family is one contiguous BLOB range in the (ip, ts) index.
+_IPV4_MAPPED = ipaddress.IPv6Network("::ffff:0:0/96")
+
+
+def ip_key(value: Optional[str]) -> Optional[bytes]:
+    if not value:
+        return None
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    if address.version == 4:
+        return b"\x00" * 10 + b"\xff\xff" + address.packed
+    return address.packed
+
+
+def cidr_range(cidr: str) -> Tuple[bytes, bytes]:
+    network = ipaddress.ip_network(cidr, strict=False)
+    if network.version == 4:
+        first = int(_IPV4_MAPPED.network_address) + int(network.network_address)
+        last = int(_IPV4_MAPPED.network_address) + int(network.broadcast_address)
+    else:
+        first, last = int(network.network_address), int(network.broadcast_address)
+    return first.to_bytes(16, "big"), last.to_bytes(16, "big")
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+class AlertStore(AlertSink):
+    # An alert sink that appends to SQLite: one transaction per batch, indexes on
+    # (ts), (ip, ts), (rule, ts) and (severity, ts), and an FTS5 index over the message.
+    # The FTS index is filled with one INSERT ... SELECT per batch rather than a per-row
+    # trigger, which more than doubles ingest throughput.
+    def __init__(
+        self,
+        db_path: str = ALERT_STORE_PATH,
+        retention_seconds: Optional[float] = RETENTION_SECONDS,
+        retention_interval: float = RETENTION_INTERVAL,
+        name: str = "store",
+        batch_size: int = STORE_BATCH_SIZE,
+        flush_interval: float = STORE_FLUSH_INTERVAL,
+        **kwargs
+    ):
+        super().__init__(name, batch_size=batch_size, flush_interval=flush_interval, **kwargs)
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self.retention_interval = retention_interval
+        self.fts = False
+        self.pruned = 0
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._retention_thread: Optional[threading.Thread] = None
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self) -> None:
+        self._write_conn = self._connect()
+        conn = self._write_conn
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY,
+                ts REAL NOT NULL,
+                severity TEXT,
+                event_type TEXT,
+                rule TEXT,
+                ip TEXT,
+                ip_key BLOB,
+                message TEXT,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS alerts_ts ON alerts(ts);
+            CREATE INDEX IF NOT EXISTS alerts_ip_ts ON alerts(ip_key, ts);
+            CREATE INDEX IF NOT EXISTS alerts_rule_ts ON alerts(rule, ts);
+            CREATE INDEX IF NOT EXISTS alerts_severity_ts ON alerts(severity, ts);
+        """)
+        try:
+            # '.' and ':' are token characters so an IP address is one token; match a prefix with '"203.0.113."*'.
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS alerts_fts USING fts5(
+                    message, content='alerts', content_rowid='id', tokenize="unicode61 tokenchars '.:'"
+                )
+            """)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: text queries fall back to LIKE.
+            logger.warning("FTS5 unavailable, alert text search will scan: %s", e)
+        conn.commit()
+
+    def start(self) -> None:
+        super().start()
+        if self.retention_seconds and self._retention_thread is None:
+            self._retention_thread = threading.Thread(
+                target=self._retention_loop, name="AlertStoreRetention", daemon=True
+            )
+            self._retention_thread.start()
+
+    def _retention_loop(self) -> None:
+        while not self._stop.wait(self.retention_interval):
+            try:
+                self.prune()
+            except sqlite3.Error as e:
+                logger.error("Alert store retention failed: %s", e)
+
+    def close(self) -> None:
+        if self._retention_thread is not None:
+            self._retention_thread.join(5.0)
+            self._retention_thread = None
+        with self._write_lock:
+            if self._write_conn is not None:
+                self._write_conn.close()
+                self._write_conn = None
+        with self._read_lock:
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
+
+    @staticmethod
+    def _row(alert: Dict[str, Any]) -> tuple:
+        metadata = alert.get("metadata")
+        rule = ip = None
+        if isinstance(metadata, dict):
+            rule = metadata.get("rule")
+            ip = metadata.get("ip")
+        return (
+            _timestamp(alert.get("timestamp")),
+            alert.get("severity"),
+            alert.get("event_type"),
+            rule,
+            ip,
+            ip_key(ip),
+            alert.get("message"),
+            dumps_alert(metadata) if metadata is not None else None,
+        )
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        rows = [self._row(alert) for alert in batch]
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._connect()
+            conn = self._write_conn
+            with conn:
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
+                conn.executemany(
+                    "INSERT INTO alerts (ts, severity, event_type, rule, ip, ip_key, message, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                if self.fts:
+                    conn.execute(
+                        "INSERT INTO alerts_fts(rowid, message) SELECT id, message FROM alerts WHERE id > ?",
+                        (last_id,)
+                    )
+
+    def prune(self, older_than: Optional[float] = None, now: Optional[float] = None) -> int:
+        # Deleted in chunks so ingest is never blocked behind one long transaction.
+        older_than = self.retention_seconds if older_than is None else older_than
+        cutoff = (time.time() if now is None else now) - older_than
+        deleted = 0
+        while True:
+            with self._write_lock:
+                if self._write_conn is None:
+                    break
+                conn = self._write_conn
+                with conn:
+                    chunk = "SELECT id FROM alerts WHERE ts < ? ORDER BY ts LIMIT ?"
+                    if self.fts:
+                        conn.execute(
+                            "INSERT INTO alerts_fts(alerts_fts, rowid, message) "
+                            f"SELECT 'delete', id, message FROM alerts WHERE id IN ({chunk})",
+                            (cutoff, RETENTION_CHUNK)
+                        )
+                    cursor = conn.execute(f"DELETE FROM alerts WHERE id IN ({chunk})", (cutoff, RETENTION_CHUNK))
+            deleted += cursor.rowcount
+            if cursor.rowcount < RETENTION_CHUNK:
+                break
+        self.pruned += deleted
+        return deleted
+
+    def _where(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        last: Optional[float] = None,
+        cidr: Optional[str] = None,
+        ip: Optional[str] = None,
+        rule: Optional[str] = None,
+        severity: Optional[str] = None,
+        text: Optional[str] = None
+    ) -> Tuple[str, list]:
+        clauses, params = [], []
+        if last is not None:
+            since = time.time() - last
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if ip is not None:
+            clauses.append("ip_key = ?")
+            params.append(ip_key(ip))
+        if cidr is not None:
+            clauses.append("ip_key BETWEEN ? AND ?")
+            params.extend(cidr_range(cidr))
+        if rule is not None:
+            clauses.append("rule = ?")
+            params.append(rule)
+        if severity is not None:
+            clauses.append("severity = ?")
+            params.append(severity.upper())
+        if text is not None:
+            if self.fts:
+                clauses.append("id IN (SELECT rowid FROM alerts_fts WHERE alerts_fts MATCH ?)")
+                params.append(text)
+            else:
+                clauses.append("message LIKE ?")
+                params.append(f"%{text}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _read(self, sql: str, params: list) -> list:
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = self._connect()
+            return self._read_conn.execute(sql, params).fetchall()
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        last: Optional[float] = None,
+        cidr: Optional[str] = None,
+        ip: Optional[str] = None,
+        rule: Optional[str] = None,
+        severity: Optional[str] = None,
+        text: Optional[str] = None,
+        limit: int = QUERY_LIMIT
+    ) -> List[Dict[str, Any]]:
+        # Newest first. `last` is a shorthand for since=now-last, e.g. last=6 * 3600.
+        where, params = self._where(since, until, last, cidr, ip, rule, severity, text)
+        rows = self._read(
+            "SELECT ts, severity, event_type, rule, ip, message, metadata FROM alerts"
+            f"{where} ORDER BY ts DESC LIMIT ?",
+            params + [limit]
+        )
+        results = []
+        for row in rows:
+            alert = dict(zip(_QUERY_COLUMNS, row))
+            if alert["metadata"]:
+                alert["metadata"] = json.loads(alert["metadata"])
+            results.append(alert)
+        return results
+
+    def count(self, **filters: Any) -> int:
+        # Takes the same filters as query().
+        where, params = self._where(**filters)
+        return self._read(f"SELECT COUNT(*) FROM alerts{where}", params)[0][0]
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["pruned"] = self.pruned
+        stats["fts"] = self.fts
+        return stats
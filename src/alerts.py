@@ -1,14 +1,194 @@
+import atexit
+import gzip
+import json
 import logging
 import logging.handlers
+import os
+import shutil
 import threading
 import sys
+import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Optional, Any, Dict
-from src.executor import PipelineExecutor
+from time import perf_counter
+from typing import Optional, Any, Dict, Callable, List
+from src.alert_aggregator import AlertAggregator, AGGREGATION_WINDOW, MAX_GROUPS
+from src.executor import CircuitBreaker, PipelineExecutor, pipeline_step
+from src.metrics import LatencyHistogram
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ALERT_QUEUE_SIZE = 100_000
+ALERT_BATCH_SIZE = 512
+ALERT_FLUSH_INTERVAL = 0.2
 
 _logger: Optional[logging.Logger] = None
 _lock = threading.RLock()
 _configured = False
+_listeners: List[Callable[[Dict[str, Any]], Any]] = []
+_writer: Optional["AlertWriter"] = None
+_aggregator: Optional[AlertAggregator] = None
+_alert_format = "text"
+
+# Compact JSON for alerts, shared by the JSON-lines formatter, the sinks and the alert store.
+if orjson is not None:
+    def dumps_alert(obj: Any) -> str:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+else:
+    dumps_alert = json.JSONEncoder(default=str, separators=(",", ":"), ensure_ascii=False).encode
+
+_LEVEL_MAP = {
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL
+}
+
+
+class GuardedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    # logging swallows write errors in handleError, so failures are fed to the breaker from there.
+    # While the breaker is open, records are dropped instead of hitting a dead disk on every alert.
+    def __init__(self, *args, breaker: Optional[CircuitBreaker] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = breaker or CircuitBreaker("alerts.file")
+        self.dropped = 0
+        self._failed = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not self.breaker.allow():
+            self.dropped += 1
+            return
+        self._failed = False
+        super().emit(record)
+        if self._failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def handleError(self, record: logging.LogRecord) -> None:
+        self._failed = True
+        super().handleError(record)
+
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        # One rollover check, write and flush for the whole batch instead of one per record.
+        if not self.breaker.allow():
+            self.dropped += len(records)
+            return
+        try:
+            text = "".join(self.format(record) + self.terminator for record in records)
+            self.acquire()
+            try:
+                if self.stream is None:
+                    self.stream = self._open()
+                if self.maxBytes > 0 and self.stream.tell() and self.stream.tell() + len(text) >= self.maxBytes:
+                    self.doRollover()
+                self.stream.write(text)
+                self.stream.flush()
+            finally:
+                self.release()
+        except Exception:
+            self.breaker.record_failure()
+            self.dropped += len(records)
+            self.handleError(records[-1])
+            return
+        self.breaker.record_success()
+
+
+class AlertWriter:
+    # Callers only append to a deque; a background thread formats and writes in batches,
+    # flushing every flush_interval or as soon as batch_size records are waiting.
+    def __init__(
+        self,
+        handler: GuardedRotatingFileHandler,
+        logger_name: str,
+        maxsize: int = ALERT_QUEUE_SIZE,
+        batch_size: int = ALERT_BATCH_SIZE,
+        flush_interval: float = ALERT_FLUSH_INTERVAL
+    ):
+        self.handler = handler
+        self.logger_name = logger_name
+        self.maxsize = maxsize
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._pending: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="AlertWriter", daemon=True)
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.enqueue_latency = LatencyHistogram()
+        self.write_latency = LatencyHistogram()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def submit(self, entry: tuple) -> bool:
+        start = perf_counter()
+        pending = self._pending
+        if len(pending) >= self.maxsize:
+            self.dropped += 1
+            return False
+        pending.append(entry)
+        if len(pending) >= self.batch_size and not self._wake.is_set():
+            self._wake.set()
+        self.enqueued += 1
+        self.enqueue_latency.record(perf_counter() - start)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self) -> None:
+        pending = self._pending
+        while pending:
+            records = []
+            try:
+                while len(records) < self.batch_size:
+                    records.append(self._make_record(pending.popleft()))
+            except IndexError:
+                pass
+            start = perf_counter()
+            self.handler.emit_batch(records)
+            self.write_latency.record(perf_counter() - start)
+            self.written += len(records)
+            self.batches += 1
+
+    def _make_record(self, entry: tuple) -> logging.LogRecord:
+        created, level, message, event_type, severity, metadata, exc_info = entry
+        record = logging.LogRecord(self.logger_name, level, "", 0, message, None, exc_info)
+        record.created = created
+        record.event_type = event_type
+        record.severity = severity
+        record.metadata = metadata
+        return record
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._pending),
+            "capacity": self.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped_queue_full": self.dropped,
+            "dropped_breaker_open": self.handler.dropped,
+            "enqueue_latency": self.enqueue_latency.summary(),
+            "write_latency": self.write_latency.summary(),
+        }
 
 
 class StructuredAlertFormatter(logging.Formatter):
@@ -22,7 +202,6 @@ class StructuredAlertFormatter(logging.Formatter):
         if metadata is None:
             metadata = ""
         elif isinstance(metadata, dict):
-            import json
             metadata = json.dumps(metadata, default=str)
 
         if record.exc_info:
@@ -31,13 +210,91 @@ class StructuredAlertFormatter(logging.Formatter):
         return f"{ts} | {event_type} | {severity} | {message} | {metadata}"
 
 
+class JsonLinesAlertFormatter(logging.Formatter):
+    # One JSON object per line. The timestamp prefix is cached per second, since bursts of
+    # alerts mostly share it.
+    def __init__(self):
+        super().__init__()
+        self._second = -1
+        self._second_prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        if second != self._second:
+            self._second_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = second
+        return f"{self._second_prefix}.{int((created - second) * 1000):03d}Z"
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self._timestamp(record.created),
+            "event_type": getattr(record, "event_type", "SYSTEM"),
+            "severity": getattr(record, "severity", "INFO"),
+            "message": record.getMessage(),
+            "metadata": getattr(record, "metadata", None),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return dumps_alert(entry)
+
+
+class GzipRotatingFileHandler(GuardedRotatingFileHandler):
+    # Rotated files are compressed to .gz by a background thread, not by the thread that
+    # triggered the rollover. A rollover waits for the previous compression first, so backups
+    # are never shifted while one is still being written.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._rotate_and_compress
+        self._compressor: Optional[threading.Thread] = None
+
+    def doRollover(self) -> None:
+        self.wait_for_compression()
+        super().doRollover()
+
+    def wait_for_compression(self, timeout: Optional[float] = None) -> None:
+        compressor = self._compressor
+        if compressor is not None:
+            compressor.join(timeout)
+
+    def _rotate_and_compress(self, source: str, dest: str) -> None:
+        pending = dest[:-3]
+        os.replace(source, pending)
+        self._compressor = threading.Thread(
+            target=_compress_file, args=(pending, dest), name="AlertLogCompressor", daemon=True
+        )
+        self._compressor.start()
+
+    def close(self) -> None:
+        self.wait_for_compression()
+        super().close()
+
+
+def _compress_file(source: str, dest: str) -> None:
+    try:
+        with open(source, "rb") as src, gzip.open(dest + ".tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(dest + ".tmp", dest)
+        os.remove(source)
+    except OSError as e:
+        logging.getLogger(__name__).error("Compressing rotated alert log %s failed: %s", source, e)
+
+
 def setup_alert_system(
     log_file: str = "hids_alerts.log",
     max_bytes: int = 10 * 1024 * 1024,
     backup_count: int = 5,
-    level: int = logging.INFO
+    level: int = logging.INFO,
+    queued: bool = False,
+    queue_size: int = ALERT_QUEUE_SIZE,
+    batch_size: int = ALERT_BATCH_SIZE,
+    flush_interval: float = ALERT_FLUSH_INTERVAL,
+    alert_format: str = "text",
+    compress: bool = False
 ) -> logging.Logger:
-    global _logger, _configured
+    global _logger, _configured, _writer, _alert_format
+    if alert_format not in ("text", "jsonl"):
+        raise ValueError(f"unknown alert format: {alert_format}")
     with _lock:
         if _configured:
             return _logger
@@ -46,19 +303,128 @@ def setup_alert_system(
         logger.setLevel(level)
         logger.propagate = False
 
-        handler = logging.handlers.RotatingFileHandler(
+        handler_class = GzipRotatingFileHandler if compress else GuardedRotatingFileHandler
+        handler = handler_class(
             log_file,
             maxBytes=max_bytes,
             backupCount=backup_count
         )
-        handler.setFormatter(StructuredAlertFormatter())
+        handler.setFormatter(JsonLinesAlertFormatter() if alert_format == "jsonl" else StructuredAlertFormatter())
         logger.addHandler(handler)
 
+        if queued:
+            _writer = AlertWriter(handler, logger.name, queue_size, batch_size, flush_interval)
+            _writer.start()
+            atexit.register(shutdown_alert_system)
+
         _logger = logger
+        _alert_format = alert_format
         _configured = True
         return _logger
 
 
+def shutdown_alert_system() -> None:
+    global _writer
+    # Pending summaries go out before the writer that would write them stops.
+    disable_alert_aggregation()
+    with _lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+
+
+def _send_summary(message: str, metadata: Dict[str, Any]) -> None:
+    send_alert(message, event_type="SECURITY", severity="WARNING", metadata=metadata)
+
+
+def enable_alert_aggregation(window: float = AGGREGATION_WINDOW, max_groups: int = MAX_GROUPS, **kwargs: Any) -> AlertAggregator:
+    global _aggregator
+    with _lock:
+        if _aggregator is None:
+            _aggregator = AlertAggregator(_send_summary, window=window, max_groups=max_groups, **kwargs)
+            _aggregator.start()
+        return _aggregator
+
+
+def disable_alert_aggregation() -> None:
+    global _aggregator
+    with _lock:
+        aggregator, _aggregator = _aggregator, None
+    if aggregator is not None:
+        aggregator.stop()
+
+
+def alert_aggregation_stats() -> dict:
+    aggregator = _aggregator
+    return aggregator.stats() if aggregator is not None else {}
+
+
+def alert_writer_stats() -> dict:
+    writer = _writer
+    return writer.stats() if writer is not None else {}
+
+
+def add_alert_listener(listener: Callable[[Dict[str, Any]], Any]) -> None:
+    with _lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def remove_alert_listener(listener: Callable[[Dict[str, Any]], Any]) -> None:
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def _notify_listeners(listeners, message, event_type, severity, metadata) -> None:
+    alert = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+        "event_type": event_type,
+        "severity": severity,
+        "message": message,
+        "metadata": metadata
+    }
+    for listener in listeners:
+        PipelineExecutor.execute(
+            listener,
+            alert,
+            default=None,
+            fatal_exceptions=(KeyboardInterrupt, SystemExit)
+        )
+
+
+@pipeline_step(default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit), positional=True)
+def _emit_alert(message: str, event_type: str, severity: str, metadata: Optional[Any], exc_info: bool) -> None:
+    severity = severity.upper()
+    writer = _writer
+    if writer is not None:
+        level = _LEVEL_MAP.get(severity, logging.WARNING)
+        if _logger.isEnabledFor(level):
+            writer.submit((time.time(), level, message, event_type, severity, metadata, sys.exc_info() if exc_info else None))
+        # Copying a list is atomic under the GIL, so the queued path never takes _lock.
+        listeners = list(_listeners) if _listeners else None
+        if listeners:
+            _notify_listeners(listeners, message, event_type, severity, metadata)
+        return
+
+    with _lock:
+        if not _configured:
+            setup_alert_system()
+
+        extra = {
+            "event_type": event_type,
+            "severity": severity,
+            "metadata": metadata
+        }
+
+        _logger.log(_LEVEL_MAP.get(severity, logging.WARNING), message, extra=extra, exc_info=exc_info)
+        listeners = list(_listeners) if _listeners else None
+
+    # Listeners run outside the lock so a slow one cannot serialize every alerting thread.
+    if listeners:
+        _notify_listeners(listeners, message, event_type, severity, metadata)
+
+
 def send_alert(
     message: str,
     event_type: str = "SECURITY",
@@ -66,40 +432,22 @@ def send_alert(
     metadata: Optional[Any] = None,
     exc_info: bool = False
 ) -> None:
-    def _inner():
-        global _logger, _configured
-        with _lock:
-            if not _configured:
-                setup_alert_system()
-
-            level_map = {
-                "INFO": logging.INFO,
-                "WARNING": logging.WARNING,
-                "ERROR": logging.ERROR,
-                "CRITICAL": logging.CRITICAL
-            }
-            level = level_map.get(severity.upper(), logging.WARNING)
-
-            extra = {
-                "event_type": event_type,
-                "severity": severity.upper(),
-                "metadata": metadata
-            }
-
-            _logger.log(level, message, extra=extra, exc_info=exc_info)
-
-    PipelineExecutor.execute(
-        _inner,
-        default=None,
-        fatal_exceptions=(KeyboardInterrupt, SystemExit)
-    )
+    _emit_alert(message, event_type, severity, metadata, exc_info)
 
 
-def trigger_alert(message: str) -> None:
+def trigger_alert(message: str, rule: Optional[str] = None, source: Optional[str] = None) -> None:
+    # Alerts that name their rule can be folded into a per-window summary by the aggregator.
+    aggregator = _aggregator
+    if aggregator is not None and rule is not None and not aggregator.submit(rule, source, message):
+        return
+    # The rule and source only ride along where something reads them back, so a plain
+    # text log without aggregation or listeners keeps its original alert line.
+    tagged = rule is not None and (aggregator is not None or _alert_format == "jsonl" or bool(_listeners))
     send_alert(
         message,
         event_type="SECURITY",
-        severity="WARNING"
+        severity="WARNING",
+        metadata={"rule": rule, "ip": source} if tagged else None
     )
 
 
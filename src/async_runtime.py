@@ -0,0 +1,391 @@
+import asyncio
+import os
+import threading
+import time
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from src.alerts import add_alert_listener, alert_aggregation_stats, alert_writer_stats, remove_alert_listener
+from src.executor import PipelineExecutor
+from src.log_monitor import parse_failed_login
+from src.logger import get_runtime_logger
+from src.metrics import WorkerMetrics, RATE_REPORT_WINDOWS
+from src.worker import BatchProcessor
+
+QUEUE_MAXSIZE = 10000
+BATCH_SIZE = 256
+POLL_INTERVAL = 0.5
+# A tailer yields to the loop after this many lines so one busy file cannot starve the rest.
+LINES_PER_YIELD = 512
+DEDUP_TTL = 2
+SINK_QUEUE_MAXSIZE = 1000
+SINK_BATCH_SIZE = 100
+SUBMIT_TIMEOUT = 5.0
+STOP_DRAIN_TIMEOUT = 5.0
+
+# Async callables, unlike the thread-backed alert_sinks.AlertSink.
+AsyncAlertSink = Callable[[List[Dict[str, Any]]], Awaitable[Any]]
+
+
+def _replaced(path: str, opened: os.stat_result) -> bool:
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        # Rotated but not yet recreated: keep reading the old file.
+        return False
+    return (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev)
+
+
+class _SourceStats:
+    __slots__ = ("lines", "events", "rotations")
+
+    def __init__(self):
+        self.lines = 0
+        self.events = 0
+        self.rotations = 0
+
+
+class _SinkState:
+    __slots__ = ("sink", "queue", "sent", "dropped", "failures", "task")
+
+    def __init__(self, sink: AsyncAlertSink, maxsize: int):
+        self.sink = sink
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.sent = 0
+        self.dropped = 0
+        self.failures = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class AsyncDetectionRuntime:
+    def __init__(
+        self,
+        engine,
+        queue_maxsize: int = QUEUE_MAXSIZE,
+        batch_size: int = BATCH_SIZE,
+        poll_interval: float = POLL_INTERVAL
+    ):
+        if not callable(getattr(engine, "process_failed_login", None)):
+            raise TypeError("Engine must implement: process_failed_login")
+        self.engine = engine
+        self.processor = BatchProcessor(engine)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.runtime_logger = get_runtime_logger()
+        self.metrics = WorkerMetrics()
+
+        self.queue_maxsize = queue_maxsize
+        self.event_queue: Optional[asyncio.Queue] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._sources: Dict[str, asyncio.Task] = {}
+        self._source_stats: Dict[str, _SourceStats] = {}
+        self._sinks: Dict[str, _SinkState] = {}
+        self._pending_sinks: Dict[str, AsyncAlertSink] = {}
+        self._pending_sources: List[str] = []
+        self._drop_counts: Dict[str, int] = {}
+        self._batches = 0
+        self.running = False
+
+    # Sources and sinks may be registered before start(); they attach once the loop runs.
+    def add_source(self, path: str) -> None:
+        if self.running:
+            self._start_source(path)
+        else:
+            self._pending_sources.append(path)
+
+    def add_sink(self, name: str, sink: AsyncAlertSink) -> None:
+        if self.running:
+            self._start_sink(name, sink)
+        else:
+            self._pending_sinks[name] = sink
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.event_queue = asyncio.Queue(self.queue_maxsize)
+        self.running = True
+
+        self._consumer = asyncio.create_task(self._consume(), name="AsyncDetectionConsumer")
+        for name, sink in self._pending_sinks.items():
+            self._start_sink(name, sink)
+        for path in self._pending_sources:
+            self._start_source(path)
+        self._pending_sinks.clear()
+        self._pending_sources.clear()
+
+        add_alert_listener(self._on_alert)
+        self.runtime_logger.info(
+            "AsyncDetectionRuntime started (%d sources, %d sinks)", len(self._sources), len(self._sinks)
+        )
+
+    async def stop(self, timeout: float = STOP_DRAIN_TIMEOUT) -> None:
+        if not self.running:
+            return
+        self.running = False
+        remove_alert_listener(self._on_alert)
+
+        sources = list(self._sources.values())
+        for task in sources:
+            task.cancel()
+        await asyncio.gather(*sources, return_exceptions=True)
+
+        # Drain what was already accepted, then flush sinks, within the deadline.
+        deadline = monotonic() + timeout
+        await self._wait_for(self.event_queue.join(), deadline)
+        self._consumer.cancel()
+        await asyncio.gather(self._consumer, return_exceptions=True)
+
+        for state in self._sinks.values():
+            await self._wait_for(state.queue.join(), deadline)
+            state.task.cancel()
+        await asyncio.gather(*(s.task for s in self._sinks.values()), return_exceptions=True)
+        self.runtime_logger.info("AsyncDetectionRuntime stopped")
+
+    async def _wait_for(self, awaitable, deadline: float) -> None:
+        try:
+            await asyncio.wait_for(awaitable, max(0.0, deadline - monotonic()))
+        except asyncio.TimeoutError:
+            self.runtime_logger.warning("AsyncDetectionRuntime stop deadline reached before drain completed")
+
+    def _record_drop(self, reason: str) -> None:
+        self._drop_counts[reason] = self._drop_counts.get(reason, 0) + 1
+
+    def _enqueue_nowait(self, ip: str) -> bool:
+        try:
+            self.event_queue.put_nowait((monotonic(), ip))
+            return True
+        except asyncio.QueueFull:
+            self._record_drop("queue_full")
+            return False
+
+    async def submit(self, ip: str) -> None:
+        # Awaiting put() is the backpressure: a producer pauses while the queue is full.
+        await self.event_queue.put((monotonic(), ip))
+
+    def submit_event(self, ip: str) -> bool:
+        if not self.running:
+            return False
+        if threading.get_ident() == self._loop_thread_id:
+            return self._enqueue_nowait(ip)
+
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(self.submit(ip), SUBMIT_TIMEOUT), self.loop
+        )
+        try:
+            future.result(SUBMIT_TIMEOUT + 1.0)
+            return True
+        except Exception:
+            self._record_drop("submit_timeout")
+            return False
+
+    async def _consume(self) -> None:
+        queue = self.event_queue
+        while True:
+            items = [await queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            start = monotonic()
+            for enqueued_at, _ in items:
+                self.metrics.record_queue_wait(start - enqueued_at)
+            ips = [ip for _, ip in items]
+            succeeded = self.processor.process(ips)
+            self.metrics.update_batch(succeeded, len(ips) - succeeded, monotonic() - start)
+            self._batches += 1
+            for _ in items:
+                queue.task_done()
+            # One engine call per loop tick; let tailers and sinks run before the next batch.
+            await asyncio.sleep(0)
+
+    def _start_source(self, path: str) -> None:
+        if path in self._sources:
+            return
+        self._source_stats[path] = _SourceStats()
+        self._sources[path] = asyncio.create_task(self._tail(path), name=f"AsyncTail-{path}")
+
+    async def _tail(self, path: str) -> None:
+        stats = self._source_stats[path]
+        seen: Dict[str, float] = {}
+        handle = None
+        position = 0
+        from_start = False
+        try:
+            while True:
+                if handle is None:
+                    try:
+                        # Binary mode: offsets are tracked by byte length, avoiding TextIOWrapper.tell().
+                        handle = open(path, "rb")
+                    except OSError:
+                        await asyncio.sleep(self.poll_interval)
+                        continue
+                    # A file that replaced a rotated one is read from its start.
+                    position = handle.seek(0, os.SEEK_SET if from_start else os.SEEK_END)
+
+                try:
+                    opened = os.fstat(handle.fileno())
+                    size = opened.st_size
+                    if size < position:
+                        stats.rotations += 1
+                        position = handle.seek(0)
+                    lines = 0
+                    while position < size and lines < LINES_PER_YIELD:
+                        line = handle.readline()
+                        if not line.endswith(b"\n"):
+                            # Partial line: wait for the writer to finish it.
+                            handle.seek(position)
+                            break
+                        position += len(line)
+                        lines += 1
+                        await self._handle_line(line.decode("utf-8", "ignore"), stats, seen)
+                    # Only the first open after a rotation starts at 0; a later reopen, e.g.
+                    # after an OSError, must not replay the file.
+                    from_start = False
+                    if lines == LINES_PER_YIELD:
+                        await asyncio.sleep(0)
+                        continue
+
+                    if _replaced(path, opened):
+                        # Renamed away (logrotate's rename + create): drain what is left of the old
+                        # file, then follow the path to the new one.
+                        if os.fstat(handle.fileno()).st_size > size:
+                            # Written to since the fstat above: read it through the bounded loop.
+                            continue
+                        # At most one unterminated line is left.
+                        rest = handle.read(size - position)
+                        if rest:
+                            await self._handle_line(rest.decode("utf-8", "ignore"), stats, seen)
+                        stats.rotations += 1
+                        handle.close()
+                        handle = None
+                        from_start = True
+                        continue
+                except OSError as e:
+                    self.runtime_logger.warning("Async tail of %s failed: %s", path, e)
+                    handle.close()
+                    handle = None
+
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if handle is not None:
+                handle.close()
+
+    async def _handle_line(self, line: str, stats: _SourceStats, seen: Dict[str, float]) -> None:
+        stats.lines += 1
+        line = line.strip()
+        ip = parse_failed_login(line) if line else None
+        if not ip:
+            return
+        now = time.time()
+        key = f"{ip}:{line}"
+        last = seen.get(key)
+        if last is not None and now - last < DEDUP_TTL:
+            return
+        if len(seen) > QUEUE_MAXSIZE:
+            seen.clear()
+        seen[key] = now
+        stats.events += 1
+        await self.submit(ip)
+
+    def _start_sink(self, name: str, sink: AsyncAlertSink) -> None:
+        state = _SinkState(sink, SINK_QUEUE_MAXSIZE)
+        self._sinks[name] = state
+        state.task = asyncio.create_task(self._drain_sink(name, state), name=f"AsyncSink-{name}")
+
+    def _on_alert(self, alert: Dict[str, Any]) -> None:
+        # Alert listeners run on whichever thread raised the alert.
+        if threading.get_ident() == self._loop_thread_id:
+            self._publish_alert(alert)
+        else:
+            self.loop.call_soon_threadsafe(self._publish_alert, alert)
+
+    def _publish_alert(self, alert: Dict[str, Any]) -> None:
+        for state in self._sinks.values():
+            try:
+                state.queue.put_nowait(alert)
+            except asyncio.QueueFull:
+                state.dropped += 1
+
+    async def _drain_sink(self, name: str, state: _SinkState) -> None:
+        queue = state.queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < SINK_BATCH_SIZE:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await state.sink(batch)
+                state.sent += len(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                state.failures += 1
+                self.runtime_logger.error("Alert sink %s failed on %d alerts: %s", name, len(batch), e)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def health_status(self) -> dict:
+        qsize = self.event_queue.qsize() if self.event_queue is not None else 0
+        metrics_snapshot = self.metrics.get_snapshot()
+        total = metrics_snapshot['total_processed']
+        return {
+            "running": self.running,
+            "queue_size": qsize,
+            "queue_capacity": self.queue_maxsize,
+            "metrics": metrics_snapshot,
+            "worker_efficiency": round(metrics_snapshot['success_count'] / total, 3) if total else 0.0,
+            "recent_throughput_eps": metrics_snapshot['event_rate'][f'{RATE_REPORT_WINDOWS[0]}s'],
+            "latency": metrics_snapshot['latency'],
+            "batches": self._batches,
+            "dropped_events": dict(self._drop_counts),
+            "step_failures": PipelineExecutor.failure_counts(),
+            "pipeline_steps": PipelineExecutor.step_stats(),
+            "circuit_breakers": PipelineExecutor.breaker_status(),
+            "alert_writer": alert_writer_stats(),
+            "alert_aggregation": alert_aggregation_stats(),
+            "sources": {
+                path: {
+                    "lines": stats.lines,
+                    "events": stats.events,
+                    "rotations": stats.rotations,
+                    "active": path in self._sources and not self._sources[path].done(),
+                }
+                for path, stats in self._source_stats.items()
+            },
+            "sinks": {
+                name: {
+                    "queued": state.queue.qsize(),
+                    "sent": state.sent,
+                    "dropped": state.dropped,
+                    "failures": state.failures,
+                }
+                for name, state in self._sinks.items()
+            },
+        }
+
+
+async def run_async_runtime(
+    engine,
+    sources: Iterable[str],
+    sinks: Optional[Dict[str, AsyncAlertSink]] = None,
+    shutdown_event: Optional[asyncio.Event] = None
+) -> AsyncDetectionRuntime:
+    runtime = AsyncDetectionRuntime(engine)
+    for path in sources:
+        runtime.add_source(path)
+    for name, sink in (sinks or {}).items():
+        runtime.add_sink(name, sink)
+
+    await runtime.start()
+    try:
+        await (shutdown_event or asyncio.Event()).wait()
+    finally:
+        await runtime.stop()
+    return runtime
@@ -1,18 +1,170 @@
-import statistics
+import bisect
+import ipaddress
 import math
 import threading
-from collections import deque
-from typing import List, Dict, Any, Callable
+import time
+from array import array
+from collections import deque, OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Iterable, Sequence
 
-from src.executor import PipelineExecutor
+from src.executor import PipelineExecutor, pipeline_step
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 BASELINE_MAX_SIZE = 100
 MIN_SAMPLES_FOR_STATS = 10
 DEFAULT_THRESHOLD = 5
 ANOMALY_THRESHOLD_SIGMA = 3
 
+BASELINE_THRESHOLD_SOURCE = "sigma"
+THRESHOLD_QUANTILE = 0.99
+QUANTILE_MARGIN = 1.0
+MAX_TRACKED_QUANTILE_IPS = 10000
+
+HOURS_PER_WEEK = 7 * 24
+SEASONAL_EWMA_ALPHA = 0.05
+SEASONAL_THRESHOLD_SIGMA = 2
+SEASONAL_KEY_MODE = "global"
+SEASONAL_PREFIX_LENGTH = 24
+MAX_SEASONAL_KEYS = 10000
+
 _baseline_lock = threading.Lock()
 _baseline_failed_logins = deque(maxlen=BASELINE_MAX_SIZE)
+_baseline_sum = 0.0
+_baseline_sq_sum = 0.0
+
+
+class P2QuantileEstimator:
+    # Jain & Chlamtac P-square estimator: five markers, O(1) memory and update.
+    __slots__ = ("quantile", "count", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, quantile: float = THRESHOLD_QUANTILE):
+        if not 0.0 < quantile < 1.0:
+            raise ValueError("quantile must be in (0, 1)")
+        p = quantile
+        self.quantile = p
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self._desired = [1.0, 1.0 + 2 * p, 1.0 + 4 * p, 3.0 + 2 * p, 5.0]
+        self._increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, value: float) -> None:
+        x = float(value)
+        self.count += 1
+        q = self._heights
+
+        if self.count <= 5:
+            bisect.insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x, 1, 4) - 1
+
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+
+        desired = self._desired
+        increments = self._increments
+        for i in range(5):
+            desired[i] += increments[i]
+
+        for i in (1, 2, 3):
+            delta = desired[i] - n[i]
+            if (delta >= 1 and n[i + 1] - n[i] > 1) or (delta <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if delta > 0 else -1
+                candidate = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                n[i] += s
+
+    def value(self) -> float:
+        if self.count == 0:
+            raise ValueError("no samples")
+        if self.count <= 5:
+            q = self._heights
+            return q[min(len(q) - 1, int(math.ceil(self.quantile * len(q))) - 1)]
+        return self._heights[2]
+
+
+class SeasonalProfile:
+    __slots__ = ("alpha", "means", "variances", "counts")
+
+    def __init__(self, alpha: float = SEASONAL_EWMA_ALPHA):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.means = array("d", [0.0]) * HOURS_PER_WEEK
+        self.variances = array("d", [0.0]) * HOURS_PER_WEEK
+        self.counts = array("q", [0]) * HOURS_PER_WEEK
+
+    def update(self, bucket: int, value: float) -> None:
+        x = float(value)
+        n = self.counts[bucket]
+        # Plain running mean until 1/alpha samples, so early samples are not over-weighted.
+        alpha = max(self.alpha, 1.0 / (n + 1))
+        diff = x - self.means[bucket]
+        increment = alpha * diff
+        self.means[bucket] += increment
+        self.variances[bucket] = (1 - alpha) * (self.variances[bucket] + diff * increment)
+        self.counts[bucket] = n + 1
+
+    def threshold(self, bucket: int, sigma: float = SEASONAL_THRESHOLD_SIGMA) -> Optional[float]:
+        if self.counts[bucket] < MIN_SAMPLES_FOR_STATS:
+            return None
+        return self.means[bucket] + sigma * math.sqrt(self.variances[bucket])
+
+
+def hour_of_week(timestamp: Optional[float] = None) -> int:
+    t = time.localtime(timestamp)
+    return t.tm_wday * 24 + t.tm_hour
+
+
+def _seasonal_key(ip: Optional[str]) -> Optional[str]:
+    if ip is None or SEASONAL_KEY_MODE == "global":
+        return None
+    if SEASONAL_KEY_MODE == "prefix":
+        try:
+            return str(ipaddress.ip_network(f"{ip}/{SEASONAL_PREFIX_LENGTH}", strict=False))
+        except ValueError:
+            return ip
+    return ip
+
+
+_seasonal_lock = threading.Lock()
+_global_seasonal = SeasonalProfile()
+_keyed_seasonal: "OrderedDict[str, SeasonalProfile]" = OrderedDict()
+
+
+def _get_keyed_seasonal(key: str) -> SeasonalProfile:
+    profile = _keyed_seasonal.get(key)
+    if profile is None:
+        profile = _keyed_seasonal[key] = SeasonalProfile()
+        if len(_keyed_seasonal) > MAX_SEASONAL_KEYS:
+            _keyed_seasonal.popitem(last=False)
+    else:
+        _keyed_seasonal.move_to_end(key)
+    return profile
+
+
+_quantile_lock = threading.Lock()
+_global_quantile = P2QuantileEstimator()
+_ip_quantiles: "OrderedDict[str, P2QuantileEstimator]" = OrderedDict()
 
 
 def get_baseline_snapshot() -> List[int]:
@@ -23,10 +175,17 @@ def get_baseline_snapshot() -> List[int]:
 def _validate_event_metric(event: Dict[str, Any]) -> float:
     if "metric" not in event:
         raise KeyError("missing required key: 'metric'")
+    return _finite_metric(event["metric"])
+
+
+def _finite_metric(raw: Any) -> float:
     try:
-        return float(event["metric"])
+        value = float(raw)
     except (TypeError, ValueError):
         raise TypeError("metric value must be numeric")
+    if not math.isfinite(value):
+        raise ValueError("metric value must be finite")
+    return value
 
 
 def _validate_profile(profile: Any) -> None:
@@ -41,44 +200,143 @@ def _run_in_pipeline(func: Callable, default: Any = None, extra_fatal: tuple = (
     return PipelineExecutor.execute(func, default=default, fatal_exceptions=fatal)
 
 
-def update_baseline(failed_count: int) -> None:
-    def _inner():
-        with _baseline_lock:
-            _baseline_failed_logins.append(failed_count)
+def _get_ip_quantile(ip: str) -> P2QuantileEstimator:
+    estimator = _ip_quantiles.get(ip)
+    if estimator is None:
+        estimator = _ip_quantiles[ip] = P2QuantileEstimator(THRESHOLD_QUANTILE)
+        if len(_ip_quantiles) > MAX_TRACKED_QUANTILE_IPS:
+            _ip_quantiles.popitem(last=False)
+    else:
+        _ip_quantiles.move_to_end(ip)
+    return estimator
 
-    _run_in_pipeline(_inner, default=None)
 
+@pipeline_step(default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit), positional=True)
+def _record_baseline(failed_count: int, ip: Optional[str], now: Optional[float]) -> None:
+    global _baseline_sum, _baseline_sq_sum
+    with _baseline_lock:
+        if len(_baseline_failed_logins) == BASELINE_MAX_SIZE:
+            evicted = _baseline_failed_logins[0]
+            _baseline_sum -= evicted
+            _baseline_sq_sum -= evicted * evicted
+        _baseline_failed_logins.append(failed_count)
+        _baseline_sum += failed_count
+        _baseline_sq_sum += failed_count * failed_count
 
-def get_baseline_threshold() -> float:
-    def _inner():
-        with _baseline_lock:
-            size = len(_baseline_failed_logins)
-            if size < MIN_SAMPLES_FOR_STATS:
-                return float(DEFAULT_THRESHOLD)
-            data = list(_baseline_failed_logins)
+    with _quantile_lock:
+        _global_quantile.update(failed_count)
+        if ip is not None:
+            _get_ip_quantile(ip).update(failed_count)
 
-        mean = statistics.mean(data)
-        stdev = statistics.stdev(data) if size > 1 else 1.0
-        return mean + (2 * stdev)
+    bucket = hour_of_week(now)
+    key = _seasonal_key(ip)
+    with _seasonal_lock:
+        _global_seasonal.update(bucket, failed_count)
+        if key is not None:
+            _get_keyed_seasonal(key).update(bucket, failed_count)
 
-    return _run_in_pipeline(_inner, default=float(DEFAULT_THRESHOLD))
 
+def update_baseline(failed_count: int, ip: Optional[str] = None, now: Optional[float] = None) -> None:
+    _record_baseline(failed_count, ip, now)
 
-def build_baseline(events: List[Dict[str, Any]]) -> Dict[str, float]:
-    def _inner():
-        if not events:
-            raise ValueError("empty event list")
 
-        values = []
+def _sigma_threshold() -> float:
+    with _baseline_lock:
+        size = len(_baseline_failed_logins)
+        if size < MIN_SAMPLES_FOR_STATS:
+            return float(DEFAULT_THRESHOLD)
+        total = _baseline_sum
+        sq_total = _baseline_sq_sum
+
+    mean = total / size
+    variance = (sq_total - total * mean) / (size - 1)
+    return mean + (2 * math.sqrt(max(variance, 0.0)))
+
+
+@pipeline_step(default=float(DEFAULT_THRESHOLD), fatal_exceptions=(KeyboardInterrupt, SystemExit))
+def get_quantile_threshold(ip: Optional[str] = None) -> float:
+    with _quantile_lock:
+        estimator = _global_quantile if ip is None else _ip_quantiles.get(ip)
+        if estimator is None or estimator.count < MIN_SAMPLES_FOR_STATS:
+            return float(DEFAULT_THRESHOLD)
+        return estimator.value() + QUANTILE_MARGIN
+
+
+def get_seasonal_threshold(ip: Optional[str] = None, now: Optional[float] = None) -> Optional[float]:
+    bucket = hour_of_week(now)
+    key = _seasonal_key(ip)
+    with _seasonal_lock:
+        if key is not None:
+            profile = _keyed_seasonal.get(key)
+            if profile is not None:
+                threshold = profile.threshold(bucket)
+                if threshold is not None:
+                    return threshold
+        return _global_seasonal.threshold(bucket)
+
+
+_guarded_seasonal_threshold = PipelineExecutor.wrap(
+    get_seasonal_threshold, default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit), positional=True
+)
+_guarded_sigma_threshold = PipelineExecutor.wrap(
+    _sigma_threshold, default=float(DEFAULT_THRESHOLD), fatal_exceptions=(KeyboardInterrupt, SystemExit),
+    positional=True
+)
+
+
+def get_baseline_threshold(ip: Optional[str] = None, now: Optional[float] = None) -> float:
+    if BASELINE_THRESHOLD_SOURCE == "quantile":
+        return get_quantile_threshold(ip)
+    if BASELINE_THRESHOLD_SOURCE == "seasonal":
+        threshold = _guarded_seasonal_threshold(ip, now)
+        if threshold is not None:
+            return threshold
+    return _guarded_sigma_threshold()
+
+
+def _metric_value(item: Any) -> float:
+    if isinstance(item, dict):
+        return _validate_event_metric(item)
+    return _finite_metric(item)
+
+
+def _as_float_array(values: Any):
+    # Vectorised path for lists, tuples and arrays. Anything NumPy cannot convert, or that
+    # converts to nan/inf (None included), goes to the per-item path, so both backends
+    # raise the same errors.
+    if np is None or not isinstance(values, (np.ndarray, list, tuple)):
+        return None
+    try:
+        arr = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return None
+    if not np.isfinite(arr).all():
+        return None
+    return arr
 
-        for event in events:
-            val = _validate_event_metric(event)
-            values.append(val)
 
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / len(values)
+def build_baseline_stream(values: Iterable[Any]) -> Dict[str, float]:
+    def _inner():
+        arr = _as_float_array(values)
+        if arr is not None:
+            if arr.size == 0:
+                raise ValueError("empty event list")
+            return {"mean": float(arr.mean()), "variance": float(arr.var())}
+
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        for item in values:
+            x = _metric_value(item)
+            count += 1
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+
+        if count == 0:
+            raise ValueError("empty event list")
 
-        return {"mean": mean, "variance": variance}
+        return {"mean": mean, "variance": m2 / count}
 
     return _run_in_pipeline(
         _inner,
@@ -87,6 +345,12 @@ def build_baseline(events: List[Dict[str, Any]]) -> Dict[str, float]:
     )
 
 
+def build_baseline(events: List[Dict[str, Any]]) -> Dict[str, float]:
+    if not events:
+        raise ValueError("empty event list")
+    return build_baseline_stream(events)
+
+
 def evaluate_anomaly(event: Dict[str, Any], profile: Any) -> bool:
     def _inner():
         _validate_profile(profile)
@@ -107,4 +371,30 @@ def evaluate_anomaly(event: Dict[str, Any], profile: Any) -> bool:
         _inner,
         default=False,
         extra_fatal=(KeyError, TypeError, ValueError)
-    )
\ No newline at end of file
+    )
+
+
+def evaluate_anomalies(values: Iterable[Any], profile: Any) -> Sequence[bool]:
+    # A sequence of bools: a NumPy mask on the vectorised path, kept as an array so large
+    # inputs are not boxed into Python bools, and a list otherwise.
+    def _inner():
+        _validate_profile(profile)
+        mean = float(profile["mean"])
+        variance = float(profile["variance"])
+        threshold = ANOMALY_THRESHOLD_SIGMA * math.sqrt(variance) if variance > 0 else 0.0
+
+        arr = _as_float_array(values)
+        if arr is not None:
+            if variance == 0:
+                return arr != mean
+            return np.abs(arr - mean) > threshold
+
+        if variance == 0:
+            return [_metric_value(v) != mean for v in values]
+        return [abs(_metric_value(v) - mean) > threshold for v in values]
+
+    return _run_in_pipeline(
+        _inner,
+        default=[],
+        extra_fatal=(KeyError, TypeError, ValueError)
+    )
@@ -0,0 +1,67 @@
+import logging
+import marshal
+import os
+import struct
+import sys
+import zlib
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_MAGIC = b"HIDSCKPT"
+CHECKPOINT_FORMAT_VERSION = 1
+
+# magic, format version, python major/minor (marshal output is version specific), payload length, crc32
+_HEADER = struct.Struct("<8sHBBII")
+
+
+def write_checkpoint(path: str, payload: Dict[str, Any]) -> int:
+    data = marshal.dumps(payload)
+    header = _HEADER.pack(
+        CHECKPOINT_MAGIC, CHECKPOINT_FORMAT_VERSION,
+        sys.version_info[0], sys.version_info[1],
+        len(data), zlib.crc32(data)
+    )
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(header) + len(data)
+
+
+def read_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+
+    if len(raw) < _HEADER.size:
+        logger.warning("Checkpoint %s is truncated, ignoring it", path)
+        return None
+    magic, version, major, minor, length, crc = _HEADER.unpack_from(raw)
+    if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_FORMAT_VERSION:
+        logger.warning("Checkpoint %s has an unknown format, ignoring it", path)
+        return None
+    if (major, minor) != sys.version_info[:2]:
+        logger.warning(
+            "Checkpoint %s was written by Python %d.%d, ignoring it", path, major, minor
+        )
+        return None
+
+    data = raw[_HEADER.size:]
+    if len(data) != length or zlib.crc32(data) != crc:
+        logger.warning("Checkpoint %s is corrupt, ignoring it", path)
+        return None
+    try:
+        return marshal.loads(data)
+    except (EOFError, ValueError, TypeError) as e:
+        logger.warning("Checkpoint %s could not be decoded: %s", path, e)
+        return None
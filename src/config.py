@@ -7,8 +7,17 @@ LOG_DIR = os.path.join(BASE_DIR, "logs")
 LOG_FILE = "system.log"
 
 ALERT_LOG_FILE = os.path.join(LOG_DIR, "alerts.log")
+# Extra alert destinations; each one is enabled only when set.
+ALERT_SYSLOG_SOCKET = os.getenv("HIDS_ALERT_SYSLOG_SOCKET")
+ALERT_WEBHOOK_URL = os.getenv("HIDS_ALERT_WEBHOOK_URL")
+ALERT_JSONL_FILE = os.getenv("HIDS_ALERT_JSONL_FILE")
+
+STATE_DIR = os.path.join(BASE_DIR, "state")
+SPILL_DIR = os.path.join(STATE_DIR, "spill")
+PROFILE_DIR = os.path.join(STATE_DIR, "profiles")
+ALERT_STORE_PATH = os.path.join(STATE_DIR, "alerts.db")
 
 MAX_FAILED_ATTEMPTS = 5
 TIME_WINDOW = 60
 
-LOG_LEVEL = logging.DEBUG if os.getenv("DEBUG_MODE", "true").lower() == "true" else logging.INFO
\ No newline at end of file
+LOG_LEVEL = logging.DEBUG if os.getenv("DEBUG_MODE", "false").lower() == "true" else logging.INFO
\ No newline at end of file
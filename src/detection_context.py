@@ -1,21 +1,63 @@
+import os
 import threading
 import queue
 import time
 import uuid
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable
 
 from src.worker import detection_worker
-from src.baseline import get_baseline_snapshot, update_baseline, build_baseline, evaluate_anomaly
-from src.metrics import WorkerMetrics
-from src.logger import get_runtime_logger, get_detection_logger
-from src.config import LOG_DIR, LOG_LEVEL
+from src.alerts import alert_aggregation_stats, alert_writer_stats
+from src.executor import PipelineExecutor
+from src.profiling import profiler_status
+from src.event_queue import (
+    BoundedEventQueue, CoalescingEventQueue, CoalescedEvent, MultiLaneEventQueue, SpillingEventQueue, DEFAULT_LANE
+)
+from src.checkpoint import read_checkpoint, write_checkpoint
+from src.baseline import (
+    get_baseline_snapshot, update_baseline, build_baseline, evaluate_anomaly, get_baseline_threshold
+)
+from src.metrics import WorkerMetrics, RATE_REPORT_WINDOWS
+from src.logger import get_runtime_logger, get_detection_logger, logging_stats
+from src.config import LOG_DIR, LOG_LEVEL, SPILL_DIR, STATE_DIR
 
 DEFAULT_NUM_WORKERS = 4
 BACKPRESSURE_THRESHOLD = 1000
+BACKPRESSURE_LOW_WATERMARK = BACKPRESSURE_THRESHOLD // 2
 BACKPRESSURE_ACTION = "warn"
+BACKPRESSURE_DELAY_TIMEOUT = 5.0
+BLOCKING_PUT_POLL_INTERVAL = 0.5
+QUEUE_MAXSIZE = 10 * BACKPRESSURE_THRESHOLD
+INGRESS_MODE = "fifo"
+PRIORITY_LANE = "priority"
+LANE_WEIGHTS = ((PRIORITY_LANE, 8), (DEFAULT_LANE, 1))
+PRIORITY_SCORE_THRESHOLD = None
+# "spill" mode keeps QUEUE_MAXSIZE events in memory and overflows to disk up to this many.
+SPILL_MAX_EVENTS = 10_000_000
+SPILL_SEGMENT_RECORDS = 65536
 HEARTBEAT_INTERVAL = 5
+STOP_DRAIN_DEADLINE = 10.0
+# Engine state and undrained events are saved here on stop and restored on start; None disables it.
+CHECKPOINT_PATH = os.path.join(STATE_DIR, "runtime.ckpt")
 WORKER_RESTART_LIMIT = 3
+WORKER_BATCH_SIZE = 256
+THROUGHPUT_WINDOW = RATE_REPORT_WINDOWS[0]
+
+# Off by default: DetectionEngine has no internal locking, so more workers only add contention
+# on shared state. Enable it for engines that declare is_thread_safe.
+AUTOSCALE_ENABLED = False
+MIN_WORKERS = 1
+MAX_WORKERS = 16
+AUTOSCALE_INTERVAL = 1.0
+SCALE_UP_QUEUE_PRESSURE = 0.5
+SCALE_UP_QUEUE_WAIT = 0.25
+SCALE_DOWN_QUEUE_PRESSURE = 0.05
+SCALE_DOWN_QUEUE_WAIT = 0.01
+# Consecutive checks a condition must hold before acting, plus a cooldown after every
+# change, so a pool does not flap around a threshold.
+SCALE_UP_CHECKS = 2
+SCALE_DOWN_CHECKS = 30
+SCALE_COOLDOWN = 5.0
 
 
 class DetectionSessionContext:
@@ -33,33 +75,104 @@ class DetectionSessionContext:
 
 
 class DetectionRuntime:
-    def __init__(self, engine, num_workers: int = DEFAULT_NUM_WORKERS):
+    def __init__(
+        self,
+        engine,
+        num_workers: int = DEFAULT_NUM_WORKERS,
+        ingress_mode: Optional[str] = None,
+        denylist: Optional[Iterable[str]] = None,
+        min_workers: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        autoscale: Optional[bool] = None
+    ):
+        self.runtime_logger = get_runtime_logger()
+        self.detection_logger = get_detection_logger()
         self._validate_engine(engine)
         self.engine = engine
-        self.num_workers = num_workers
-        self.event_queue = queue.Queue()
-        self.shutdown_event = threading.Event()
+
+        self.autoscale = AUTOSCALE_ENABLED if autoscale is None else autoscale
+        self.min_workers = MIN_WORKERS if min_workers is None else min_workers
+        self.max_workers = MAX_WORKERS if max_workers is None else max_workers
+        if not 1 <= self.min_workers <= self.max_workers:
+            raise ValueError("worker limits must satisfy 1 <= min_workers <= max_workers")
+        if self.autoscale:
+            self.num_workers = min(max(num_workers, self.min_workers), self.max_workers)
+        else:
+            self.num_workers = self.min_workers = self.max_workers = num_workers
+        self.ingress_mode = ingress_mode or INGRESS_MODE
+        self.denylist = set(denylist or ())
+        self.priority_score_threshold = (
+            PRIORITY_SCORE_THRESHOLD if PRIORITY_SCORE_THRESHOLD is not None
+            else getattr(engine, "RISK_THRESHOLD", 10)
+        )
         self.metrics = WorkerMetrics()
-        self.runtime_logger = get_runtime_logger()
-        self.detection_logger = get_detection_logger()
+        self.event_queue = self._create_event_queue(self.ingress_mode)
+        self.shutdown_event = threading.Event()
 
         self._heartbeat_dict: Dict[int, float] = {}
         self._heartbeat_lock = threading.Lock()
-        self._worker_ids = list(range(num_workers))
 
         self._worker_lock = threading.Lock()
-        self._worker_threads: List[threading.Thread] = []
+        self._worker_threads: Dict[int, threading.Thread] = {}
+        self._worker_stop_events: Dict[int, threading.Event] = {}
+        self._retired_threads: List[threading.Thread] = []
         self._worker_restart_counts: Dict[int, int] = {}
         self._supervisor_thread: Optional[threading.Thread] = None
         self._supervisor_stop = threading.Event()
 
+        self._scale_up_streak = 0
+        self._scale_down_streak = 0
+        self._last_scale_time = float("-inf")
+        self._last_queue_wait = None
+        self.last_scaling_decision: Optional[Dict[str, Any]] = None
+
         self.session_context = DetectionSessionContext()
+        self._created_at = time.monotonic()
+        self._stopping = False
+        self._stopped = False
+        self.startup_stats: Dict[str, Any] = {}
+        self.shutdown_stats: Dict[str, Any] = {}
 
         self.runtime_logger.info(
-            "DetectionRuntime initialized (session_id=%s) with %d workers",
-            self.session_context.session_id, num_workers
+            "DetectionRuntime initialized (session_id=%s) with %d workers (autoscale=%s, min=%d, max=%d)",
+            self.session_context.session_id, self.num_workers, self.autoscale, self.min_workers, self.max_workers
         )
 
+    def _create_event_queue(self, mode: str) -> BoundedEventQueue:
+        watermarks = {
+            "high_watermark": BACKPRESSURE_THRESHOLD,
+            "low_watermark": BACKPRESSURE_LOW_WATERMARK,
+            "on_high": self._on_backpressure_high,
+            "on_low": self._on_backpressure_low,
+            "on_dequeue": self.metrics.record_queue_wait,
+        }
+        if mode == "fifo":
+            return BoundedEventQueue(QUEUE_MAXSIZE, **watermarks)
+        if mode == "coalescing":
+            if not callable(getattr(self.engine, "process_coalesced_events", None)):
+                raise ValueError("coalescing ingress needs an engine with process_coalesced_events")
+            return CoalescingEventQueue(QUEUE_MAXSIZE, clock=getattr(self.engine, "clock", None), **watermarks)
+        if mode == "lanes":
+            return MultiLaneEventQueue(
+                QUEUE_MAXSIZE, lanes=LANE_WEIGHTS, lane_selector=self._select_lane, **watermarks
+            )
+        if mode == "spill":
+            return SpillingEventQueue(
+                QUEUE_MAXSIZE + SPILL_MAX_EVENTS, SPILL_DIR,
+                memory_items=QUEUE_MAXSIZE, segment_records=SPILL_SEGMENT_RECORDS, **watermarks
+            )
+        raise ValueError(f"Unknown ingress mode: {mode}")
+
+    def _select_lane(self, ip) -> str:
+        if ip in self.denylist:
+            return PRIORITY_LANE
+        ip_state = getattr(self.engine, "ip_state", None)
+        if ip_state:
+            state = ip_state.get(ip)
+            if state is not None and state.get("score", 0) >= self.priority_score_threshold:
+                return PRIORITY_LANE
+        return DEFAULT_LANE
+
     def _validate_engine(self, engine):
         required_methods = ["process_failed_login"]
         missing = [m for m in required_methods if not callable(getattr(engine, m, None))]
@@ -71,15 +184,78 @@ class DetectionRuntime:
             )
 
     def start(self):
+        self._restore_checkpoint()
         self._start_workers()
         self._start_supervisor()
-        self.runtime_logger.info("Runtime started")
+        self.startup_stats["ready_seconds"] = time.monotonic() - self._created_at
+        self.runtime_logger.info(
+            "Runtime started, ready in %.3fs (restored %d events, %d IPs from checkpoint)",
+            self.startup_stats["ready_seconds"],
+            self.startup_stats.get("restored_events", 0),
+            self.startup_stats.get("restored_ips", 0)
+        )
+
+    def _restore_checkpoint(self):
+        self.startup_stats = {"checkpoint_loaded": False, "restored_events": 0, "restored_ips": 0}
+        if not CHECKPOINT_PATH:
+            return
+
+        start = time.monotonic()
+        payload = read_checkpoint(CHECKPOINT_PATH)
+        if payload is None:
+            return
+
+        try:
+            if payload.get("ingress_mode", self.ingress_mode) != self.ingress_mode:
+                self.runtime_logger.info(
+                    "Checkpoint written in %s mode, restoring into %s mode",
+                    payload.get("ingress_mode"), self.ingress_mode
+                )
+            pending = self._restored_events(payload.get("pending", ()))
+
+            engine_state = payload.get("engine")
+            if engine_state is not None and callable(getattr(self.engine, "import_state", None)):
+                self.engine.import_state(engine_state)
+                self.startup_stats["restored_ips"] = len(engine_state.get("ip_state", {}))
+
+            if isinstance(self.event_queue, SpillingEventQueue):
+                # Checkpointed events are older than any spill segments adopted from disk.
+                restored = self.event_queue.put_front(pending)
+            else:
+                restored = 0
+                for item in pending:
+                    if self.event_queue.try_put(item, reason="checkpoint_overflow"):
+                        restored += 1
+        except Exception as e:
+            # Start from empty state, and keep the checkpoint aside for inspection rather than
+            # failing every restart on it.
+            self.runtime_logger.exception("Checkpoint %s could not be restored: %s", CHECKPOINT_PATH, e)
+            if callable(getattr(self.engine, "import_state", None)):
+                self.engine.import_state({})
+            self.startup_stats.update({"restored_ips": 0, "checkpoint_error": str(e)})
+            try:
+                os.replace(CHECKPOINT_PATH, CHECKPOINT_PATH + ".failed")
+            except OSError:
+                pass
+            return
+
+        # Removed only once its contents are back in the engine and the queue. A crash before
+        # this point replays the checkpoint on the next start instead of losing it.
+        os.remove(CHECKPOINT_PATH)
+
+        self.startup_stats.update({
+            "checkpoint_loaded": True,
+            "restored_events": restored,
+            "checkpoint_age": time.time() - payload.get("created_at", time.time()),
+            "load_seconds": time.monotonic() - start,
+        })
 
     def _start_workers(self):
         for i in range(self.num_workers):
             self._start_single_worker(i)
 
     def _start_single_worker(self, worker_id: int):
+        stop_event = threading.Event()
         t = threading.Thread(
             target=detection_worker,
             args=(self.event_queue, self.engine, self.shutdown_event),
@@ -88,18 +264,32 @@ class DetectionRuntime:
                 "metrics": self.metrics,
                 "backpressure_threshold": BACKPRESSURE_THRESHOLD,
                 "heartbeat_dict": self._heartbeat_dict,
-                "worker_id": worker_id
+                "worker_id": worker_id,
+                "batch_size": WORKER_BATCH_SIZE,
+                "stop_event": stop_event
             },
             name=f"DetectionWorker-{worker_id}",
             daemon=True
         )
-        t.start()
-        with self._worker_lock:
-            self._worker_threads.append(t)
         with self._heartbeat_lock:
             self._heartbeat_dict[worker_id] = time.monotonic()
+        with self._worker_lock:
+            self._worker_threads[worker_id] = t
+            self._worker_stop_events[worker_id] = stop_event
+        t.start()
         self.runtime_logger.debug("Worker %d started", worker_id)
 
+    def _retire_worker(self, worker_id: int):
+        with self._worker_lock:
+            t = self._worker_threads.pop(worker_id, None)
+            stop_event = self._worker_stop_events.pop(worker_id, None)
+            if t is not None:
+                self._retired_threads.append(t)
+        if stop_event is not None:
+            stop_event.set()
+        with self._heartbeat_lock:
+            self._heartbeat_dict.pop(worker_id, None)
+
     def _start_supervisor(self):
         self._supervisor_stop.clear()
         self._supervisor_thread = threading.Thread(
@@ -110,20 +300,43 @@ class DetectionRuntime:
         self._supervisor_thread.start()
 
     def _monitor_workers(self):
-        while not self._supervisor_stop.is_set():
-            time.sleep(HEARTBEAT_INTERVAL)
+        last_heartbeat_check = time.monotonic()
+        while not self._supervisor_stop.wait(AUTOSCALE_INTERVAL):
             if self.shutdown_event.is_set():
                 break
 
             now = time.monotonic()
-            with self._heartbeat_lock:
-                for worker_id, last_heartbeat in list(self._heartbeat_dict.items()):
-                    if now - last_heartbeat > HEARTBEAT_INTERVAL * 2:
-                        self.runtime_logger.warning(
-                            "Worker %d heartbeat timeout (last: %.1fs ago)",
-                            worker_id, now - last_heartbeat
-                        )
-                        self._restart_worker(worker_id)
+            if now - last_heartbeat_check >= HEARTBEAT_INTERVAL:
+                last_heartbeat_check = now
+                self._check_heartbeats(now)
+                PipelineExecutor.flush_failure_summaries(now)
+
+            if self.autoscale:
+                PipelineExecutor.execute(
+                    self._autoscale_check,
+                    now,
+                    default=None,
+                    fatal_exceptions=(KeyboardInterrupt, SystemExit)
+                )
+
+            with self._worker_lock:
+                self._retired_threads = [t for t in self._retired_threads if t.is_alive()]
+
+    def _check_heartbeats(self, now: float):
+        with self._worker_lock:
+            active = set(self._worker_threads)
+        with self._heartbeat_lock:
+            stale = [
+                (worker_id, now - last_heartbeat)
+                for worker_id, last_heartbeat in self._heartbeat_dict.items()
+                if worker_id in active and now - last_heartbeat > HEARTBEAT_INTERVAL * 2
+            ]
+        # Restarts happen outside the heartbeat lock: _start_single_worker takes it again.
+        for worker_id, age in stale:
+            self.runtime_logger.warning(
+                "Worker %d heartbeat timeout (last: %.1fs ago)", worker_id, age
+            )
+            self._restart_worker(worker_id)
 
     def _restart_worker(self, worker_id: int):
         with self._worker_lock:
@@ -136,65 +349,228 @@ class DetectionRuntime:
                 return
             self._worker_restart_counts[worker_id] = restart_count
 
-            new_threads = []
-            removed = False
-            for t in self._worker_threads:
-                if t.name == f"DetectionWorker-{worker_id}":
-                    removed = True
-                else:
-                    new_threads.append(t)
-            if removed:
-                self._worker_threads = new_threads
-            else:
+            if worker_id not in self._worker_threads:
                 self.runtime_logger.warning(
                     "Worker %d not found in thread list during restart", worker_id
                 )
 
+        # A hung worker that later wakes up exits instead of competing with its replacement.
+        self._retire_worker(worker_id)
         self._start_single_worker(worker_id)
         self.runtime_logger.info("Worker %d restarted (attempt %d)", worker_id, restart_count)
 
-    def submit_event(self, ip: str) -> bool:
+    def _autoscale_check(self, now: float) -> Optional[Dict[str, Any]]:
         qsize = self.event_queue.qsize()
-        if qsize > BACKPRESSURE_THRESHOLD:
-            if BACKPRESSURE_ACTION == "drop":
-                self.runtime_logger.warning(
-                    "Backpressure: queue size %d > %d, dropping event (IP: %s)",
-                    qsize, BACKPRESSURE_THRESHOLD, ip
-                )
-                return False
-            elif BACKPRESSURE_ACTION == "delay":
-                wait_start = time.monotonic()
-                while self.event_queue.qsize() > BACKPRESSURE_THRESHOLD:
-                    if time.monotonic() - wait_start > 5.0:
-                        self.runtime_logger.warning(
-                            "Backpressure delay timeout, dropping event (IP: %s)", ip
-                        )
-                        return False
-                    time.sleep(0.1)
-            else:
-                self.runtime_logger.warning(
-                    "Backpressure warning: queue size %d > %d",
-                    qsize, BACKPRESSURE_THRESHOLD
-                )
-        self.event_queue.put(ip)
-        return True
+        queue_pressure = qsize / BACKPRESSURE_THRESHOLD if BACKPRESSURE_THRESHOLD > 0 else 0.0
+
+        queue_wait = self.metrics.queue_wait_histogram()
+        recent = queue_wait.since(self._last_queue_wait) if self._last_queue_wait else queue_wait
+        self._last_queue_wait = queue_wait
+        wait_p90 = recent.percentile(90)
+
+        if queue_pressure >= SCALE_UP_QUEUE_PRESSURE or wait_p90 >= SCALE_UP_QUEUE_WAIT:
+            self._scale_up_streak += 1
+            self._scale_down_streak = 0
+        elif queue_pressure <= SCALE_DOWN_QUEUE_PRESSURE and wait_p90 <= SCALE_DOWN_QUEUE_WAIT:
+            self._scale_down_streak += 1
+            self._scale_up_streak = 0
+        else:
+            self._scale_up_streak = 0
+            self._scale_down_streak = 0
+
+        if now - self._last_scale_time < SCALE_COOLDOWN:
+            return None
+
+        with self._worker_lock:
+            current = len(self._worker_threads)
+
+        if self._scale_up_streak >= SCALE_UP_CHECKS and current < self.max_workers:
+            target = min(self.max_workers, current + max(1, current // 2))
+            direction = "up"
+        elif self._scale_down_streak >= SCALE_DOWN_CHECKS and current > self.min_workers:
+            target = current - 1
+            direction = "down"
+        else:
+            return None
+
+        decision = {
+            "direction": direction,
+            "from": current,
+            "to": target,
+            "queue_size": qsize,
+            "queue_pressure": round(queue_pressure, 3),
+            "queue_wait_p90": wait_p90,
+            "dequeued": recent.total,
+            "timestamp": time.time(),
+        }
+        self.runtime_logger.info(
+            "Autoscale %s: %d -> %d workers (queue_size=%d, queue_pressure=%.2f, queue_wait_p90=%.3fs, dequeued=%d)",
+            direction, current, target, qsize, queue_pressure, wait_p90, recent.total
+        )
+        self._scale_to(target)
+        self._last_scale_time = now
+        self._scale_up_streak = 0
+        self._scale_down_streak = 0
+        self.last_scaling_decision = decision
+        return decision
+
+    def _scale_to(self, target: int):
+        with self._worker_lock:
+            worker_ids = sorted(self._worker_threads)
+
+        if target > len(worker_ids):
+            taken = set(worker_ids)
+            worker_id = 0
+            for _ in range(target - len(worker_ids)):
+                while worker_id in taken:
+                    worker_id += 1
+                taken.add(worker_id)
+                self._start_single_worker(worker_id)
+        else:
+            for worker_id in worker_ids[target:]:
+                self._retire_worker(worker_id)
+        self.num_workers = target
+
+    def _on_backpressure_high(self, qsize: int):
+        self.runtime_logger.warning(
+            "Backpressure: queue size %d reached high watermark %d (action=%s)",
+            qsize, BACKPRESSURE_THRESHOLD, BACKPRESSURE_ACTION
+        )
 
-    def stop(self, timeout: Optional[float] = None):
+    def _on_backpressure_low(self, qsize: int):
+        self.runtime_logger.info(
+            "Backpressure resolved: queue size %d below low watermark %d",
+            qsize, BACKPRESSURE_LOW_WATERMARK
+        )
+
+    def submit_event(self, ip: str) -> bool:
+        if self._stopping:
+            self.event_queue.record_drop("shutdown")
+            return False
+        if BACKPRESSURE_ACTION == "drop":
+            return self.event_queue.try_put(ip)
+        if BACKPRESSURE_ACTION == "delay":
+            return self.event_queue.offer(ip, BACKPRESSURE_DELAY_TIMEOUT, reason="delay_timeout")
+
+        while not self.shutdown_event.is_set():
+            try:
+                self.event_queue.put(ip, timeout=BLOCKING_PUT_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        self.event_queue.record_drop("shutdown")
+        return False
+
+    def stop(self, timeout: Optional[float] = None, drain: bool = True, deadline: float = STOP_DRAIN_DEADLINE):
+        if self._stopped:
+            return
         self.runtime_logger.info("Stopping runtime (session_id=%s)...", self.session_context.session_id)
+        self._stopping = True
+        started = time.monotonic()
+
+        with self._worker_lock:
+            workers_alive = any(t.is_alive() for t in self._worker_threads.values())
+        if drain and workers_alive:
+            self._drain(started + deadline)
+        drained_seconds = time.monotonic() - started
+
         self.shutdown_event.set()
         self._supervisor_stop.set()
         if self._supervisor_thread and self._supervisor_thread.is_alive():
             self._supervisor_thread.join(timeout)
 
         with self._worker_lock:
-            threads = list(self._worker_threads)
+            threads = list(self._worker_threads.values()) + self._retired_threads
         for t in threads:
             t.join(timeout)
-        self.runtime_logger.info("Runtime stopped")
+
+        self.shutdown_stats = {
+            "drain_seconds": drained_seconds,
+            "undrained_events": self.event_queue.qsize(),
+        }
+        if CHECKPOINT_PATH:
+            PipelineExecutor.execute(
+                self._write_checkpoint,
+                default=None,
+                fatal_exceptions=(KeyboardInterrupt, SystemExit)
+            )
+        if isinstance(self.event_queue, SpillingEventQueue):
+            self.event_queue.close()
+        self._stopped = True
+        self.runtime_logger.info(
+            "Runtime stopped in %.3fs (%d events left for checkpoint)",
+            time.monotonic() - started, self.shutdown_stats["undrained_events"]
+        )
+
+    def _drain(self, deadline: float):
+        q = self.event_queue
+        with q.all_tasks_done:
+            while q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.runtime_logger.warning(
+                        "Drain deadline reached with %d events still queued", q.unfinished_tasks
+                    )
+                    return
+                q.all_tasks_done.wait(remaining)
+
+    def _restored_events(self, items: Iterable[Any]) -> List[Any]:
+        # Coalesced records are checkpointed as (ip, timestamps, count). A coalescing queue gets
+        # them back as CoalescedEvent; the other modes carry one IP string per attempt, so the
+        # record is expanded, up to what the queue can hold.
+        coalescing = isinstance(self.event_queue, CoalescingEventQueue)
+        capacity = self.event_queue.maxsize
+        pending = []
+        for item in items:
+            if isinstance(item, tuple):
+                ip, timestamps, count = item
+                if not coalescing:
+                    pending.extend([ip] * min(count, max(0, capacity - len(pending))))
+                    continue
+                item = CoalescedEvent(ip, timestamps)
+                item.count = count
+            pending.append(item)
+        return pending
+
+    def _pending_events(self) -> List[Any]:
+        q = self.event_queue
+        # Spilled segments stay on disk for the next queue; only the in-memory part is saved here.
+        limit = q.spill_stats()["memory"] if isinstance(q, SpillingEventQueue) else None
+        pending = []
+        while limit is None or len(pending) < limit:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, CoalescedEvent):
+                item = (item.ip, list(item.timestamps), item.count)
+            pending.append(item)
+        return pending
+
+    def _write_checkpoint(self):
+        start = time.monotonic()
+        export_state = getattr(self.engine, "export_state", None)
+        payload = {
+            "created_at": time.time(),
+            "session_id": self.session_context.session_id,
+            "ingress_mode": self.ingress_mode,
+            "engine": export_state() if callable(export_state) else None,
+            "pending": self._pending_events(),
+        }
+        size = write_checkpoint(CHECKPOINT_PATH, payload)
+        self.shutdown_stats.update({
+            "checkpoint_bytes": size,
+            "checkpoint_events": len(payload["pending"]),
+            "checkpoint_seconds": time.monotonic() - start,
+        })
+        self.runtime_logger.info(
+            "Checkpoint written to %s: %d events, %d bytes in %.3fs",
+            CHECKPOINT_PATH, len(payload["pending"]), size, self.shutdown_stats["checkpoint_seconds"]
+        )
 
     def health_status(self) -> dict:
         with self._worker_lock:
-            alive_workers = sum(1 for t in self._worker_threads if t.is_alive())
+            alive_workers = sum(1 for t in self._worker_threads.values() if t.is_alive())
             total_workers = len(self._worker_threads)
 
         qsize = self.event_queue.qsize()
@@ -208,8 +584,7 @@ class DetectionRuntime:
 
         queue_pressure = qsize / BACKPRESSURE_THRESHOLD if BACKPRESSURE_THRESHOLD > 0 else 0.0
 
-        ewma = metrics_snapshot.get('ewma_processing_time')
-        recent_throughput = 1.0 / ewma if ewma and ewma > 0 else 0.0
+        recent_throughput = metrics_snapshot['event_rate'][f'{THROUGHPUT_WINDOW}s']
         stagnation = False
         if qsize > BACKPRESSURE_THRESHOLD * 0.8 and recent_throughput < 0.1:
             stagnation = True
@@ -225,10 +600,33 @@ class DetectionRuntime:
             "metrics": metrics_snapshot,
             "worker_efficiency": round(worker_efficiency, 3),
             "queue_pressure": round(queue_pressure, 3),
-            "recent_throughput_eps": round(recent_throughput, 2),
+            "recent_throughput_eps": recent_throughput,
+            "latency": metrics_snapshot['latency'],
+            "per_worker": metrics_snapshot['per_worker'],
             "stagnation_detected": stagnation,
             "health_score": health_score,
             "backpressure_action": BACKPRESSURE_ACTION,
+            "ingress_mode": self.ingress_mode,
+            "backpressure_active": self.event_queue.above_high_watermark,
+            "queue_capacity": self.event_queue.maxsize,
+            "dropped_events": self.event_queue.get_drop_counts(),
+            "lanes": self.event_queue.lane_stats() if isinstance(self.event_queue, MultiLaneEventQueue) else {},
+            "spill": self.event_queue.spill_stats() if isinstance(self.event_queue, SpillingEventQueue) else {},
+            "startup": self.startup_stats,
+            "step_failures": PipelineExecutor.failure_counts(),
+            "pipeline_steps": PipelineExecutor.step_stats(),
+            "circuit_breakers": PipelineExecutor.breaker_status(),
+            "alert_writer": alert_writer_stats(),
+            "alert_aggregation": alert_aggregation_stats(),
+            "profiler": profiler_status(),
+            "logging": logging_stats(),
+            "autoscale": {
+                "enabled": self.autoscale,
+                "target_workers": self.num_workers,
+                "min_workers": self.min_workers,
+                "max_workers": self.max_workers,
+                "last_decision": self.last_scaling_decision,
+            },
         }
 
     def _compute_health_score(self, alive_workers: int, qsize: int, metrics: dict) -> int:
@@ -252,11 +650,11 @@ class DetectionRuntime:
 
         return max(0, min(100, score))
 
-    def update_baseline(self, failed_count: int):
-        update_baseline(failed_count)
+    def update_baseline(self, failed_count: int, ip: Optional[str] = None):
+        update_baseline(failed_count, ip)
 
-    def get_threshold(self) -> float:
-        return get_baseline_threshold()
+    def get_threshold(self, ip: Optional[str] = None) -> float:
+        return get_baseline_threshold(ip)
 
     def build_baseline_from_events(self, events):
         return build_baseline(events)
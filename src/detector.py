@@ -1,8 +1,28 @@
 import time
-import statistics
+import math
+from bisect import bisect_left, bisect_right
 from src.alerts import trigger_alert
-from src.executor import PipelineExecutor
-from typing import Dict, Any
+from src.executor import pipeline_step
+from typing import Dict, Any, List, NamedTuple, Sequence, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DETECTION_SCORE_THRESHOLD = 90
+
+
+@pipeline_step(default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit), positional=True)
+def _raise_alert(message: str, rule: str, ip: str) -> None:
+    trigger_alert(message, rule, ip)
+
+
+class BatchDetection(NamedTuple):
+    # Plain lists on both backends: the mask, the detected positions and their processes.
+    mask: List[bool]
+    indices: List[int]
+    detected: List[Any]
 
 
 class DetectionEngine:
@@ -13,6 +33,7 @@ class DetectionEngine:
         self.ip_state = {}
         self.baseline_history = {}
         self.alert_cooldown_state = {}
+        self._baseline_sums = {}
 
         self.FAILED_LOGIN_SCORE = 2
         self.REPEAT_PENALTY = 3
@@ -31,28 +52,55 @@ class DetectionEngine:
 
         self.SCORE_DECAY_PER_SECOND = 0.5
 
+    def export_state(self) -> Dict[str, Any]:
+        return {
+            "ip_state": self.ip_state,
+            "baseline_history": self.baseline_history,
+            "alert_cooldown_state": self.alert_cooldown_state,
+        }
+
+    def import_state(self, state: Dict[str, Any]) -> None:
+        self.ip_state = dict(state.get("ip_state", {}))
+        self.baseline_history = {ip: list(h) for ip, h in state.get("baseline_history", {}).items()}
+        self.alert_cooldown_state = dict(state.get("alert_cooldown_state", {}))
+        self._baseline_sums = {
+            ip: [sum(history), sum(v * v for v in history)]
+            for ip, history in self.baseline_history.items()
+        }
+
     def _get_baseline_threshold(self, ip):
         history = self.baseline_history.get(ip, [])
+        size = len(history)
 
-        if len(history) < 10:
+        if size < 10:
             return 5
 
-        mean = statistics.mean(history)
-        stdev = statistics.stdev(history) if len(history) > 1 else 1
+        total, sq_total = self._baseline_sums[ip]
+        mean = total / size
+        variance = (sq_total - total * mean) / (size - 1)
 
-        return mean + (2 * stdev)
+        return mean + (2 * math.sqrt(max(variance, 0.0)))
 
     def _update_baseline(self, ip, value):
         if ip not in self.baseline_history:
             self.baseline_history[ip] = []
+            self._baseline_sums[ip] = [0, 0]
 
-        self.baseline_history[ip].append(value)
+        history = self.baseline_history[ip]
+        sums = self._baseline_sums[ip]
 
-        if len(self.baseline_history[ip]) > 100:
-            self.baseline_history[ip].pop(0)
+        history.append(value)
+        sums[0] += value
+        sums[1] += value * value
 
-    def _can_trigger_alert(self, key):
-        now = self.clock()
+        if len(history) > 100:
+            evicted = history.pop(0)
+            sums[0] -= evicted
+            sums[1] -= evicted * evicted
+
+    def _can_trigger_alert(self, key, now=None):
+        if now is None:
+            now = self.clock()
 
         if key not in self.alert_cooldown_state:
             self.alert_cooldown_state[key] = 0
@@ -97,10 +145,130 @@ class DetectionEngine:
                 del self.ip_state[sorted_ips[i][0]]
 
     def process_failed_login(self, ip: str):
+        self._cleanup_ips()
+        self._record_failed_login(ip)
 
-        now = self.clock()
+    def process_failed_logins(self, ips: Iterable[str]):
+        self._cleanup_ips()
+        for ip in ips:
+            self._record_failed_login(ip)
 
+    def process_coalesced_events(self, events: Iterable[Any]):
         self._cleanup_ips()
+        for event in events:
+            if event.timestamps:
+                self._record_coalesced(event.ip, event.timestamps, event.count)
+
+    def _record_coalesced(self, ip: str, timestamps: Iterable[float], count: int):
+        # A whole coalesced record in one step: the attempt window is extended in bulk and the
+        # score follows the same per-attempt rules as _record_failed_login in plain arithmetic.
+        # Risk and burst alerts fire at their first threshold crossing past the cooldown; the
+        # baseline gets one sample per record. One record raises at most one alert per rule.
+        times = sorted(timestamps)
+        first, now = times[0], times[-1]
+
+        if ip not in self.ip_state:
+            self.ip_state[ip] = {
+                "attempts": [],
+                "score": 0,
+                "last_seen": first,
+                "last_score_update": first
+            }
+        state = self.ip_state[ip]
+        attempts = state["attempts"]
+
+        if attempts and first < attempts[-1]:
+            # Keep the window sorted when a record is older than the newest attempt, e.g.
+            # one restored from a checkpoint.
+            floor = attempts[-1]
+            times = [max(t, floor) for t in times]
+            first, now = times[0], times[-1]
+
+        time_window = self.TIME_WINDOW
+        burst_window = self.BURST_WINDOW
+        decay = self.SCORE_DECAY_PER_SECOND
+        score = state["score"]
+        last_update = state.get("last_score_update", first)
+        previous = attempts[-1] if attempts else None
+        previous_in_window = previous is not None and previous > first - time_window
+
+        # Attempts beyond the timestamp cap have no recorded time. They are older than the kept
+        # timestamps, so they add score as repeats but never enter the time-based window.
+        untimed = count - len(times)
+        if untimed > 0:
+            if first > last_update:
+                score = max(0, score - (first - last_update) * decay)
+                last_update = first
+            score += untimed * (self.FAILED_LOGIN_SCORE + self.REPEAT_PENALTY)
+            if not previous_in_window:
+                score -= self.REPEAT_PENALTY
+        risk_ready = self.alert_cooldown_state.get(f"risk_{ip}", 0) + self.ALERT_COOLDOWN
+        burst_ready = self.alert_cooldown_state.get(f"burst_{ip}", 0) + self.ALERT_COOLDOWN
+        risk_hit = (first, score) if score >= self.RISK_THRESHOLD and first >= risk_ready else None
+        burst_hit = None
+
+        base = len(attempts)
+        attempts.extend(times)
+        low = bisect_left(attempts, first - burst_window)
+        for i in range(base, len(attempts)):
+            t = attempts[i]
+            if t > last_update:
+                score = max(0, score - (t - last_update) * decay)
+                last_update = t
+            score += self.FAILED_LOGIN_SCORE
+            if i > 0 and attempts[i - 1] > t - time_window:
+                score += self.REPEAT_PENALTY
+                if t - attempts[i - 1] < 5:
+                    score += self.RAPID_ATTEMPT_BONUS
+            elif i == base and untimed > 0:
+                score += self.REPEAT_PENALTY
+            if risk_hit is None and score >= self.RISK_THRESHOLD and t >= risk_ready:
+                risk_hit = (t, score)
+            if burst_hit is None and t >= burst_ready:
+                while attempts[low] < t - burst_window:
+                    low += 1
+                if i - low + 1 >= self.BURST_THRESHOLD:
+                    burst_hit = (t, i - low + 1)
+
+        expired = bisect_right(attempts, now - time_window)
+        if expired:
+            del attempts[:expired]
+        state["score"] = score
+        state["last_seen"] = now
+        state["last_score_update"] = last_update
+
+        failed_count = len(attempts)
+        self._update_baseline(ip, failed_count)
+        threshold = self._get_baseline_threshold(ip)
+
+        if failed_count > threshold:
+            if self._can_trigger_alert(f"baseline_{ip}", now):
+                _raise_alert(
+                    f"Behavioural anomaly detected from IP {ip} "
+                    f"(count={failed_count}, threshold={threshold:.2f})",
+                    "baseline", ip
+                )
+
+        if burst_hit is not None:
+            if self._can_trigger_alert(f"burst_{ip}", burst_hit[0]):
+                _raise_alert(
+                    f"Burst attack detected from IP {ip} "
+                    f"(burst_count={burst_hit[1]})",
+                    "burst", ip
+                )
+
+        if risk_hit is not None:
+            if self._can_trigger_alert(f"risk_{ip}", risk_hit[0]):
+                _raise_alert(
+                    f"High risk intrusion detected from IP {ip} "
+                    f"(score={risk_hit[1]})",
+                    "risk", ip
+                )
+
+    def _record_failed_login(self, ip: str, now=None):
+
+        if now is None:
+            now = self.clock()
 
         if ip not in self.ip_state:
             self.ip_state[ip] = {
@@ -116,60 +284,51 @@ class DetectionEngine:
 
         self._apply_score_decay(ip, now)
 
-        state["attempts"] = [
-            t for t in state["attempts"]
-            if now - t < self.TIME_WINDOW
-        ]
+        attempts = state["attempts"]
+        expired = bisect_right(attempts, now - self.TIME_WINDOW)
+        if expired:
+            del attempts[:expired]
 
         state["score"] += self.FAILED_LOGIN_SCORE
 
-        if len(state["attempts"]) > 0:
+        if len(attempts) > 0:
             state["score"] += self.REPEAT_PENALTY
 
-        if state["attempts"]:
-            if now - state["attempts"][-1] < 5:
+        if attempts:
+            if now - attempts[-1] < 5:
                 state["score"] += self.RAPID_ATTEMPT_BONUS
 
-        state["attempts"].append(now)
+        attempts.append(now)
 
-        failed_count = len(state["attempts"])
+        failed_count = len(attempts)
 
         self._update_baseline(ip, failed_count)
         threshold = self._get_baseline_threshold(ip)
 
         if failed_count > threshold:
-            if self._can_trigger_alert(f"baseline_{ip}"):
-                PipelineExecutor.execute(
-                    trigger_alert,
+            if self._can_trigger_alert(f"baseline_{ip}", now):
+                _raise_alert(
                     f"Behavioural anomaly detected from IP {ip} "
                     f"(count={failed_count}, threshold={threshold:.2f})",
-                    default=None,
-                    fatal_exceptions=(KeyboardInterrupt, SystemExit)
+                    "baseline", ip
                 )
 
-        burst_count = len([
-            t for t in state["attempts"]
-            if now - t <= self.BURST_WINDOW
-        ])
+        burst_count = len(attempts) - bisect_left(attempts, now - self.BURST_WINDOW)
 
         if burst_count >= self.BURST_THRESHOLD:
-            if self._can_trigger_alert(f"burst_{ip}"):
-                PipelineExecutor.execute(
-                    trigger_alert,
+            if self._can_trigger_alert(f"burst_{ip}", now):
+                _raise_alert(
                     f"Burst attack detected from IP {ip} "
                     f"(burst_count={burst_count})",
-                    default=None,
-                    fatal_exceptions=(KeyboardInterrupt, SystemExit)
+                    "burst", ip
                 )
 
         if state["score"] >= self.RISK_THRESHOLD:
-            if self._can_trigger_alert(f"risk_{ip}"):
-                PipelineExecutor.execute(
-                    trigger_alert,
+            if self._can_trigger_alert(f"risk_{ip}", now):
+                _raise_alert(
                     f"High risk intrusion detected from IP {ip} "
                     f"(score={state['score']})",
-                    default=None,
-                    fatal_exceptions=(KeyboardInterrupt, SystemExit)
+                    "risk", ip
                 )
 
 
@@ -184,9 +343,30 @@ def analyze_event(event: Dict[str, Any]) -> Dict[str, Any]:
         score = float(event["activity_score"])
     except (TypeError, ValueError):
         raise TypeError("activity_score must be numeric")
-    detected = score >= 90
+    detected = score >= DETECTION_SCORE_THRESHOLD
     result = {"detected": detected}
     for key, value in event.items():
         if key not in ["process", "activity_score"]:
             result[key] = value
-    return result
\ No newline at end of file
+    return result
+
+
+def analyze_events_batch(processes: Sequence[Any], scores: Sequence[Any]) -> BatchDetection:
+    if len(processes) != len(scores):
+        raise ValueError("processes and scores must have the same length")
+
+    if np is not None:
+        try:
+            values = np.asarray(scores, dtype=float)
+        except (TypeError, ValueError):
+            raise TypeError("activity_score must be numeric")
+        hits = values >= DETECTION_SCORE_THRESHOLD
+        mask, indices = hits.tolist(), np.flatnonzero(hits).tolist()
+    else:
+        threshold = DETECTION_SCORE_THRESHOLD
+        try:
+            mask = [float(score) >= threshold for score in scores]
+        except (TypeError, ValueError):
+            raise TypeError("activity_score must be numeric")
+        indices = [i for i, hit in enumerate(mask) if hit]
+    return BatchDetection(mask, indices, [processes[i] for i in indices])
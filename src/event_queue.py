@@ -0,0 +1,632 @@
+import os
+import queue
+import struct
+import threading
+import time
+from collections import deque
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_MAXSIZE = 10000
+MAX_COALESCED_TIMESTAMPS = 10000
+DEFAULT_LANE = "default"
+LANE_WAIT_EWMA_ALPHA = 0.1
+DEFAULT_MEMORY_ITEMS = 10000
+SPILL_SEGMENT_RECORDS = 65536
+SPILL_REFILL_RECORDS = 4096
+SPILL_SEGMENT_PREFIX = "spill-"
+SPILL_SEGMENT_SUFFIX = ".seg"
+# Spilled events reach stable storage within this many seconds; a crash loses at most that tail.
+SPILL_SYNC_INTERVAL = 0.2
+
+# Spill record: enqueue time (monotonic), payload length, then the UTF-8 payload.
+_SPILL_RECORD = struct.Struct("<dI")
+
+WatermarkCallback = Callable[[int], Any]
+WaitCallback = Callable[[float], Any]
+
+
+class BoundedEventQueue(queue.Queue):
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        high_watermark: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        on_high: Optional[WatermarkCallback] = None,
+        on_low: Optional[WatermarkCallback] = None,
+        on_dequeue: Optional[WaitCallback] = None
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        super().__init__(maxsize)
+
+        self.high_watermark = high_watermark if high_watermark is not None else max(1, int(maxsize * 0.8))
+        self.low_watermark = low_watermark if low_watermark is not None else self.high_watermark // 2
+        if not 0 <= self.low_watermark < self.high_watermark <= maxsize:
+            raise ValueError("watermarks must satisfy 0 <= low < high <= maxsize")
+
+        self.on_high = on_high
+        self.on_low = on_low
+        # Called with each item's queue wait time, in the consuming thread, under the mutex.
+        # Fixed at construction: it decides whether stored items carry an enqueue timestamp.
+        self.on_dequeue = on_dequeue
+        self.above_high_watermark = False
+
+        # Transitions are detected under the queue mutex and fired after it is released,
+        # so callbacks may safely touch the queue.
+        self._transitions = deque()
+        self._drop_lock = threading.Lock()
+        self._drop_counts: Dict[str, int] = {}
+
+    def _append(self, item):
+        if self.on_dequeue is None:
+            self.queue.append(item)
+        else:
+            self.queue.append((monotonic(), item))
+
+    def _pop(self):
+        if self.on_dequeue is None:
+            return self.queue.popleft()
+        enqueued_at, item = self.queue.popleft()
+        self.on_dequeue(monotonic() - enqueued_at)
+        return item
+
+    def _put(self, item):
+        self._append(item)
+        if not self.above_high_watermark:
+            size = self._qsize()
+            if size >= self.high_watermark:
+                self.above_high_watermark = True
+                self._transitions.append((True, size))
+
+    def _get(self):
+        item = self._pop()
+        if self.above_high_watermark:
+            size = self._qsize()
+            if size <= self.low_watermark:
+                self.above_high_watermark = False
+                self._transitions.append((False, size))
+        return item
+
+    def _fire_transitions(self) -> None:
+        while self._transitions:
+            try:
+                high, size = self._transitions.popleft()
+            except IndexError:
+                return
+            callback = self.on_high if high else self.on_low
+            if callback is not None:
+                callback(size)
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None) -> None:
+        super().put(item, block, timeout)
+        if self._transitions:
+            self._fire_transitions()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        item = super().get(block, timeout)
+        if self._transitions:
+            self._fire_transitions()
+        return item
+
+    def try_put(self, item, reason: str = "queue_full") -> bool:
+        try:
+            self.put(item, block=False)
+            return True
+        except queue.Full:
+            self.record_drop(reason)
+            return False
+
+    def offer(self, item, timeout: float, reason: str = "put_timeout") -> bool:
+        try:
+            self.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            self.record_drop(reason)
+            return False
+
+    def get_batch(self, max_items: int, timeout: Optional[float] = None) -> List[Any]:
+        with self.not_empty:
+            if timeout is None:
+                while not self._qsize():
+                    self.not_empty.wait()
+            else:
+                endtime = monotonic() + timeout
+                while not self._qsize():
+                    remaining = endtime - monotonic()
+                    if remaining <= 0.0:
+                        raise queue.Empty
+                    self.not_empty.wait(remaining)
+            items = []
+            while self._qsize() and len(items) < max_items:
+                items.append(self._get())
+            self.not_full.notify(len(items))
+        if self._transitions:
+            self._fire_transitions()
+        return items
+
+    def task_done_many(self, count: int) -> None:
+        with self.all_tasks_done:
+            unfinished = self.unfinished_tasks - count
+            if unfinished < 0:
+                raise ValueError("task_done() called too many times")
+            if unfinished == 0:
+                self.all_tasks_done.notify_all()
+            self.unfinished_tasks = unfinished
+
+    def record_drop(self, reason: str) -> None:
+        with self._drop_lock:
+            self._drop_counts[reason] = self._drop_counts.get(reason, 0) + 1
+
+    def get_drop_counts(self) -> Dict[str, int]:
+        with self._drop_lock:
+            return dict(self._drop_counts)
+
+
+class CoalescedEvent:
+    __slots__ = ("ip", "count", "timestamps")
+
+    def __init__(self, ip: str, timestamps: Iterable[float], max_timestamps: int = MAX_COALESCED_TIMESTAMPS):
+        self.ip = ip
+        self.timestamps = deque(timestamps, maxlen=max_timestamps)
+        self.count = len(self.timestamps)
+
+    def merge(self, timestamps: Iterable[float], count: int) -> None:
+        self.timestamps.extend(timestamps)
+        self.count += count
+
+    def __repr__(self) -> str:
+        return f"CoalescedEvent(ip={self.ip!r}, count={self.count})"
+
+
+def event_count(item: Any) -> int:
+    return item.count if isinstance(item, CoalescedEvent) else 1
+
+
+class CoalescingEventQueue(BoundedEventQueue):
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        clock: Optional[Callable[[], float]] = None,
+        max_timestamps: int = MAX_COALESCED_TIMESTAMPS,
+        **kwargs: Any
+    ):
+        self.clock = clock if clock else time.time
+        self.max_timestamps = max_timestamps
+        super().__init__(maxsize, **kwargs)
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self._pending: Dict[str, CoalescedEvent] = {}
+
+    def _merge(self, record: CoalescedEvent, item) -> int:
+        if isinstance(item, CoalescedEvent):
+            record.merge(item.timestamps, item.count)
+            return item.count
+        record.merge((self.clock(),), 1)
+        return 1
+
+    def _put(self, item):
+        if isinstance(item, CoalescedEvent):
+            key = item.ip
+        elif isinstance(item, str):
+            key = item
+        else:
+            super()._put(item)
+            return
+
+        record = self._pending.get(key)
+        if record is not None:
+            # Another producer queued this IP after our put() fast-path check; Queue.put
+            # adds one to unfinished_tasks itself.
+            self.unfinished_tasks += self._merge(record, item) - 1
+            return
+        if isinstance(item, CoalescedEvent):
+            record = CoalescedEvent(key, item.timestamps, self.max_timestamps)
+            record.count = item.count
+            self.unfinished_tasks += item.count - 1
+        else:
+            record = CoalescedEvent(key, (self.clock(),), self.max_timestamps)
+        self._pending[key] = record
+        super()._put(record)
+
+    def _get(self):
+        item = super()._get()
+        if isinstance(item, CoalescedEvent):
+            del self._pending[item.ip]
+        return item
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None) -> None:
+        key = item.ip if isinstance(item, CoalescedEvent) else item
+        if isinstance(key, str):
+            # Repeats of an IP that is already waiting merge in place and need no capacity.
+            with self.mutex:
+                record = self._pending.get(key)
+                if record is not None:
+                    self.unfinished_tasks += self._merge(record, item)
+                    return
+        super().put(item, block, timeout)
+
+
+class _LaneStats:
+    __slots__ = ("weight", "items", "current", "dequeued", "ewma_wait", "max_wait")
+
+    def __init__(self, weight: int):
+        self.weight = weight
+        self.items = deque()
+        self.current = 0
+        self.dequeued = 0
+        self.ewma_wait = 0.0
+        self.max_wait = 0.0
+
+
+class MultiLaneEventQueue(BoundedEventQueue):
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        lanes: Iterable[Tuple[str, int]] = ((DEFAULT_LANE, 1),),
+        lane_selector: Optional[Callable[[Any], str]] = None,
+        **kwargs: Any
+    ):
+        self._lane_config = [(name, int(weight)) for name, weight in lanes]
+        if not self._lane_config:
+            raise ValueError("at least one lane is required")
+        if any(weight <= 0 for _, weight in self._lane_config):
+            raise ValueError("lane weights must be positive")
+        self.lane_selector = lane_selector
+        super().__init__(maxsize, **kwargs)
+
+    def _init(self, maxsize):
+        self.queue = None
+        self._lanes: Dict[str, _LaneStats] = {
+            name: _LaneStats(weight) for name, weight in self._lane_config
+        }
+        self._default_lane = self._lanes.get(DEFAULT_LANE) or self._lanes[self._lane_config[-1][0]]
+        self._size = 0
+
+    def _qsize(self):
+        return self._size
+
+    def _append(self, item):
+        lane = None
+        if self.lane_selector is not None:
+            lane = self._lanes.get(self.lane_selector(item))
+        if lane is None:
+            lane = self._default_lane
+        lane.items.append((monotonic(), item))
+        self._size += 1
+
+    def _pop(self):
+        # Smooth weighted round-robin across non-empty lanes.
+        chosen = None
+        total = 0
+        for lane in self._lanes.values():
+            if not lane.items:
+                continue
+            lane.current += lane.weight
+            total += lane.weight
+            if chosen is None or lane.current > chosen.current:
+                chosen = lane
+        chosen.current -= total
+
+        enqueued_at, item = chosen.items.popleft()
+        self._size -= 1
+
+        wait = monotonic() - enqueued_at
+        chosen.dequeued += 1
+        chosen.ewma_wait += LANE_WAIT_EWMA_ALPHA * (wait - chosen.ewma_wait)
+        if wait > chosen.max_wait:
+            chosen.max_wait = wait
+        if self.on_dequeue is not None:
+            self.on_dequeue(wait)
+        return item
+
+    def lane_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self.mutex:
+            now = monotonic()
+            return {
+                name: {
+                    "depth": len(lane.items),
+                    "weight": lane.weight,
+                    "dequeued": lane.dequeued,
+                    "ewma_wait": lane.ewma_wait,
+                    "max_wait": lane.max_wait,
+                    "oldest_wait": now - lane.items[0][0] if lane.items else 0.0,
+                }
+                for name, lane in self._lanes.items()
+            }
+
+
+class _SpillSegment:
+    __slots__ = ("seq", "path", "adopted")
+
+    def __init__(self, seq: int, path: str, adopted: bool = False):
+        self.seq = seq
+        self.path = path
+        self.adopted = adopted
+
+
+def _fsync_dir(path: str) -> None:
+    # Makes a newly created segment's directory entry durable.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _count_spill_records(path: str) -> int:
+    # Counts complete records and truncates a torn tail left by a crash mid-write.
+    count = 0
+    good = 0
+    with open(path, "r+b") as f:
+        while True:
+            header = f.read(_SPILL_RECORD.size)
+            if len(header) < _SPILL_RECORD.size:
+                break
+            _, length = _SPILL_RECORD.unpack(header)
+            if len(f.read(length)) < length:
+                break
+            count += 1
+            good = f.tell()
+        f.truncate(good)
+    return count
+
+
+class SpillingEventQueue(BoundedEventQueue):
+    def __init__(
+        self,
+        maxsize: int,
+        spill_dir: str,
+        memory_items: int = DEFAULT_MEMORY_ITEMS,
+        segment_records: int = SPILL_SEGMENT_RECORDS,
+        sync_interval: float = SPILL_SYNC_INTERVAL,
+        **kwargs: Any
+    ):
+        if memory_items <= 0:
+            raise ValueError("memory_items must be positive")
+        self.spill_dir = spill_dir
+        self.memory_items = memory_items
+        self.sync_interval = sync_interval
+        self.segment_records = max(1, segment_records)
+        self.refill_records = max(1, min(SPILL_REFILL_RECORDS, memory_items))
+        super().__init__(maxsize, **kwargs)
+        os.makedirs(spill_dir, exist_ok=True)
+        self._adopt_segments()
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self._spilled = 0
+        self._segments: deque = deque()
+        self._next_seq = 0
+        self._writer = None
+        self._writer_records = 0
+        self._reader = None
+        self._spilled_total = 0
+        self._spill_bytes = 0
+        self._dirty = False
+        self._syncs = 0
+        # Duplicated descriptors of flushed segments, and whether the directory needs an
+        # fsync; the SpillSync thread syncs them without holding the mutex.
+        self._sync_fds: List[int] = []
+        self._sync_dir = False
+        self._sync_wake = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+    def _adopt_segments(self) -> None:
+        # Segments left by a previous process are replayed first, in order.
+        names = sorted(
+            n for n in os.listdir(self.spill_dir)
+            if n.startswith(SPILL_SEGMENT_PREFIX) and n.endswith(SPILL_SEGMENT_SUFFIX)
+        )
+        adopted = 0
+        for name in names:
+            path = os.path.join(self.spill_dir, name)
+            try:
+                seq = int(name[len(SPILL_SEGMENT_PREFIX):-len(SPILL_SEGMENT_SUFFIX)])
+                count = _count_spill_records(path)
+            except (ValueError, OSError):
+                continue
+            self._next_seq = max(self._next_seq, seq + 1)
+            if count == 0:
+                os.remove(path)
+                continue
+            self._segments.append(_SpillSegment(seq, path, adopted=True))
+            adopted += count
+        if adopted:
+            with self.mutex:
+                self._spilled += adopted
+                self.unfinished_tasks += adopted
+                self.not_empty.notify(adopted)
+
+    def _qsize(self):
+        return len(self.queue) + self._spilled
+
+    def _append(self, item):
+        if not isinstance(item, str):
+            raise TypeError("SpillingEventQueue only carries str events")
+        # Once anything is on disk, new items follow it there to keep FIFO order.
+        if not self._spilled and len(self.queue) < self.memory_items:
+            super()._append(item)
+            return
+
+        if self._writer is None or self._writer_records >= self.segment_records:
+            self._open_segment()
+        data = item.encode("utf-8")
+        self._writer.write(_SPILL_RECORD.pack(monotonic(), len(data)))
+        self._writer.write(data)
+        self._writer_records += 1
+        self._dirty = True
+        self._spilled += 1
+        self._spilled_total += 1
+        self._spill_bytes += _SPILL_RECORD.size + len(data)
+
+    def put_front(self, items: Iterable[str]) -> int:
+        # For events that were ahead of everything on disk, such as the in-memory part of a
+        # checkpoint: they go to the head of the queue, before any adopted segments.
+        items = list(items)
+        for item in items:
+            if not isinstance(item, str):
+                raise TypeError("SpillingEventQueue only carries str events")
+        with self.not_full:
+            accepted = items[:max(0, self.maxsize - self._qsize())]
+            now = monotonic()
+            wrap = self.on_dequeue is not None
+            for item in reversed(accepted):
+                self.queue.appendleft((now, item) if wrap else item)
+            self.unfinished_tasks += len(accepted)
+            if not self.above_high_watermark and self._qsize() >= self.high_watermark:
+                self.above_high_watermark = True
+                self._transitions.append((True, self._qsize()))
+            self.not_empty.notify(len(accepted))
+        for _ in range(len(items) - len(accepted)):
+            self.record_drop("checkpoint_overflow")
+        if self._transitions:
+            self._fire_transitions()
+        return len(accepted)
+
+    def _open_segment(self) -> None:
+        if self._writer is not None:
+            self._flush_writer()
+            self._writer.close()
+        seq = self._next_seq
+        self._next_seq += 1
+        path = os.path.join(self.spill_dir, f"{SPILL_SEGMENT_PREFIX}{seq:010d}{SPILL_SEGMENT_SUFFIX}")
+        self._writer = open(path, "ab")
+        self._writer_records = 0
+        self._segments.append(_SpillSegment(seq, path))
+        self._sync_dir = True
+        if self._sync_thread is None:
+            self._sync_thread = threading.Thread(target=self._sync_loop, name="SpillSync", daemon=True)
+            self._sync_thread.start()
+        else:
+            self._sync_wake.set()
+
+    def _flush_writer(self) -> None:
+        # Called under the mutex: only the buffer flush happens here. The fsync runs later on a
+        # duplicated descriptor, which stays valid after the writer is closed.
+        if self._dirty and self._writer is not None:
+            self._writer.flush()
+            self._sync_fds.append(os.dup(self._writer.fileno()))
+            self._dirty = False
+
+    def _take_syncs(self) -> Tuple[List[int], bool]:
+        with self.mutex:
+            try:
+                self._flush_writer()
+            except (OSError, ValueError):
+                pass
+            fds, self._sync_fds = self._sync_fds, []
+            sync_dir, self._sync_dir = self._sync_dir, False
+        return fds, sync_dir
+
+    def _run_syncs(self, fds: List[int], sync_dir: bool) -> None:
+        if sync_dir:
+            _fsync_dir(self.spill_dir)
+        for fd in fds:
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+        if fds:
+            self._syncs += len(fds)
+
+    def _sync_loop(self) -> None:
+        # Puts only buffer; this thread bounds how long a spilled event can sit in that buffer.
+        # Producers and consumers never wait on the disk.
+        while not self._closed.is_set():
+            self._sync_wake.wait(self.sync_interval)
+            self._sync_wake.clear()
+            self._run_syncs(*self._take_syncs())
+
+    def _pop(self):
+        if not self.queue and self._spilled:
+            self._refill()
+        return super()._pop()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        wrap = self.on_dequeue is not None
+        if self._writer is not None:
+            self._writer.flush()
+
+        loaded = 0
+        while loaded < self.refill_records and self._spilled:
+            segment = self._segments[0]
+            if self._reader is None:
+                self._reader = open(segment.path, "rb")
+
+            header = self._reader.read(_SPILL_RECORD.size)
+            if len(header) < _SPILL_RECORD.size:
+                if len(self._segments) == 1:
+                    break
+                self._finish_segment()
+                continue
+            enqueued_at, length = _SPILL_RECORD.unpack(header)
+            item = self._reader.read(length).decode("utf-8")
+            if segment.adopted or enqueued_at > now:
+                enqueued_at = now
+            self.queue.append((enqueued_at, item) if wrap else item)
+            self._spilled -= 1
+            loaded += 1
+
+        if not self._spilled:
+            # Fully drained: drop every segment and go back to memory-only mode.
+            while self._segments:
+                self._finish_segment()
+
+    def _finish_segment(self) -> None:
+        segment = self._segments.popleft()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._writer is not None and not self._segments:
+            self._writer.close()
+            self._writer = None
+        try:
+            os.remove(segment.path)
+        except OSError:
+            pass
+
+    def spill_stats(self) -> Dict[str, int]:
+        with self.mutex:
+            return {
+                "memory": len(self.queue),
+                "spilled": self._spilled,
+                "segments": len(self._segments),
+                "spilled_total": self._spilled_total,
+                "spilled_bytes": self._spill_bytes,
+                "syncs": self._syncs,
+            }
+
+    def close(self) -> None:
+        # Unread spill records stay on disk and are adopted by the next queue on this directory.
+        self._closed.set()
+        self._sync_wake.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+            self._sync_thread = None
+        self._run_syncs(*self._take_syncs())
+        with self.mutex:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            if self._reader is not None:
+                remaining = self._reader.read()
+                self._reader.close()
+                self._reader = None
+                segment = self._segments[0]
+                tmp_path = segment.path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(remaining)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, segment.path)
@@ -1,8 +1,157 @@
+import functools
 import logging
-from typing import Callable, Any, Tuple
+import threading
+import time
+import weakref
+from time import perf_counter
+from typing import Callable, Any, Dict, Optional, Tuple
+
+from src.metrics import LatencyHistogram
 
 logger = logging.getLogger(__name__)
 
+# Per (step, exception type): the first FAILURE_LOG_BURST failures in each interval are logged
+# in full; the rest are only counted and reported in one summary line per interval.
+FAILURE_LOG_BURST = 5
+FAILURE_SUMMARY_INTERVAL = 60.0
+# Keys beyond this evict the ones idle for a full interval, or else the oldest.
+MAX_FAILURE_KEYS = 1024
+
+
+class _FailureStats:
+    __slots__ = ("total", "window_start", "window_logged", "suppressed", "last_error", "last_failure")
+
+    def __init__(self, now: float):
+        self.total = 0
+        self.window_start = now
+        self.last_failure = now
+        self.window_logged = 0
+        self.suppressed = 0
+        self.last_error = ""
+
+
+_failure_lock = threading.Lock()
+_failure_stats: Dict[Tuple[str, str], _FailureStats] = {}
+
+# Every step counts calls and errors; only one call in STEP_TIMING_SAMPLE_EVERY is timed.
+# Counters are updated without a lock, so they are approximate under heavy contention.
+STEP_TIMING_SAMPLE_EVERY = 64
+
+
+class _StepStats:
+    __slots__ = ("calls", "errors", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+
+_step_lock = threading.Lock()
+_step_stats: Dict[str, _StepStats] = {}
+
+
+def _stats_for(func_name: str) -> _StepStats:
+    stats = _step_stats.get(func_name)
+    if stats is None:
+        with _step_lock:
+            stats = _step_stats.setdefault(func_name, _StepStats())
+    return stats
+
+
+# A breaker opens after BREAKER_FAILURE_THRESHOLD consecutive failures. While open, calls return
+# the default without running the step, and one probe call is let through per backoff period.
+# The backoff doubles after each failed probe, up to BREAKER_MAX_BACKOFF.
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_BASE_BACKOFF = 1.0
+BREAKER_MAX_BACKOFF = 60.0
+
+_breakers: "weakref.WeakValueDictionary[str, CircuitBreaker]" = weakref.WeakValueDictionary()
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_backoff: float = BREAKER_BASE_BACKOFF,
+        max_backoff: float = BREAKER_MAX_BACKOFF,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.backoff = base_backoff
+        self.next_probe = 0.0
+        self.times_opened = 0
+        self.short_circuited = 0
+        _breakers[name] = self
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = self._clock()
+            if now >= self.next_probe:
+                # Claim the probe; if it never reports back, another is allowed after the backoff.
+                self.next_probe = now + self.backoff
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        if self.state == "closed" and not self.consecutive_failures:
+            return
+        with self._lock:
+            reopened = self.state == "open"
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.backoff = self.base_backoff
+        if reopened:
+            logger.warning("Circuit breaker %s closed, step recovered", self.name)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "open":
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            elif self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.times_opened += 1
+            else:
+                return
+            self.next_probe = self._clock() + self.backoff
+            backoff = self.backoff
+            failures = self.consecutive_failures
+        logger.warning(
+            "Circuit breaker %s open after %d consecutive failures, next probe in %.1fs",
+            self.name, failures, backoff
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.backoff = self.base_backoff
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+                "backoff_seconds": self.backoff if self.state == "open" else 0.0,
+                "next_probe_in": max(0.0, self.next_probe - self._clock()) if self.state == "open" else 0.0,
+            }
+
 
 class PipelineExecutor:
     @staticmethod
@@ -12,6 +161,7 @@ class PipelineExecutor:
         default: Any = None,
         log_level: int = logging.ERROR,
         fatal_exceptions: Tuple[type, ...] = (),
+        breaker: Optional[CircuitBreaker] = None,
         **kwargs: Any
     ) -> Any:
         if not callable(step_function):
@@ -24,28 +174,249 @@ class PipelineExecutor:
             )
             return default
 
-        func_name = getattr(step_function, "__name__", None)
-        if func_name is None:
-            func_name = repr(step_function)
-
+        if breaker is not None and not breaker.allow():
+            return default
+        func_name = _step_name(step_function)
+        stats = _step_stats.get(func_name) or _stats_for(func_name)
+        calls = stats.calls = stats.calls + 1
+        start = perf_counter() if calls % STEP_TIMING_SAMPLE_EVERY == 0 else None
         try:
-            return step_function(*args, **kwargs)
+            result = step_function(*args, **kwargs)
         except fatal_exceptions:
             raise
         except Exception as e:
-            logger.log(
-                log_level,
-                "PipelineExecutor: error executing function",
-                extra={
-                    "function_name": func_name,
-                    "args": _safe_repr(args),
-                    "kwargs": _safe_repr(kwargs),
-                    "error_type": type(e).__name__,
-                    "error": str(e),
-                },
-                exc_info=True,
-            )
+            stats.errors += 1
+            if breaker is not None:
+                breaker.record_failure()
+            _log_failure(func_name, log_level, args, kwargs, e)
             return default
+        if breaker is not None:
+            breaker.record_success()
+        if start is not None:
+            stats.latency.record(perf_counter() - start)
+        return result
+
+    @staticmethod
+    def wrap(
+        step_function: Callable,
+        default: Any = None,
+        log_level: int = logging.ERROR,
+        fatal_exceptions: Tuple[type, ...] = (),
+        positional: bool = False,
+        breaker: Optional[CircuitBreaker] = None
+    ) -> Callable:
+        # Validation and name lookup happen once here instead of on every call.
+        if not callable(step_function):
+            raise TypeError(f"PipelineExecutor.wrap: {type(step_function).__name__} is not callable")
+        func_name = _step_name(step_function)
+        stats = _stats_for(func_name)
+        sample_every = STEP_TIMING_SAMPLE_EVERY
+
+        if breaker is not None:
+            def guarded(*args, **kwargs):
+                if not breaker.allow():
+                    return default
+                calls = stats.calls = stats.calls + 1
+                start = perf_counter() if calls % sample_every == 0 else None
+                try:
+                    result = step_function(*args, **kwargs)
+                except fatal_exceptions:
+                    raise
+                except Exception as e:
+                    stats.errors += 1
+                    breaker.record_failure()
+                    _log_failure(func_name, log_level, args, kwargs, e)
+                    return default
+                breaker.record_success()
+                if start is not None:
+                    stats.latency.record(perf_counter() - start)
+                return result
+        elif positional:
+            # Skipping **kwargs packing roughly halves the per-call overhead.
+            def guarded(*args):
+                calls = stats.calls = stats.calls + 1
+                start = perf_counter() if calls % sample_every == 0 else None
+                try:
+                    result = step_function(*args)
+                except fatal_exceptions:
+                    raise
+                except Exception as e:
+                    stats.errors += 1
+                    _log_failure(func_name, log_level, args, {}, e)
+                    return default
+                if start is not None:
+                    stats.latency.record(perf_counter() - start)
+                return result
+        else:
+            def guarded(*args, **kwargs):
+                calls = stats.calls = stats.calls + 1
+                start = perf_counter() if calls % sample_every == 0 else None
+                try:
+                    result = step_function(*args, **kwargs)
+                except fatal_exceptions:
+                    raise
+                except Exception as e:
+                    stats.errors += 1
+                    _log_failure(func_name, log_level, args, kwargs, e)
+                    return default
+                if start is not None:
+                    stats.latency.record(perf_counter() - start)
+                return result
+
+        return functools.update_wrapper(guarded, step_function)
+
+    @staticmethod
+    def failure_counts() -> Dict[str, Dict[str, int]]:
+        with _failure_lock:
+            items = [(key, stats.total) for key, stats in _failure_stats.items()]
+        counts: Dict[str, Dict[str, int]] = {}
+        for (func_name, error_type), total in items:
+            counts.setdefault(func_name, {})[error_type] = total
+        return counts
+
+    @staticmethod
+    def flush_failure_summaries(now: float = None) -> None:
+        # Emits summaries for windows that ended without a later failure to trigger them.
+        now = time.monotonic() if now is None else now
+        pending = []
+        with _failure_lock:
+            for key, stats in _failure_stats.items():
+                if stats.suppressed and now - stats.window_start >= FAILURE_SUMMARY_INTERVAL:
+                    pending.append((key, stats.suppressed, now - stats.window_start, stats.last_error))
+                    stats.window_start = now
+                    stats.window_logged = 0
+                    stats.suppressed = 0
+        for (func_name, error_type), suppressed, elapsed, last_error in pending:
+            _log_summary(logging.ERROR, func_name, error_type, suppressed, elapsed, last_error)
+
+    @staticmethod
+    def breaker_status() -> Dict[str, dict]:
+        return {name: breaker.status() for name, breaker in list(_breakers.items())}
+
+    @staticmethod
+    def step_stats() -> Dict[str, dict]:
+        with _step_lock:
+            items = list(_step_stats.items())
+        return {
+            func_name: {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "latency": stats.latency.summary(),
+            }
+            for func_name, stats in items
+            if stats.calls
+        }
+
+    @staticmethod
+    def reset_step_stats() -> None:
+        # Wrapped steps keep their _StepStats object, so counters are zeroed in place.
+        with _step_lock:
+            for stats in _step_stats.values():
+                stats.calls = 0
+                stats.errors = 0
+                stats.latency = LatencyHistogram()
+
+    @staticmethod
+    def reset_failure_stats() -> None:
+        with _failure_lock:
+            _failure_stats.clear()
+
+
+def pipeline_step(
+    default: Any = None,
+    log_level: int = logging.ERROR,
+    fatal_exceptions: Tuple[type, ...] = (),
+    positional: bool = False,
+    breaker: Optional[CircuitBreaker] = None
+) -> Callable[[Callable], Callable]:
+    def decorator(step_function: Callable) -> Callable:
+        return PipelineExecutor.wrap(
+            step_function, default=default, log_level=log_level,
+            fatal_exceptions=fatal_exceptions, positional=positional, breaker=breaker
+        )
+    return decorator
+
+
+def _step_name(step_function: Callable) -> str:
+    # Module-qualified, so same-named closures (every `_inner` handed to _run_in_pipeline)
+    # keep separate stats. Partials and callable objects are named after the function or
+    # class behind them: a repr() would embed bound args and addresses and never repeat.
+    while isinstance(step_function, functools.partial):
+        step_function = step_function.func
+    qualname = getattr(step_function, "__qualname__", None)
+    if qualname is None:
+        step_function = type(step_function)
+        qualname = step_function.__qualname__
+    module = getattr(step_function, "__module__", None)
+    return f"{module}.{qualname}" if module else qualname
+
+
+def _log_failure(func_name: str, log_level: int, args: tuple, kwargs: dict, error: Exception) -> None:
+    error_type = type(error).__name__
+    key = (func_name, error_type)
+    now = time.monotonic()
+    summary = None
+    with _failure_lock:
+        stats = _failure_stats.get(key)
+        if stats is None:
+            if len(_failure_stats) >= MAX_FAILURE_KEYS:
+                _evict_failure_stats(now)
+            stats = _failure_stats[key] = _FailureStats(now)
+        stats.total += 1
+        stats.last_failure = now
+        if now - stats.window_start >= FAILURE_SUMMARY_INTERVAL:
+            if stats.suppressed:
+                summary = (stats.suppressed, now - stats.window_start, stats.last_error)
+            stats.window_start = now
+            stats.window_logged = 0
+            stats.suppressed = 0
+        full = stats.window_logged < FAILURE_LOG_BURST
+        if full:
+            stats.window_logged += 1
+        else:
+            stats.suppressed += 1
+            stats.last_error = str(error)
+        total = stats.total
+
+    if summary is not None:
+        _log_summary(log_level, func_name, error_type, *summary)
+    if not full:
+        return
+
+    logger.log(
+        log_level,
+        "PipelineExecutor: error executing function",
+        extra={
+            "function_name": func_name,
+            "step_args": _safe_repr(args),
+            "step_kwargs": _safe_repr(kwargs),
+            "error_type": error_type,
+            "error": str(error),
+            "failure_count": total,
+        },
+        exc_info=True,
+    )
+
+
+def _evict_failure_stats(now: float) -> None:
+    # Caller holds _failure_lock.
+    idle = [
+        key for key, stats in _failure_stats.items()
+        if not stats.suppressed and now - stats.last_failure >= FAILURE_SUMMARY_INTERVAL
+    ]
+    if not idle:
+        idle = [next(iter(_failure_stats))]
+    for key in idle:
+        del _failure_stats[key]
+
+
+def _log_summary(log_level: int, func_name: str, error_type: str, suppressed: int, elapsed: float, last_error: str) -> None:
+    logger.log(
+        log_level,
+        "PipelineExecutor: %s raised %s %d more times in the last %.0fs (last error: %s)",
+        func_name, error_type, suppressed, elapsed, last_error,
+        extra={"function_name": func_name, "error_type": error_type, "suppressed": suppressed},
+    )
 
 
 def _safe_repr(obj: Any, max_len: int = 200) -> str:
@@ -55,4 +426,4 @@ def _safe_repr(obj: Any, max_len: int = 200) -> str:
             return repr_str[:max_len] + "..."
         return repr_str
     except Exception:
-        return f"<unrepresentable: {type(obj).__name__}>"
\ No newline at end of file
+        return f"<unrepresentable: {type(obj).__name__}>"
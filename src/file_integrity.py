@@ -0,0 +1,223 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Iterable, Iterator, Tuple, Any
+
+from src.alerts import send_alert
+from src.config import STATE_DIR
+from src.executor import PipelineExecutor
+from src.logger import setup_logger
+
+logger = setup_logger("FileIntegrity")
+
+DEFAULT_INDEX_PATH = os.path.join(STATE_DIR, "fim_index.db")
+DEFAULT_WATCH_PATHS = ("/etc", "/usr/bin")
+DEFAULT_SCAN_INTERVAL = 300
+HASH_ALGORITHM = "sha256"
+MMAP_THRESHOLD = 1024 * 1024
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+# inode, size, mtime_ns, ctime_ns. mtime can be reset with utime; ctime cannot, so a
+# content change that restores size and mtime still misses the fast path.
+_FileMeta = Tuple[int, int, int, int]
+
+
+def hash_file(path: str, size: int) -> str:
+    with open(path, "rb") as f:
+        if size >= MMAP_THRESHOLD:
+            # hashlib releases the GIL on large buffers, so mmap-backed files hash in parallel.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.new(HASH_ALGORITHM, mapped).hexdigest()
+        return hashlib.new(HASH_ALGORITHM, f.read()).hexdigest()
+
+
+def _walk_files(roots: Iterable[str]) -> Iterator[Tuple[str, _FileMeta]]:
+    stack = list(roots)
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            logger.warning("Cannot scan %s: %s", directory, e)
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    stack.append(entry.path)
+                elif stat.S_ISREG(st.st_mode):
+                    yield entry.path, (st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+
+class FileIntegrityMonitor:
+    def __init__(
+        self,
+        paths: Iterable[str] = DEFAULT_WATCH_PATHS,
+        index_path: str = DEFAULT_INDEX_PATH,
+        hash_workers: int = DEFAULT_HASH_WORKERS
+    ):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.index_path = index_path
+        self.hash_workers = max(1, hash_workers)
+        self._lock = threading.Lock()
+        self.conn = None
+        self._init_db()
+
+    def _connect(self):
+        if self.conn is None:
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(self.index_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        return self.conn
+
+    def _init_db(self):
+        try:
+            conn = self._connect()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_index (
+                    path TEXT PRIMARY KEY,
+                    inode INTEGER,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    ctime_ns INTEGER,
+                    hash TEXT
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(file_index)")}
+            if "ctime_ns" not in columns:
+                # Older indexes: the NULL ctime makes every file rehash once on the next scan.
+                conn.execute("ALTER TABLE file_index ADD COLUMN ctime_ns INTEGER")
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error("FIM index initialization error: %s", e)
+
+    def _load_index(self) -> Dict[str, Tuple[int, int, int, int, str]]:
+        cursor = self._connect().execute("SELECT path, inode, size, mtime_ns, ctime_ns, hash FROM file_index")
+        return {row[0]: row[1:] for row in cursor}
+
+    def _is_watched(self, path: str) -> bool:
+        return any(path == root or path.startswith(root + os.sep) for root in self.paths)
+
+    def _hash_many(self, files: List[Tuple[str, _FileMeta]]) -> List[Optional[str]]:
+        def _hash(item):
+            path, meta = item
+            try:
+                return hash_file(path, meta[1])
+            except (OSError, ValueError) as e:
+                logger.debug("Cannot hash %s: %s", path, e)
+                return None
+
+        if len(files) <= 1 or self.hash_workers == 1:
+            return [_hash(item) for item in files]
+        with ThreadPoolExecutor(max_workers=self.hash_workers, thread_name_prefix="FIMHash") as pool:
+            return list(pool.map(_hash, files))
+
+    def scan(self, alert: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            start = time.monotonic()
+            index = self._load_index()
+            baseline_run = not index
+
+            seen = set()
+            candidates = []
+            scanned = 0
+            for path, meta in _walk_files(self.paths):
+                scanned += 1
+                seen.add(path)
+                known = index.get(path)
+                if known is None or known[:4] != meta:
+                    candidates.append((path, meta))
+
+            hashes = self._hash_many(candidates)
+
+            added, modified, upserts = [], [], []
+            for (path, meta), digest in zip(candidates, hashes):
+                if digest is None:
+                    continue
+                known = index.get(path)
+                if known is None:
+                    added.append(path)
+                elif known[4] != digest:
+                    modified.append(path)
+                upserts.append((path, *meta, digest))
+
+            removed = [p for p in index if p not in seen and self._is_watched(p)]
+
+            conn = self._connect()
+            if upserts:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO file_index (path, inode, size, mtime_ns, ctime_ns, hash) VALUES (?, ?, ?, ?, ?, ?)",
+                    upserts
+                )
+            if removed:
+                conn.executemany("DELETE FROM file_index WHERE path = ?", [(p,) for p in removed])
+            conn.commit()
+
+            result = {
+                "baseline": baseline_run,
+                "scanned": scanned,
+                "hashed": len(candidates),
+                "added": added,
+                "modified": modified,
+                "removed": removed,
+                "duration": time.monotonic() - start,
+            }
+
+        if baseline_run:
+            logger.info("FIM baseline established: %d files in %.2fs", scanned, result["duration"])
+        elif alert:
+            self._report(result)
+        return result
+
+    def _report(self, result: Dict[str, Any]) -> None:
+        for path in result["modified"]:
+            send_alert(
+                f"File integrity violation: {path} modified",
+                event_type="FILE_INTEGRITY",
+                severity="CRITICAL",
+                metadata={"file": path, "change": "modified"}
+            )
+        for path in result["added"]:
+            send_alert(
+                f"File integrity: new file {path}",
+                event_type="FILE_INTEGRITY",
+                severity="WARNING",
+                metadata={"file": path, "change": "added"}
+            )
+        for path in result["removed"]:
+            send_alert(
+                f"File integrity: {path} removed",
+                event_type="FILE_INTEGRITY",
+                severity="WARNING",
+                metadata={"file": path, "change": "removed"}
+            )
+
+    def run(self, shutdown_event, interval: float = DEFAULT_SCAN_INTERVAL) -> None:
+        logger.info("File integrity monitor started (paths=%s)", ", ".join(self.paths))
+        try:
+            while not shutdown_event.is_set():
+                PipelineExecutor.execute(
+                    self.scan,
+                    default=None,
+                    fatal_exceptions=(KeyboardInterrupt, SystemExit)
+                )
+                if shutdown_event.wait(interval):
+                    break
+        finally:
+            logger.info("File integrity monitor stopped.")
+
+    def close(self):
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
@@ -25,19 +25,25 @@ def extract_ip(text: str) -> Optional[str]:
     return match.group(0) if match else None
 
 
+def parse_failed_login(line: str) -> Optional[str]:
+    if FAILED_LOGIN_PATTERN.search(line):
+        return extract_ip(line)
+    return None
+
+
 def monitor_log(
     file_path: str,
     event_queue: queue.Queue,
     shutdown_event,
     poll_interval: float = 1.0
 ) -> None:
-    logger.info(f"Monitoring log file: {file_path}")
+    logger.info("Monitoring log file: %s", file_path)
 
     if not os.path.exists(file_path):
         try:
             open(file_path, "a").close()
         except Exception as e:
-            logger.error(f"Failed to create log file {file_path}: {e}")
+            logger.error("Failed to create log file %s: %s", file_path, e)
             return
 
     event_cache = {}
@@ -48,19 +54,22 @@ def monitor_log(
             f.seek(0, os.SEEK_END)
             last_position = f.tell()
 
+            def _process_line():
+                nonlocal last_position
+                f.seek(last_position)
+                line = f.readline()
+                last_position = f.tell()
+                return line
+
+            read_line = PipelineExecutor.wrap(
+                _process_line,
+                default="",
+                fatal_exceptions=(KeyboardInterrupt, SystemExit),
+                positional=True
+            )
+
             while not shutdown_event.is_set():
-                def _process_line():
-                    nonlocal last_position
-                    f.seek(last_position)
-                    line = f.readline()
-                    last_position = f.tell()
-                    return line
-
-                line = PipelineExecutor.execute(
-                    _process_line,
-                    default="",
-                    fatal_exceptions=(KeyboardInterrupt, SystemExit)
-                )
+                line = read_line()
 
                 if not line:
                     if shutdown_event.wait(poll_interval):
@@ -71,19 +80,18 @@ def monitor_log(
                 if not line:
                     continue
 
-                if FAILED_LOGIN_PATTERN.search(line):
-                    ip = extract_ip(line)
-                    if ip:
-                        now = time.time()
-                        key = f"{ip}:{line}"
-                        if key in event_cache and now - event_cache[key] < CACHE_TTL:
-                            continue
-                        event_cache[key] = now
-                        logger.info(f"Detected IP: {ip}")
-                        event_queue.put(ip)
+                ip = parse_failed_login(line)
+                if ip:
+                    now = time.time()
+                    key = f"{ip}:{line}"
+                    if key in event_cache and now - event_cache[key] < CACHE_TTL:
+                        continue
+                    event_cache[key] = now
+                    logger.debug("Detected IP: %s", ip)
+                    event_queue.put(ip)
 
     except Exception as e:
-        logger.error(f"Fatal log monitor error: {e}")
+        logger.error("Fatal log monitor error: %s", e)
     finally:
         logger.info("Log monitor stopped.")
 
@@ -95,7 +103,7 @@ def collect_events(limit: int = 10, log_file: Optional[str] = None) -> List[Dict
     path = log_file or DEFAULT_LOG_FILE
 
     if not os.path.exists(path):
-        logger.warning(f"Log file {path} does not exist")
+        logger.warning("Log file %s does not exist", path)
         return []
 
     def _inner():
@@ -1,22 +1,73 @@
+import atexit
 import logging
 import os
+import queue
 import sys
 import threading
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from src.config import LOG_DIR, LOG_LEVEL
 
 DETECTION_LOG_FILE = "detection.log"
 RUNTIME_LOG_FILE = "runtime.log"
 MAX_BYTES = 2 * 1024 * 1024
 BACKUP_COUNT = 3
+LOG_QUEUE_SIZE = 10_000
 
 _logging_configured = False
-_logging_lock = threading.Lock()
+_logging_lock = threading.RLock()
+_exiting = False
 
 _BASE_FORMATTER = logging.Formatter(
     "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 )
 
+# Arguments of these types cannot change after the call, so %-formatting can wait
+# for the listener thread.
+_IMMUTABLE_ARG_TYPES = frozenset((str, int, float, bool, bytes, type(None)))
+
+_log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_listener: "_LogListener | None" = None
+_queue_handlers: list = []
+_console_handler: logging.Handler | None = None
+_file_handlers: dict = {}
+
+
+class DeferredQueueHandler(QueueHandler):
+    # Queues each record together with the handlers it is meant for. Formatting, I/O and
+    # rotation all happen on the listener thread. A SimpleQueue put is several times cheaper
+    # than Queue.put_nowait, so the bound is checked here: past maxsize records are dropped
+    # and counted.
+    def __init__(self, log_queue: "queue.SimpleQueue", targets, maxsize: int = LOG_QUEUE_SIZE):
+        super().__init__(log_queue)
+        self.targets = tuple(targets)
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and (not isinstance(args, tuple) or any(type(a) not in _IMMUTABLE_ARG_TYPES for a in args)):
+            # A mutable argument could change before the listener gets to it.
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.queue.qsize() >= self.maxsize:
+            self.dropped += 1
+            return
+        self.queue.put_nowait((self.targets, record))
+        if _listener is None and self.queue is _log_queue and not _exiting:
+            # Logging after shutdown_logging() brings the shared listener back.
+            _start_listener()
+
+
+class _LogListener(QueueListener):
+    def handle(self, item) -> None:
+        targets, record = item
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
 
 def _safe_remove_handlers(logger: logging.Logger) -> None:
     for handler in logger.handlers[:]:
@@ -45,24 +96,44 @@ def _create_file_handler(log_path: str) -> logging.Handler | None:
         return None
 
 
-def _apply_base_config(logger: logging.Logger) -> None:
+def _file_handler(file_name: str) -> logging.Handler | None:
+    # One handler per file, shared by every logger that writes to it.
+    if file_name not in _file_handlers:
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            _file_handlers[file_name] = _create_file_handler(os.path.join(LOG_DIR, file_name))
+        except Exception as e:
+            print(f"[WARNING] Impossibile creare la directory di log '{LOG_DIR}': {e}", file=sys.stderr)
+            _file_handlers[file_name] = None
+    return _file_handlers[file_name]
+
+
+def _start_listener() -> None:
+    global _listener
+    with _logging_lock:
+        if _listener is None:
+            _listener = _LogListener(_log_queue)
+            _listener.start()
+
+
+def attach_queue_handler(logger: logging.Logger, targets, level: int = LOG_LEVEL) -> DeferredQueueHandler:
+    # Replaces the logger's handlers with one queue handler feeding `targets` on the listener thread.
+    _start_listener()
     _safe_remove_handlers(logger)
-    logger.setLevel(LOG_LEVEL)
-    logger.addHandler(_create_console_handler())
-    logger.propagate = False
+    handler = DeferredQueueHandler(_log_queue, [t for t in targets if t is not None])
+    _queue_handlers.append(handler)
+    logger.setLevel(level)
+    logger.addHandler(handler)
+    return handler
 
-    try:
-        os.makedirs(LOG_DIR, exist_ok=True)
-        runtime_path = os.path.join(LOG_DIR, RUNTIME_LOG_FILE)
-        fh = _create_file_handler(runtime_path)
-        if fh:
-            logger.addHandler(fh)
-    except Exception:
-        pass
+
+def _apply_base_config(logger: logging.Logger, file_name: str = RUNTIME_LOG_FILE) -> None:
+    attach_queue_handler(logger, (_console_handler, _file_handler(file_name)))
+    logger.propagate = False
 
 
 def _configure_logging_once() -> None:
-    global _logging_configured
+    global _logging_configured, _console_handler
     if _logging_configured:
         return
 
@@ -70,37 +141,9 @@ def _configure_logging_once() -> None:
         if _logging_configured:
             return
 
-        try:
-            os.makedirs(LOG_DIR, exist_ok=True)
-            file_logging = True
-        except Exception as e:
-            print(f"[WARNING] Impossibile creare la directory di log '{LOG_DIR}': {e}", file=sys.stderr)
-            file_logging = False
-
-        detection_logger = logging.getLogger("Detection")
-        _safe_remove_handlers(detection_logger)
-        detection_logger.setLevel(LOG_LEVEL)
-        detection_logger.addHandler(_create_console_handler())
-        detection_logger.propagate = False
-
-        if file_logging:
-            detection_path = os.path.join(LOG_DIR, DETECTION_LOG_FILE)
-            fh = _create_file_handler(detection_path)
-            if fh:
-                detection_logger.addHandler(fh)
-
-        runtime_logger = logging.getLogger("Runtime")
-        _safe_remove_handlers(runtime_logger)
-        runtime_logger.setLevel(LOG_LEVEL)
-        runtime_logger.addHandler(_create_console_handler())
-        runtime_logger.propagate = False
-
-        if file_logging:
-            runtime_path = os.path.join(LOG_DIR, RUNTIME_LOG_FILE)
-            fh = _create_file_handler(runtime_path)
-            if fh:
-                runtime_logger.addHandler(fh)
-
+        _console_handler = _create_console_handler()
+        _apply_base_config(logging.getLogger("Detection"), DETECTION_LOG_FILE)
+        _apply_base_config(logging.getLogger("Runtime"))
         _apply_base_config(logging.getLogger("MiniHIDS"))
 
         _logging_configured = True
@@ -122,6 +165,57 @@ def setup_logger(name: str = "MiniHIDS") -> logging.Logger:
     logger = logging.getLogger(name)
 
     if not logger.handlers:
-        _apply_base_config(logger)
+        with _logging_lock:
+            if not logger.handlers:
+                _apply_base_config(logger)
+
+    return logger
 
-    return logger
\ No newline at end of file
+
+def configure_root_logging(log_file: str, level: int = LOG_LEVEL) -> None:
+    # Module loggers (logging.getLogger(__name__)) propagate here.
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_BASE_FORMATTER)
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(_BASE_FORMATTER)
+    with _logging_lock:
+        attach_queue_handler(logging.getLogger(), (file_handler, stream_handler), level)
+
+
+def logging_stats() -> dict:
+    return {
+        "queued": _log_queue.qsize(),
+        "capacity": LOG_QUEUE_SIZE,
+        "dropped": sum(handler.dropped for handler in _queue_handlers),
+    }
+
+
+def shutdown_logging() -> None:
+    # Drains the queue, then flushes the handlers. Loggers keep their queue handlers, and
+    # the next record they queue restarts the listener.
+    global _listener
+    with _logging_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    flushed = set()
+    for queue_handler in _queue_handlers:
+        for handler in queue_handler.targets:
+            if id(handler) not in flushed:
+                flushed.add(id(handler))
+                try:
+                    handler.flush()
+                except (OSError, ValueError):
+                    # The stream may already be closed at interpreter exit.
+                    pass
+
+
+def _shutdown_at_exit() -> None:
+    # No restarts while the interpreter exits; later records stay queued.
+    global _exiting
+    _exiting = True
+    shutdown_logging()
+
+
+atexit.register(_shutdown_at_exit)
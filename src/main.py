@@ -4,14 +4,19 @@ import logging
 import threading
 import queue
 import signal
+import sqlite3
 import atexit
 import time
 
-from src.alerts import setup_alert_system
+from src.alerts import enable_alert_aggregation, setup_alert_system, shutdown_alert_system
 from src.log_monitor import monitor_log
+from src.logger import configure_root_logging
 from src.worker import detection_worker
-from src.config import LOG_DIR, LOG_FILE
+from src.alert_sinks import build_fanout
+from src.alert_store import AlertStore
+from src.config import ALERT_JSONL_FILE, ALERT_SYSLOG_SOCKET, ALERT_WEBHOOK_URL, LOG_DIR, LOG_FILE
 from src.detector import DetectionEngine
+from src.profiling import install_profile_signal
 
 event_queue = queue.Queue()
 shutdown_event = threading.Event()
@@ -19,15 +24,7 @@ logger = logging.getLogger("HIDS.Main")
 
 
 def _setup_logging():
-    log_format = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    logging.basicConfig(
-        level=logging.INFO,
-        format=log_format,
-        handlers=[
-            logging.FileHandler("hids_main.log"),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    configure_root_logging("hids_main.log")
 
 
 def _ensure_log_directory():
@@ -64,10 +61,20 @@ def main():
     atexit.register(lambda: logger.info("HIDS terminated"))
 
     worker_thread = None
+    fanout = None
 
     try:
         _ensure_log_directory()
-        setup_alert_system("logs/alerts.log")
+        setup_alert_system("logs/alerts.log", queued=True)
+        enable_alert_aggregation()
+        fanout = build_fanout(ALERT_SYSLOG_SOCKET, ALERT_WEBHOOK_URL, ALERT_JSONL_FILE)
+        try:
+            fanout.add_sink(AlertStore())
+        except sqlite3.Error as e:
+            logger.error("Alert store unavailable: %s", e)
+        if fanout.sinks:
+            fanout.start()
+            logger.info("Alert sinks started: %s", ", ".join(fanout.sinks))
         logger.info("Alert system initialized")
 
         engine = DetectionEngine()
@@ -75,6 +82,8 @@ def main():
 
         signal.signal(signal.SIGINT, _signal_handler)
         signal.signal(signal.SIGTERM, _signal_handler)
+        if install_profile_signal():
+            logger.info("Send SIGUSR2 to profile the running sensor")
 
         worker_thread = threading.Thread(
             target=_worker_wrapper,
@@ -101,6 +110,9 @@ def main():
             worker_thread.join(timeout=5.0)
             if worker_thread.is_alive():
                 logger.warning("Worker thread did not finish within timeout")
+        shutdown_alert_system()
+        if fanout is not None:
+            fanout.stop()
         logger.info("HIDS shutdown complete")
         sys.exit(0)
 
@@ -0,0 +1,311 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+EWMA_ALPHA = 0.1
+
+RATE_WINDOW_SECONDS = 60
+RATE_REPORT_WINDOWS = (10, 60)
+
+# Log-linear buckets over integer microseconds: values below 32us are exact, above that
+# each power of two is split into 16 sub-buckets (<= 6.25% relative error).
+_SUB_BUCKETS = 16
+_LINEAR_LIMIT = 2 * _SUB_BUCKETS
+_MAX_TRACKABLE_US = 1 << 36
+_BUCKET_COUNT = _LINEAR_LIMIT + (_MAX_TRACKABLE_US.bit_length() - 5) * _SUB_BUCKETS
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < _LINEAR_LIMIT:
+        return value_us
+    if value_us >= _MAX_TRACKABLE_US:
+        value_us = _MAX_TRACKABLE_US - 1
+    shift = value_us.bit_length() - 5
+    return _LINEAR_LIMIT + (shift - 1) * _SUB_BUCKETS + ((value_us >> shift) - _SUB_BUCKETS)
+
+
+def _bucket_upper(index: int) -> int:
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = (index - _LINEAR_LIMIT) // _SUB_BUCKETS + 1
+    mantissa = (index - _LINEAR_LIMIT) % _SUB_BUCKETS + _SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "total", "sum_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKET_COUNT
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        value_us = int(seconds * 1_000_000)
+        if value_us < 0:
+            value_us = 0
+        self.counts[_bucket_index(value_us)] += count
+        self.total += count
+        self.sum_us += value_us * count
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        counts = self.counts
+        for i, c in enumerate(list(other.counts)):
+            if c:
+                counts[i] += c
+        self.total += other.total
+        self.sum_us += other.sum_us
+        if other.max_us > self.max_us:
+            self.max_us = other.max_us
+
+    def since(self, earlier: "LatencyHistogram") -> "LatencyHistogram":
+        # Samples recorded after `earlier`, a previous copy of this histogram; max is an upper bound.
+        delta = LatencyHistogram()
+        delta.counts = [now - before for now, before in zip(self.counts, earlier.counts)]
+        delta.total = self.total - earlier.total
+        delta.sum_us = self.sum_us - earlier.sum_us
+        delta.max_us = self.max_us
+        return delta
+
+    def percentile(self, pct: float) -> float:
+        if self.total == 0:
+            return 0.0
+        target = max(1, int(self.total * pct / 100.0 + 0.999999))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(_bucket_upper(i), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def summary(self) -> dict:
+        return {
+            "count": self.total,
+            "mean": (self.sum_us / self.total / 1_000_000) if self.total else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max_us / 1_000_000,
+        }
+
+
+class RateCounter:
+    __slots__ = ("window", "slots", "seconds", "counts")
+
+    def __init__(self, window: int = RATE_WINDOW_SECONDS):
+        self.window = window
+        # One extra slot for the current, partial second, so `window` completed seconds are kept.
+        self.slots = window + 1
+        self.seconds = [-1] * self.slots
+        self.counts = [0] * self.slots
+
+    def add(self, count: int, now: float) -> None:
+        second = int(now)
+        slot = second % self.slots
+        if self.seconds[slot] != second:
+            self.seconds[slot] = second
+            self.counts[slot] = count
+        else:
+            self.counts[slot] += count
+
+    def merge(self, other: "RateCounter") -> None:
+        for second, count in zip(list(other.seconds), list(other.counts)):
+            if second < 0:
+                continue
+            slot = second % self.slots
+            if self.seconds[slot] == second:
+                self.counts[slot] += count
+            elif self.seconds[slot] < second:
+                self.seconds[slot] = second
+                self.counts[slot] = count
+
+    def total(self, window: int, now: float) -> int:
+        # Only completed seconds are counted, so a partial current second never skews rates.
+        current = int(now)
+        oldest = current - min(window, self.window)
+        return sum(
+            c for s, c in zip(list(self.seconds), list(self.counts))
+            if oldest <= s < current
+        )
+
+
+class _ThreadRecorder:
+    __slots__ = (
+        "name", "thread", "total_processed", "success_count", "failure_count",
+        "ewma_processing_time", "processing", "batch", "queue_wait", "rate",
+    )
+
+    def __init__(self, name: str, thread: Optional[threading.Thread] = None):
+        self.name = name
+        self.thread = thread
+        self.total_processed = 0
+        self.success_count = 0
+        self.failure_count = 0
+        self.ewma_processing_time = None
+        self.processing = LatencyHistogram()
+        self.batch = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.rate = RateCounter()
+
+    def absorb(self, other: "_ThreadRecorder") -> None:
+        self.total_processed += other.total_processed
+        self.success_count += other.success_count
+        self.failure_count += other.failure_count
+        self.processing.merge(other.processing)
+        self.batch.merge(other.batch)
+        self.queue_wait.merge(other.queue_wait)
+        self.rate.merge(other.rate)
+
+
+class WorkerMetrics:
+    def __init__(self, clock: Optional[Callable[[], float]] = None):
+        self.clock = clock if clock else time.time
+        self._local = threading.local()
+        self._registry_lock = threading.Lock()
+        self._recorders: List[_ThreadRecorder] = []
+        # Totals of threads that have exited, so autoscaled pools do not grow the registry forever.
+        self._retired = _ThreadRecorder("retired")
+
+    def _recorder(self) -> _ThreadRecorder:
+        recorder = getattr(self._local, "recorder", None)
+        if recorder is None:
+            thread = threading.current_thread()
+            recorder = _ThreadRecorder(thread.name, thread)
+            self._local.recorder = recorder
+            with self._registry_lock:
+                self._prune_locked()
+                self._recorders.append(recorder)
+        return recorder
+
+    def _prune_locked(self) -> None:
+        # Runs when a thread registers, so the registry holds live threads plus those that exited
+        # since the last registration. A dead thread can no longer record, so folding it is safe.
+        alive = []
+        for recorder in self._recorders:
+            if recorder.thread is not None and not recorder.thread.is_alive():
+                self._retired.absorb(recorder)
+            else:
+                alive.append(recorder)
+        self._recorders = alive
+
+    def _record(self, success_count: int, failure_count: int, processing_time: float) -> _ThreadRecorder:
+        # processing_time is per event here; histograms are recorded by the callers.
+        count = success_count + failure_count
+        recorder = self._recorder()
+        recorder.total_processed += count
+        recorder.success_count += success_count
+        recorder.failure_count += failure_count
+
+        if recorder.ewma_processing_time is None:
+            recorder.ewma_processing_time = processing_time
+        else:
+            recorder.ewma_processing_time = (
+                EWMA_ALPHA * processing_time +
+                (1 - EWMA_ALPHA) * recorder.ewma_processing_time
+            )
+
+        recorder.rate.add(count, self.clock())
+        return recorder
+
+    def update(self, success: bool, processing_time: float) -> None:
+        recorder = self._record(1 if success else 0, 0 if success else 1, processing_time)
+        recorder.processing.record(processing_time)
+
+    def update_batch(self, success_count: int, failure_count: int, processing_time: float) -> None:
+        # Per-event times inside a batch are unknown, so the batch's wall time goes into its own
+        # histogram instead of being spread as identical per-event samples.
+        count = success_count + failure_count
+        if count <= 0:
+            return
+        recorder = self._record(success_count, failure_count, processing_time / count)
+        recorder.batch.record(processing_time)
+
+    def record_queue_wait(self, wait_time: float) -> None:
+        self._recorder().queue_wait.record(wait_time)
+
+    def _registry_view(self) -> Tuple[List[_ThreadRecorder], _ThreadRecorder]:
+        # Live recorders and a copy of the retired totals from one lock hold; a prune between
+        # two separate reads would count a dead recorder in both.
+        with self._registry_lock:
+            retired = _ThreadRecorder(self._retired.name)
+            retired.absorb(self._retired)
+            return list(self._recorders), retired
+
+    def queue_wait_histogram(self) -> LatencyHistogram:
+        recorders, retired = self._registry_view()
+        merged = LatencyHistogram()
+        for recorder in recorders:
+            merged.merge(recorder.queue_wait)
+        merged.merge(retired.queue_wait)
+        return merged
+
+    def get_snapshot(self) -> dict:
+        recorders, retired = self._registry_view()
+
+        now = self.clock()
+        processing = LatencyHistogram()
+        batch = LatencyHistogram()
+        queue_wait = LatencyHistogram()
+        per_worker: Dict[str, dict] = {}
+        totals = {'total_processed': 0, 'success_count': 0, 'failure_count': 0}
+        ewmas = []
+        rate_totals = {window: 0 for window in RATE_REPORT_WINDOWS}
+
+        for recorder in recorders:
+            processing.merge(recorder.processing)
+            batch.merge(recorder.batch)
+            queue_wait.merge(recorder.queue_wait)
+            totals['total_processed'] += recorder.total_processed
+            totals['success_count'] += recorder.success_count
+            totals['failure_count'] += recorder.failure_count
+            if recorder.ewma_processing_time is not None:
+                ewmas.append(recorder.ewma_processing_time)
+
+            worker = per_worker.setdefault(recorder.name, {
+                'total_processed': 0,
+                'events_per_second': 0.0,
+                'processing': LatencyHistogram(),
+                'batch': LatencyHistogram(),
+                'queue_wait': LatencyHistogram(),
+            })
+            worker['total_processed'] += recorder.total_processed
+            worker['processing'].merge(recorder.processing)
+            worker['batch'].merge(recorder.batch)
+            worker['queue_wait'].merge(recorder.queue_wait)
+
+            for window in RATE_REPORT_WINDOWS:
+                events = recorder.rate.total(window, now)
+                rate_totals[window] += events
+                if window == RATE_REPORT_WINDOWS[0]:
+                    worker['events_per_second'] += events / window
+
+        processing.merge(retired.processing)
+        batch.merge(retired.batch)
+        queue_wait.merge(retired.queue_wait)
+        totals['total_processed'] += retired.total_processed
+        totals['success_count'] += retired.success_count
+        totals['failure_count'] += retired.failure_count
+        for window in RATE_REPORT_WINDOWS:
+            rate_totals[window] += retired.rate.total(window, now)
+
+        for worker in per_worker.values():
+            worker['events_per_second'] = round(worker['events_per_second'], 2)
+            worker['processing'] = worker['processing'].summary()
+            worker['batch'] = worker['batch'].summary()
+            worker['queue_wait'] = worker['queue_wait'].summary()
+
+        snapshot = dict(totals)
+        snapshot['ewma_processing_time'] = sum(ewmas) / len(ewmas) if ewmas else None
+        snapshot['latency'] = {
+            'processing': processing.summary(),
+            'batch': batch.summary(),
+            'queue_wait': queue_wait.summary(),
+        }
+        snapshot['event_rate'] = {
+            f'{window}s': round(rate_totals[window] / window, 2) for window in RATE_REPORT_WINDOWS
+        }
+        snapshot['per_worker'] = per_worker
+        return snapshot
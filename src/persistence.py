@@ -3,7 +3,7 @@ import json
 import threading
 import logging
 import time
-from src.executor import PipelineExecutor
+from src.executor import CircuitBreaker, PipelineExecutor, pipeline_step
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +16,8 @@ class PersistenceLayer:
         self.conn = None
         self._stop_event = threading.Event()
         self._thread = None
+        # While the database is failing, flushes short-circuit and writes stay buffered.
+        self._flush_breaker = CircuitBreaker(f"persistence.flush:{db_path}")
         self._init_db()
         self._ip_state_buffer = {}
         self._baseline_buffer = {}
@@ -65,48 +67,57 @@ class PersistenceLayer:
             if not ip_buffer_copy and not base_buffer_copy:
                 return
 
-            conn = self._connect()
-            cursor = conn.cursor()
-            if ip_buffer_copy:
-                cursor.executemany(
-                    "INSERT OR REPLACE INTO ip_state (ip, state_json) VALUES (?, ?)",
-                    list(ip_buffer_copy.items())
-                )
-            if base_buffer_copy:
-                cursor.executemany(
-                    "INSERT OR REPLACE INTO baseline_history (ip, history_json) VALUES (?, ?)",
-                    list(base_buffer_copy.items())
-                )
-            conn.commit()
+            try:
+                conn = self._connect()
+                cursor = conn.cursor()
+                if ip_buffer_copy:
+                    cursor.executemany(
+                        "INSERT OR REPLACE INTO ip_state (ip, state_json) VALUES (?, ?)",
+                        list(ip_buffer_copy.items())
+                    )
+                if base_buffer_copy:
+                    cursor.executemany(
+                        "INSERT OR REPLACE INTO baseline_history (ip, history_json) VALUES (?, ?)",
+                        list(base_buffer_copy.items())
+                    )
+                conn.commit()
+            except Exception:
+                # Put the batch back so it is retried; entries written since then are newer and win.
+                with self._lock:
+                    for ip, state_json in ip_buffer_copy.items():
+                        self._ip_state_buffer.setdefault(ip, state_json)
+                    for ip, history_json in base_buffer_copy.items():
+                        self._baseline_buffer.setdefault(ip, history_json)
+                raise
 
         PipelineExecutor.execute(
             _inner,
             default=None,
-            fatal_exceptions=(KeyboardInterrupt, SystemExit)
+            fatal_exceptions=(KeyboardInterrupt, SystemExit),
+            breaker=self._flush_breaker
         )
 
     def close(self):
         self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=5)
+        # The final flush is always attempted, even if the breaker is open.
+        self._flush_breaker.reset()
         self._flush_buffers()
         with self._lock:
             if self.conn:
                 self.conn.close()
                 self.conn = None
 
+    # Flushing happens after the buffer lock is released: _flush_buffers takes it itself.
+    @pipeline_step(default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit))
     def save_ip_state(self, ip, state):
-        def _inner():
-            with self._lock:
-                self._ip_state_buffer[ip] = json.dumps(state, default=str)
-                if len(self._ip_state_buffer) >= self.buffer_size:
-                    self._flush_buffers()
-
-        PipelineExecutor.execute(
-            _inner,
-            default=None,
-            fatal_exceptions=(KeyboardInterrupt, SystemExit)
-        )
+        serialized = json.dumps(state, default=str)
+        with self._lock:
+            self._ip_state_buffer[ip] = serialized
+            full = len(self._ip_state_buffer) >= self.buffer_size
+        if full:
+            self._flush_buffers()
 
     def load_ip_states(self):
         def _inner():
@@ -125,18 +136,14 @@ class PersistenceLayer:
             fatal_exceptions=(KeyboardInterrupt, SystemExit)
         )
 
+    @pipeline_step(default=None, fatal_exceptions=(KeyboardInterrupt, SystemExit))
     def save_baseline(self, ip, history):
-        def _inner():
-            with self._lock:
-                self._baseline_buffer[ip] = json.dumps(history)
-                if len(self._baseline_buffer) >= self.buffer_size:
-                    self._flush_buffers()
-
-        PipelineExecutor.execute(
-            _inner,
-            default=None,
-            fatal_exceptions=(KeyboardInterrupt, SystemExit)
-        )
+        serialized = json.dumps(history)
+        with self._lock:
+            self._baseline_buffer[ip] = serialized
+            full = len(self._baseline_buffer) >= self.buffer_size
+        if full:
+            self._flush_buffers()
 
     def load_baseline(self):
         def _inner():
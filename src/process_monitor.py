@@ -0,0 +1,216 @@
+import os
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from src.logger import setup_logger
+from src.executor import PipelineExecutor
+
+logger = setup_logger("ProcessMonitor")
+
+DEFAULT_PROC_ROOT = "/proc"
+DEFAULT_SAMPLE_INTERVAL = 1.0
+DEFAULT_BATCH_SIZE = 1000
+
+CPU_SCORE_WEIGHT = 1.0
+IO_SCORE_WEIGHT = 10.0
+IO_SCORE_UNIT = 1024 * 1024
+
+_READ_SIZE = 4096
+
+
+def _read_file(path: str) -> bytes:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, _READ_SIZE)
+    finally:
+        os.close(fd)
+
+
+def _parse_stat(data: bytes) -> Tuple[str, int, int]:
+    # comm may contain spaces and parentheses, so split after the last ')'.
+    lparen = data.find(b"(")
+    rparen = data.rfind(b")")
+    name = data[lparen + 1:rparen].decode("utf-8", "replace")
+    fields = data[rparen + 2:].split()
+    cpu_ticks = int(fields[11]) + int(fields[12])
+    start_time = int(fields[19])
+    return name, cpu_ticks, start_time
+
+
+def _parse_io(data: bytes) -> int:
+    total = 0
+    for line in data.splitlines():
+        if line.startswith(b"rchar:") or line.startswith(b"wchar:"):
+            total += int(line.split(b":", 1)[1])
+    return total
+
+
+class _ProcessInfo:
+    __slots__ = (
+        "start_time", "name", "cmdline", "exe", "uid",
+        "io_readable", "cpu_ticks", "io_bytes", "sampled_at", "cycle",
+    )
+
+    def __init__(self, start_time: int, name: str):
+        self.start_time = start_time
+        self.name = name
+        self.cmdline = ""
+        self.exe = None
+        self.uid = None
+        self.io_readable = True
+        self.cpu_ticks = 0
+        self.io_bytes = 0
+        self.sampled_at = 0.0
+        self.cycle = 0
+
+
+class ProcessActivityCollector:
+    def __init__(self, proc_root: str = DEFAULT_PROC_ROOT, clock: Optional[Callable[[], float]] = None):
+        self.proc_root = proc_root
+        self.clock = clock if clock else time.monotonic
+        try:
+            self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        except (AttributeError, ValueError, OSError):
+            self.clock_ticks = 100
+        self._processes: Dict[int, _ProcessInfo] = {}
+        self._cycle = 0
+
+    @property
+    def tracked_processes(self) -> int:
+        return len(self._processes)
+
+    def _load_static(self, pid_dir: str, info: _ProcessInfo) -> None:
+        try:
+            raw = _read_file(os.path.join(pid_dir, "cmdline"))
+            info.cmdline = raw.replace(b"\0", b" ").strip().decode("utf-8", "replace")
+        except OSError:
+            pass
+        try:
+            info.exe = os.readlink(os.path.join(pid_dir, "exe"))
+        except OSError:
+            pass
+        try:
+            for line in _read_file(os.path.join(pid_dir, "status")).splitlines():
+                if line.startswith(b"Name:"):
+                    info.name = line.split(b":", 1)[1].strip().decode("utf-8", "replace")
+                elif line.startswith(b"Uid:"):
+                    info.uid = int(line.split()[1])
+                    break
+        except (OSError, ValueError, IndexError):
+            pass
+
+    def sample_columns(self) -> Tuple[List[str], List[float], List[int]]:
+        self._cycle += 1
+        cycle = self._cycle
+        processes = self._processes
+        ticks_per_second = float(self.clock_ticks)
+
+        names: List[str] = []
+        scores: List[float] = []
+        pids: List[int] = []
+
+        try:
+            entries = os.scandir(self.proc_root)
+        except OSError as e:
+            logger.error("Cannot scan %s: %s", self.proc_root, e)
+            return names, scores, pids
+
+        with entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                pid = int(entry.name)
+                pid_dir = entry.path
+                try:
+                    name, cpu_ticks, start_time = _parse_stat(_read_file(pid_dir + "/stat"))
+                except (OSError, ValueError, IndexError):
+                    continue
+                now = self.clock()
+
+                info = processes.get(pid)
+                if info is None or info.start_time != start_time:
+                    info = _ProcessInfo(start_time, name)
+                    self._load_static(pid_dir, info)
+                    processes[pid] = info
+                    fresh = True
+                else:
+                    fresh = False
+
+                # A process that burned no CPU since the last cycle cannot have issued I/O
+                # worth scoring; keep the old counter and let the next delta absorb it.
+                io_bytes = info.io_bytes
+                if info.io_readable and (fresh or cpu_ticks != info.cpu_ticks):
+                    try:
+                        io_bytes = _parse_io(_read_file(pid_dir + "/io"))
+                    except OSError:
+                        info.io_readable = False
+                    except ValueError:
+                        pass
+
+                if not fresh:
+                    elapsed = now - info.sampled_at
+                    if elapsed > 0:
+                        cpu_percent = (cpu_ticks - info.cpu_ticks) / ticks_per_second / elapsed * 100.0
+                        io_rate = (io_bytes - info.io_bytes) / IO_SCORE_UNIT / elapsed
+                        names.append(info.name)
+                        scores.append(
+                            max(0.0, cpu_percent) * CPU_SCORE_WEIGHT
+                            + max(0.0, io_rate) * IO_SCORE_WEIGHT
+                        )
+                        pids.append(pid)
+
+                info.cpu_ticks = cpu_ticks
+                info.io_bytes = io_bytes
+                info.sampled_at = now
+                info.cycle = cycle
+
+        gone = [pid for pid, info in processes.items() if info.cycle != cycle]
+        for pid in gone:
+            del processes[pid]
+
+        return names, scores, pids
+
+    def sample(self) -> List[Dict[str, Any]]:
+        names, scores, pids = self.sample_columns()
+        processes = self._processes
+        events = []
+        for name, score, pid in zip(names, scores, pids):
+            info = processes[pid]
+            events.append({
+                "process": name,
+                "activity_score": score,
+                "pid": pid,
+                "exe": info.exe,
+                "cmdline": info.cmdline,
+                "uid": info.uid,
+            })
+        return events
+
+    def run(
+        self,
+        emit: Callable[[List[Dict[str, Any]]], Any],
+        shutdown_event,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> None:
+        logger.info("Process activity collector started (root=%s, interval=%.2fs)", self.proc_root, interval)
+        try:
+            while not shutdown_event.is_set():
+                cycle_start = time.monotonic()
+                events = PipelineExecutor.execute(
+                    self.sample,
+                    default=[],
+                    fatal_exceptions=(KeyboardInterrupt, SystemExit)
+                )
+                for i in range(0, len(events), batch_size):
+                    PipelineExecutor.execute(
+                        emit,
+                        events[i:i + batch_size],
+                        default=None,
+                        fatal_exceptions=(KeyboardInterrupt, SystemExit)
+                    )
+                elapsed = time.monotonic() - cycle_start
+                if shutdown_event.wait(max(0.0, interval - elapsed)):
+                    break
+        finally:
+            logger.info("Process activity collector stopped.")
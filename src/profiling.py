@@ -0,0 +1,132 @@
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+from src.config import PROFILE_DIR
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DURATION = 30.0
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_MAX_DEPTH = 64
+PROFILE_SIGNAL = getattr(signal, "SIGUSR2", None)
+
+
+# Samples every thread through sys._current_frames(), unlike cProfile which only sees the
+# thread that enabled it. Output uses the folded format ("thread;outer;inner count") read by
+# flamegraph.pl and speedscope.
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, output_dir: str = PROFILE_DIR):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.samples = 0
+        self.last_output: Optional[str] = None
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float = PROFILE_DURATION) -> bool:
+        if self.running:
+            return False
+        self._stacks = Counter()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration,), name="SamplingProfiler", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 5.0) -> Optional[str]:
+        thread = self._thread
+        if thread is None:
+            return self.last_output
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+        return self.last_output
+
+    def _run(self, duration: float) -> None:
+        deadline = time.monotonic() + duration
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            self._sample(own_ident)
+        try:
+            self.last_output = self._dump()
+            logger.info("Profile of %d samples written to %s", self.samples, self.last_output)
+        except OSError as e:
+            logger.error("Could not write profile: %s", e)
+
+    def _sample(self, own_ident: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self._stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def _dump(self) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(
+            self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S") + f"-{os.getpid()}.folded"
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(";".join(stack) + f" {count}\n")
+        return path
+
+    def top_functions(self, limit: int = 10) -> Tuple[Tuple[str, int], ...]:
+        # Self samples: the innermost frame of each stack.
+        totals: Counter = Counter()
+        for stack, count in list(self._stacks.items()):
+            totals[stack[-1]] += count
+        return tuple(totals.most_common(limit))
+
+
+_profiler = SamplingProfiler()
+
+
+def start_profiling(duration: float = PROFILE_DURATION) -> bool:
+    started = _profiler.start(duration)
+    if started:
+        logger.info("Sampling profiler started for %.0fs", duration)
+    return started
+
+
+def stop_profiling() -> Optional[str]:
+    return _profiler.stop()
+
+
+def profiler_status() -> dict:
+    return {
+        "running": _profiler.running,
+        "samples": _profiler.samples,
+        "last_output": _profiler.last_output,
+    }
+
+
+def _profile_signal_handler(signum, frame):
+    start_profiling()
+
+
+def install_profile_signal(signum: Optional[int] = PROFILE_SIGNAL) -> bool:
+    # Signal handlers can only be installed from the main thread.
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signum, _profile_signal_handler)
+    return True
@@ -1,49 +1,65 @@
+import itertools
 import queue
 import logging
 import time
 import threading
+from typing import Dict, List, Optional
+
 from src.executor import PipelineExecutor
+from src.event_queue import CoalescedEvent, event_count
+from src.metrics import WorkerMetrics
 
 logger = logging.getLogger(__name__)
 
 REPORT_INTERVAL = 60
-EWMA_ALPHA = 0.1
 BACKPRESSURE_THRESHOLD = 1000
 BACKPRESSURE_CHECK_INTERVAL = 10
-
-
-class WorkerMetrics:
-    def __init__(self):
-        self._lock = threading.Lock()
-        self.total_processed = 0
-        self.success_count = 0
-        self.failure_count = 0
-        self.ewma_processing_time = None
-
-    def update(self, success: bool, processing_time: float) -> None:
-        with self._lock:
-            self.total_processed += 1
-            if success:
-                self.success_count += 1
-            else:
-                self.failure_count += 1
-
-            if self.ewma_processing_time is None:
-                self.ewma_processing_time = processing_time
-            else:
-                self.ewma_processing_time = (
-                    EWMA_ALPHA * processing_time +
-                    (1 - EWMA_ALPHA) * self.ewma_processing_time
-                )
-
-    def get_snapshot(self) -> dict:
-        with self._lock:
-            return {
-                'total_processed': self.total_processed,
-                'success_count': self.success_count,
-                'failure_count': self.failure_count,
-                'ewma_processing_time': self.ewma_processing_time,
-            }
+DEFAULT_BATCH_SIZE = 256
+
+_FAILED = object()
+
+
+class BatchProcessor:
+    # Binds one engine's entry points once; the guards are built here, not per batch.
+    def __init__(self, engine):
+        guard = {"default": _FAILED, "fatal_exceptions": (KeyboardInterrupt, SystemExit), "positional": True}
+        self._process_one = PipelineExecutor.wrap(engine.process_failed_login, **guard)
+        process_many = getattr(engine, "process_failed_logins", None)
+        self._process_many = PipelineExecutor.wrap(process_many, **guard) if callable(process_many) else None
+        process_coalesced = getattr(engine, "process_coalesced_events", None)
+        self._process_coalesced = (
+            PipelineExecutor.wrap(process_coalesced, **guard) if callable(process_coalesced) else None
+        )
+
+    def process(self, ips: List[str]) -> int:
+        # Runs one batch of failed-login IPs through the engine; returns how many succeeded.
+        if not ips:
+            return 0
+        if self._process_many is None:
+            return self._process_each(ips)
+
+        pulled = itertools.count()
+        if self._process_many(ip for ip, _ in zip(ips, pulled)) is not _FAILED:
+            return len(ips)
+        # The engine raised on the last IP it pulled; the ones before it were recorded. The
+        # rest of the batch still goes through, one guarded call per IP.
+        done = next(pulled)
+        return max(0, done - 1) + self._process_each(ips[done:])
+
+    def _process_each(self, ips: List[str]) -> int:
+        process_one = self._process_one
+        return sum(1 for ip in ips if process_one(ip) is not _FAILED)
+
+    def process_coalesced(self, events: List[CoalescedEvent]) -> int:
+        if not events:
+            return 0
+        if self._process_coalesced is None:
+            # Replaying a record as one call per attempt would undo the coalescing, so such
+            # engines are refused coalescing ingress; anything that still arrives is dropped.
+            logger.warning("Engine cannot process coalesced records, dropping %d", len(events))
+            return 0
+        total = sum(event.count for event in events)
+        return total if self._process_coalesced(events) is not _FAILED else 0
 
 
 def detection_worker(
@@ -52,19 +68,34 @@ def detection_worker(
     shutdown_event: threading.Event,
     timeout: float = 1.0,
     metrics: WorkerMetrics = None,
-    backpressure_threshold: int = BACKPRESSURE_THRESHOLD
+    backpressure_threshold: int = BACKPRESSURE_THRESHOLD,
+    heartbeat_dict: Optional[Dict[int, float]] = None,
+    worker_id: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    stop_event: Optional[threading.Event] = None
 ) -> None:
     logger.info("Detection worker started")
 
     local_metrics = metrics if metrics is not None else WorkerMetrics()
+    processor = BatchProcessor(engine)
+    batch_size = max(1, batch_size)
+    get_batch = getattr(event_queue, "get_batch", None)
+    task_done_many = getattr(event_queue, "task_done_many", None)
 
     last_report_time = time.monotonic()
     last_backpressure_check = time.monotonic()
     backpressure_warning_active = False
 
-    while not shutdown_event.is_set():
+    # stop_event retires just this worker (pool scale-down); shutdown_event stops them all.
+    while not shutdown_event.is_set() and not (stop_event is not None and stop_event.is_set()):
+        if heartbeat_dict is not None:
+            heartbeat_dict[worker_id] = time.monotonic()
+
         try:
-            ip = event_queue.get(timeout=timeout)
+            if get_batch is not None:
+                batch = get_batch(batch_size, timeout=timeout)
+            else:
+                batch = [event_queue.get(timeout=timeout)]
         except queue.Empty:
             continue
         except (KeyboardInterrupt, SystemExit):
@@ -73,40 +104,53 @@ def detection_worker(
             logger.exception("Unexpected error while getting item from queue")
             continue
 
+        if get_batch is None:
+            while len(batch) < batch_size:
+                try:
+                    batch.append(event_queue.get_nowait())
+                except queue.Empty:
+                    break
+
         start_time = time.monotonic()
-        processed = False
-        success = False
+        ips = []
+        coalesced = []
+        processed = 0
+        succeeded = 0
 
         try:
-            if ip is None:
-                continue
-
-            if not isinstance(ip, str):
-                logger.warning("Invalid IP type received: %s (type: %s)", ip, type(ip))
-                continue
-
-            processed = True
-            logger.debug("Processing IP: %s", ip)
-
-            PipelineExecutor.execute(
-                engine.process_failed_login,
-                ip,
-                default=None,
-                fatal_exceptions=(KeyboardInterrupt, SystemExit)
-            )
-
-            success = True
+            for ip in batch:
+                if ip is None:
+                    continue
+                if isinstance(ip, CoalescedEvent):
+                    coalesced.append(ip)
+                    processed += ip.count
+                    continue
+                if not isinstance(ip, str):
+                    logger.warning("Invalid IP type received: %s (type: %s)", ip, type(ip))
+                    continue
+                ips.append(ip)
+                processed += 1
+
+            if processed and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing %d events (%d coalesced records)", processed, len(coalesced))
+
+            succeeded = processor.process(ips) + processor.process_coalesced(coalesced)
 
         except Exception:
-            logger.exception("Unexpected error while processing IP %s", ip)
+            logger.exception("Unexpected error while processing batch of %d events", processed)
 
         finally:
             elapsed = time.monotonic() - start_time
 
             if processed:
-                local_metrics.update(success, elapsed)
+                local_metrics.update_batch(succeeded, processed - succeeded, elapsed)
 
-            event_queue.task_done()
+            done = sum(event_count(item) for item in batch) if coalesced else len(batch)
+            if task_done_many is not None:
+                task_done_many(done)
+            else:
+                for _ in range(done):
+                    event_queue.task_done()
 
         now = time.monotonic()
 
@@ -114,11 +158,12 @@ def detection_worker(
             snapshot = local_metrics.get_snapshot()
             ewma = snapshot['ewma_processing_time']
             logger.info(
-                "Heartbeat - processed: %d, success: %d, failures: %d, ewma_time: %.3fs",
+                "Heartbeat - processed: %d, success: %d, failures: %d, ewma_time: %.3fs, p99_batch_time: %.3fs",
                 snapshot['total_processed'],
                 snapshot['success_count'],
                 snapshot['failure_count'],
-                ewma if ewma is not None else 0.0
+                ewma if ewma is not None else 0.0,
+                snapshot['latency']['batch']['p99']
             )
             last_report_time = now
 
@@ -146,4 +191,4 @@ def detection_worker(
         snapshot['failure_count'],
         ewma if ewma is not None else 0.0
     )
-    logger.info("Detection worker stopped")
\ No newline at end of file
+    logger.info("Detection worker stopped")
@@ -0,0 +1,75 @@
+from src import alerts
+from src.alert_aggregator import AlertAggregator, group_key
+
+
+def _aggregator(now, **kwargs):
+    summaries = []
+    aggregator = AlertAggregator(
+        lambda message, metadata: summaries.append((message, metadata)),
+        window=60.0, clock=lambda: now[0], **kwargs
+    )
+    return aggregator, summaries
+
+
+def test_group_key_uses_network_prefix_or_target():
+    assert group_key("10.1.2.3") == "10.1.2.0/24"
+    assert group_key("10.1.2.3", prefix_v4=0) == "0.0.0.0/0"
+    assert group_key("2001:db8::1") == "2001:db8::/64"
+    assert group_key("/etc/passwd") == "/etc/passwd"
+    assert group_key(None) == "*"
+
+def test_first_alert_passes_and_repeats_are_summarised_per_window():
+    now = [1000.0]
+    aggregator, summaries = _aggregator(now)
+    results = [aggregator.submit("burst", f"10.0.0.{i % 50}", "Burst attack") for i in range(1000)]
+    assert results[0] is True and not any(results[1:])
+    assert aggregator.submit("burst", "10.0.1.1", "Burst attack") is True
+    assert aggregator.submit("risk", "10.0.0.1", "High risk") is True
+
+    now[0] += 30
+    assert aggregator.flush() == 0
+    now[0] += 31
+    assert aggregator.flush() == 1
+    message, metadata = summaries[0]
+    assert metadata["group"] == "10.0.0.0/24"
+    assert metadata["count"] == 1000 and metadata["suppressed"] == 999
+    assert metadata["distinct_sources"] == 50
+    assert "1000 alerts from 50 sources" in message
+    assert aggregator.stats()["groups"] == 0
+    # A new window lets the next alert through again.
+    assert aggregator.submit("burst", "10.0.0.7", "Burst attack") is True
+
+def test_top_sources_and_group_limit_keep_memory_bounded():
+    now = [0.0]
+    aggregator, summaries = _aggregator(now, max_groups=2, prefix_v4=0)
+    for i in range(5000):
+        aggregator.submit("spray", f"10.{i // 256 % 256}.{i % 256}.1", "Spray")
+        if i % 10 == 0:
+            aggregator.submit("spray", "192.0.2.66", "Spray")
+    assert aggregator.flush(force=True) == 1
+    metadata = summaries[0][1]
+    top_source, top_count = metadata["top_sources"][0]
+    assert top_source == "192.0.2.66" and top_count >= 500
+    assert metadata["distinct_sources"] == 1024
+
+    aggregator.submit("a", "10.0.0.1", "a")
+    aggregator.submit("a", "10.0.0.1", "a")
+    aggregator.submit("b", "10.0.0.1", "b")
+    aggregator.submit("c", "10.0.0.1", "c")
+    assert aggregator.stats()["evicted"] == 1
+    assert summaries[-1][1]["rule"] == "a"
+
+def test_trigger_alert_routes_rule_alerts_through_aggregator(monkeypatch):
+    sent = []
+    monkeypatch.setattr(alerts, "send_alert", lambda message, **kwargs: sent.append((message, kwargs.get("metadata"))))
+    now = [0.0]
+    alerts.enable_alert_aggregation(window=60.0, clock=lambda: now[0])
+    try:
+        for i in range(100):
+            alerts.trigger_alert(f"Burst attack detected from IP 10.0.0.{i}", "burst", f"10.0.0.{i}")
+        alerts.trigger_alert("Unclassified alert")
+        assert [m for m, _ in sent] == ["Burst attack detected from IP 10.0.0.0", "Unclassified alert"]
+        assert alerts.alert_aggregation_stats()["suppressed"] == 99
+    finally:
+        alerts.disable_alert_aggregation()
+    assert sent[-1][1]["count"] == 100
@@ -0,0 +1,190 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src import alerts
+from src.alert_sinks import AlertFanout, AlertSink, FileAlertSink, SyslogAlertSink, WebhookAlertSink
+
+
+def _alert(i):
+    return {"timestamp": "2024-01-01T00:00:00.000Z", "event_type": "SECURITY",
+            "severity": "WARNING", "message": f"alert {i}", "metadata": {"i": i}}
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def collector():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            server.connections.add(self.client_address)
+            if server.delay:
+                time.sleep(server.delay)
+            status = server.statuses.pop(0) if server.statuses else 200
+            if status == 200:
+                server.batches.append(json.loads(body))
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.batches, server.connections, server.statuses, server.delay = [], set(), [], 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_webhook_sink_batches_reuses_connection_and_retries(collector):
+    collector.statuses = [503]
+    sink = WebhookAlertSink(
+        f"http://127.0.0.1:{collector.server_port}/alerts", batch_size=10, flush_interval=0.05, retry_backoff=0.01
+    )
+    sink.start()
+    for i in range(25):
+        sink.submit(_alert(i))
+    assert _wait_for(lambda: sink.sent == 25)
+    for i in range(25, 30):
+        sink.submit(_alert(i))
+    assert _wait_for(lambda: sink.sent == 30)
+    sink.stop()
+
+    messages = [alert["message"] for batch in collector.batches for alert in batch]
+    assert messages == [f"alert {i}" for i in range(30)]
+    assert sink.stats()["retries"] == 1
+    assert sink.stats()["connections_opened"] == 1 and len(collector.connections) == 1
+
+def test_webhook_sink_drops_4xx_without_retrying_but_retries_429(collector):
+    collector.statuses = [400, 429]
+    sink = WebhookAlertSink(
+        f"http://127.0.0.1:{collector.server_port}/alerts", batch_size=1, flush_interval=0.05, retry_backoff=0.01
+    )
+    sink.start()
+    sink.submit(_alert(1))
+    assert _wait_for(lambda: sink.dropped_rejected == 1)
+    sink.submit(_alert(2))
+    assert _wait_for(lambda: sink.sent == 1)
+    sink.stop()
+
+    assert [alert["message"] for batch in collector.batches for alert in batch] == ["alert 2"]
+    assert sink.stats()["retries"] == 1
+    assert sink.stats()["dropped_failed"] == 0
+
+def test_syslog_sink_sends_rfc5424_datagrams(tmp_path):
+    address = str(tmp_path / "log.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    server.bind(address)
+    server.settimeout(5)
+    sink = SyslogAlertSink(address, flush_interval=0.05)
+    sink.start()
+    try:
+        sink.submit(_alert(1))
+        sink.submit(dict(_alert(2), severity="CRITICAL"))
+        datagrams = [server.recv(65536).decode() for _ in range(2)]
+    finally:
+        sink.stop()
+        server.close()
+
+    assert datagrams[0].startswith("<84>1 2024-01-01T00:00:00.000Z ")
+    assert datagrams[1].startswith("<82>1 ")
+    assert json.loads(datagrams[0].split(" - - ", 1)[1])["message"] == "alert 1"
+
+def test_failing_sink_drops_after_retries(tmp_path):
+    sink = SyslogAlertSink(str(tmp_path / "missing.sock"), flush_interval=0.01, max_retries=2, retry_backoff=0.001)
+    sink.start()
+    sink.submit(_alert(1))
+    assert _wait_for(lambda: sink.dropped_failed == 1)
+    sink.stop()
+    assert sink.retries == 2
+
+def test_fanout_delivers_to_every_sink_and_slow_webhook_does_not_delay_file(tmp_path, collector, monkeypatch):
+    monkeypatch.setattr(alerts, "_writer", None)
+    monkeypatch.setattr(alerts, "_configured", True)
+    monkeypatch.setattr(alerts, "_logger", alerts.logging.getLogger("test_alert_sinks"))
+    collector.delay = 0.5
+    path = tmp_path / "alerts.jsonl"
+    fanout = AlertFanout([
+        FileAlertSink(str(path), flush_interval=0.02),
+        WebhookAlertSink(f"http://127.0.0.1:{collector.server_port}/", flush_interval=0.02),
+    ])
+    fanout.start()
+    try:
+        start = time.monotonic()
+        alerts.send_alert("Burst attack detected from IP 10.0.0.1", metadata={"ip": "10.0.0.1"})
+        assert time.monotonic() - start < 0.2
+        assert _wait_for(lambda: path.exists() and path.read_text().count("\n") == 1, timeout=0.3)
+        assert json.loads(path.read_text())["metadata"] == {"ip": "10.0.0.1"}
+        assert _wait_for(lambda: fanout.sinks["webhook"].sent == 1)
+    finally:
+        fanout.stop()
+    assert fanout.publish not in alerts._listeners
+
+def test_fanout_and_sinks_can_be_restarted(tmp_path, monkeypatch):
+    monkeypatch.setattr(alerts, "_writer", None)
+    monkeypatch.setattr(alerts, "_configured", True)
+    monkeypatch.setattr(alerts, "_logger", alerts.logging.getLogger("test_alert_sinks"))
+    path = tmp_path / "alerts.jsonl"
+    fanout = AlertFanout([FileAlertSink(str(path), flush_interval=0.02)])
+    for i in range(2):
+        fanout.start()
+        try:
+            alerts.send_alert(f"restart {i}", event_type="SECURITY", severity="WARNING")
+            assert _wait_for(lambda: fanout.stats()["file"]["sent"] == i + 1)
+        finally:
+            fanout.stop()
+    assert [json.loads(line)["message"] for line in path.read_text().splitlines()] == ["restart 0", "restart 1"]
+
+def test_stop_timeout_keeps_the_running_send_and_its_connection():
+    release, entered = threading.Event(), threading.Event()
+
+    class SlowSink(AlertSink):
+        closed = 0
+
+        def send(self, batch):
+            entered.set()
+            release.wait(5)
+
+        def close(self):
+            self.closed += 1
+
+    sink = SlowSink("slow", flush_interval=0.01)
+    sink.start()
+    sink.submit(_alert(1))
+    assert entered.wait(2)
+    thread = sink._thread
+    sink.stop(timeout=0.05)
+    assert sink._thread is thread and sink.closed == 0
+    sink.start()
+    assert sink._thread is thread
+
+    release.set()
+    sink.stop()
+    assert sink._thread is None and sink.closed == 1 and not thread.is_alive()
+
+def test_full_sink_queue_drops_new_alerts(tmp_path):
+    sink = FileAlertSink(str(tmp_path / "alerts.jsonl"), maxsize=2)
+    assert [sink.submit(_alert(i)) for i in range(3)] == [True, True, False]
+    assert sink.stats()["dropped_queue_full"] == 1
+
+def test_alert_sink_requires_send():
+    class Incomplete(AlertSink):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete")
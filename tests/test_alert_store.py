@@ -0,0 +1,64 @@
+import time
+
+from src.alert_store import AlertStore, cidr_range, ip_key
+
+
+def _alert(ts, ip, rule="burst", severity="WARNING", message=None):
+    return {
+        "timestamp": ts,
+        "event_type": "SECURITY",
+        "severity": severity,
+        "message": message or f"Burst attack detected from IP {ip}",
+        "metadata": {"rule": rule, "ip": ip},
+    }
+
+
+def test_cidr_range_covers_ipv4_and_ipv6_without_overlap():
+    low, high = cidr_range("203.0.113.0/24")
+    assert low <= ip_key("203.0.113.0") <= ip_key("203.0.113.255") <= high
+    assert not low <= ip_key("203.0.114.0") <= high
+    assert not low <= ip_key("2001:db8::cb00:7101") <= high
+    low6, high6 = cidr_range("2001:db8::/64")
+    assert low6 <= ip_key("2001:db8::1") <= high6
+    assert ip_key("not-an-ip") is None
+
+def test_store_queries_by_cidr_time_rule_severity_and_text(tmp_path):
+    store = AlertStore(str(tmp_path / "alerts.db"))
+    now = time.time()
+    store.send([
+        _alert(now - 10, "203.0.113.7"),
+        _alert(now - 20, "203.0.113.200", rule="risk", severity="CRITICAL",
+               message="High risk intrusion detected from IP 203.0.113.200"),
+        _alert(now - 8 * 3600, "203.0.113.9"),
+        _alert(now - 30, "198.51.100.1"),
+        _alert("2024-01-01T00:00:00.000Z", "2001:db8::5"),
+    ])
+
+    recent = store.query(cidr="203.0.113.0/24", last=6 * 3600)
+    assert [a["ip"] for a in recent] == ["203.0.113.7", "203.0.113.200"]
+    assert recent[0]["metadata"] == {"rule": "burst", "ip": "203.0.113.7"}
+    assert store.count(cidr="203.0.113.0/24") == 3
+    assert [a["ip"] for a in store.query(rule="risk")] == ["203.0.113.200"]
+    assert [a["ip"] for a in store.query(severity="critical")] == ["203.0.113.200"]
+    assert [a["ip"] for a in store.query(text="intrusion")] == ["203.0.113.200"]
+    assert [a["ip"] for a in store.query(text='"203.0.113.2"*')] == ["203.0.113.200"]
+    assert [a["ip"] for a in store.query(cidr="2001:db8::/32")] == ["2001:db8::5"]
+    assert store.query(ip="198.51.100.1")[0]["timestamp"] == now - 30
+    store.close()
+
+def test_store_ingests_batches_from_sink_queue_and_prunes(tmp_path):
+    store = AlertStore(str(tmp_path / "alerts.db"), flush_interval=0.02, batch_size=100)
+    store.start()
+    now = time.time()
+    for i in range(250):
+        store.submit(_alert(now - i * 60, f"10.0.{i // 256}.{i % 256}"))
+    deadline = time.monotonic() + 5
+    while store.sent < 250 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.stats()["batches"] >= 3
+
+    assert store.prune(older_than=3600, now=now) == 250 - 61
+    assert store.count() == 61
+    # Deleted rows also leave the full-text index.
+    assert store.count(text="Burst") == 61
+    store.stop()
@@ -1,3 +1,6 @@
+import gzip
+import json
+import logging
 import pytest
 from datetime import datetime, timezone
 from src import alerts
@@ -75,4 +78,120 @@ def test_custom_timestamp():
     custom_time = "2025-01-01T12:00:00+00:00"
     event = {"type": "test", "message": "x", "timestamp": custom_time}
     alert = alerts.generate_alert(event)
-    assert alert["timestamp"] == custom_time
\ No newline at end of file
+    assert alert["timestamp"] == custom_time
+
+class _FullDisk:
+    def write(self, data):
+        raise OSError(28, "No space left on device")
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_guarded_file_handler_drops_records_while_breaker_is_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(logging, "raiseExceptions", False)
+    breaker = alerts.CircuitBreaker("test.alerts.file", failure_threshold=2, base_backoff=60.0)
+    handler = alerts.GuardedRotatingFileHandler(str(tmp_path / "alerts.log"), breaker=breaker)
+    handler.stream.close()
+    handler.stream = _FullDisk()
+    record = logging.LogRecord("HIDSAlert", logging.WARNING, __file__, 0, "alert", None, None)
+
+    for _ in range(5):
+        handler.emit(record)
+    assert breaker.status()["state"] == "open"
+    assert handler.dropped == 3
+    handler.close()
+
+
+def test_queued_writer_batches_alerts_off_the_caller_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(alerts, "_configured", False)
+    monkeypatch.setattr(alerts, "_logger", None)
+    monkeypatch.setattr(alerts, "_writer", None)
+    log_file = tmp_path / "alerts.log"
+    logger = alerts.setup_alert_system(str(log_file), queued=True, batch_size=50, flush_interval=0.05)
+    writer = alerts._writer
+    try:
+        for i in range(120):
+            alerts.send_alert(f"alert {i}", metadata={"i": i})
+        assert alerts.alert_writer_stats()["enqueued"] == 120
+        alerts.shutdown_alert_system()
+
+        lines = log_file.read_text().splitlines()
+        assert len(lines) == 120
+        assert "| SECURITY | WARNING | alert 119 |" in lines[-1] and '"i": 119' in lines[-1]
+        stats = writer.stats()
+        assert stats["written"] == 120 and stats["batches"] < 120
+        assert stats["enqueue_latency"]["count"] == 120
+    finally:
+        alerts.shutdown_alert_system()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+def test_queued_writer_drops_when_full(tmp_path):
+    handler = alerts.GuardedRotatingFileHandler(str(tmp_path / "alerts.log"))
+    writer = alerts.AlertWriter(handler, "HIDSAlert", maxsize=2)
+    entry = (0.0, logging.WARNING, "alert", "SECURITY", "WARNING", None, None)
+    assert [writer.submit(entry) for _ in range(3)] == [True, True, False]
+    assert writer.stats()["dropped_queue_full"] == 1
+    handler.close()
+
+
+def test_json_lines_formatter_emits_one_object_per_record():
+    formatter = alerts.JsonLinesAlertFormatter()
+    record = logging.LogRecord("HIDSAlert", logging.WARNING, __file__, 0, "Burst | from 10.0.0.1", None, None)
+    record.created = 1700000000.25
+    record.event_type = "SECURITY"
+    record.severity = "WARNING"
+    record.metadata = {"ip": "10.0.0.1", "seen": datetime(2024, 1, 1), 3: "non-str key"}
+
+    line = formatter.format(record)
+    assert "\n" not in line
+    entry = json.loads(line)
+    assert entry["timestamp"] == "2023-11-14T22:13:20.250Z"
+    assert entry["message"] == "Burst | from 10.0.0.1"
+    assert entry["metadata"]["ip"] == "10.0.0.1"
+    assert entry["metadata"]["seen"].startswith("2024-01-01")
+    assert entry["metadata"]["3"] == "non-str key"
+
+def test_gzip_rotation_compresses_backups_in_background(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    handler = alerts.GzipRotatingFileHandler(str(path), maxBytes=2000, backupCount=3)
+    handler.setFormatter(alerts.JsonLinesAlertFormatter())
+    for i in range(100):
+        record = logging.LogRecord("HIDSAlert", logging.WARNING, __file__, 0, f"alert {i:03d}", None, None)
+        handler.emit(record)
+    handler.close()
+
+    backups = sorted(p.name for p in tmp_path.iterdir() if p.name != "alerts.jsonl")
+    assert backups == ["alerts.jsonl.1.gz", "alerts.jsonl.2.gz", "alerts.jsonl.3.gz"]
+    newest_backup = gzip.decompress((tmp_path / "alerts.jsonl.1.gz").read_bytes()).decode().splitlines()
+    current = path.read_text().splitlines()
+    assert json.loads(newest_backup[-1])["message"] < json.loads(current[0])["message"]
+    assert json.loads(current[-1])["message"] == "alert 099"
+
+
+def test_trigger_alert_keeps_the_text_line_without_rule_consumers(tmp_path, monkeypatch):
+    monkeypatch.setattr(alerts, "_configured", False)
+    monkeypatch.setattr(alerts, "_logger", None)
+    monkeypatch.setattr(alerts, "_writer", None)
+    monkeypatch.setattr(alerts, "_alert_format", "text")
+    monkeypatch.setattr(alerts, "_listeners", [])
+    log_file = tmp_path / "alerts.log"
+    logger = alerts.setup_alert_system(str(log_file))
+    received = []
+    try:
+        alerts.trigger_alert("Burst attack detected from IP 10.0.0.1", "burst", "10.0.0.1")
+        alerts.add_alert_listener(received.append)
+        alerts.trigger_alert("Burst attack detected from IP 10.0.0.2", "burst", "10.0.0.2")
+    finally:
+        alerts.remove_alert_listener(received.append)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+    lines = log_file.read_text().splitlines()
+    assert lines[0].endswith("| SECURITY | WARNING | Burst attack detected from IP 10.0.0.1 | ")
+    assert received[0]["metadata"] == {"rule": "burst", "ip": "10.0.0.2"}
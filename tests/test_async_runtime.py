@@ -0,0 +1,169 @@
+import asyncio
+import os
+import threading
+from src import alerts
+from src.async_runtime import AsyncDetectionRuntime
+
+
+class BatchEngine:
+    def __init__(self):
+        self.batches = []
+
+    def process_failed_login(self, ip):
+        self.batches.append([ip])
+
+    def process_failed_logins(self, ips):
+        self.batches.append(list(ips))
+
+
+async def _wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+def test_tails_many_sources_into_batched_engine_calls(tmp_path):
+    paths = [tmp_path / f"auth{i}.log" for i in range(20)]
+    for path in paths:
+        path.write_text("old failed login from 10.9.9.9\n")
+    engine = BatchEngine()
+
+    async def scenario():
+        runtime = AsyncDetectionRuntime(engine, poll_interval=0.01)
+        for path in paths:
+            runtime.add_source(str(path))
+        await runtime.start()
+        await asyncio.sleep(0.05)
+        for i, path in enumerate(paths):
+            with open(path, "a") as f:
+                f.write(f"sshd: Failed password from 10.0.0.{i}\n")
+                f.write("sshd: session opened\n")
+                f.write(f"sshd: Failed password from 10.0.1.{i}")
+        await _wait_until(lambda: runtime.metrics.get_snapshot()["total_processed"] == 20)
+        status = runtime.health_status()
+        await runtime.stop()
+        return status
+
+    status = asyncio.run(scenario())
+    seen = sorted(ip for batch in engine.batches for ip in batch)
+    assert seen == sorted(f"10.0.0.{i}" for i in range(20))
+    assert len(engine.batches) < 20
+    assert status["sources"][str(paths[0])] == {"lines": 2, "events": 1, "rotations": 0, "active": True}
+    assert status["latency"]["queue_wait"]["count"] == 20
+
+def test_follows_rename_rotation_to_the_new_file(tmp_path):
+    path = tmp_path / "auth.log"
+    path.write_text("")
+    engine = BatchEngine()
+
+    async def scenario():
+        runtime = AsyncDetectionRuntime(engine, poll_interval=0.01)
+        runtime.add_source(str(path))
+        await runtime.start()
+        await asyncio.sleep(0.05)
+        with open(path, "a") as f:
+            f.write("sshd: Failed password from 10.0.0.1\n")
+            # logrotate: rename, then create a fresh file at the same path.
+            os.rename(path, tmp_path / "auth.log.1")
+            f.write("sshd: Failed password from 10.0.0.2\n")
+        path.write_text("sshd: Failed password from 10.0.0.3\n")
+        await _wait_until(lambda: runtime.metrics.get_snapshot()["total_processed"] == 3)
+        status = runtime.health_status()
+        await runtime.stop()
+        return status
+
+    status = asyncio.run(scenario())
+    assert [ip for batch in engine.batches for ip in batch] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert status["sources"][str(path)]["rotations"] == 1
+
+def test_reopen_after_error_does_not_replay_a_rotated_file(tmp_path, monkeypatch):
+    from src import async_runtime
+    path = tmp_path / "auth.log"
+    path.write_text("")
+    engine = BatchEngine()
+    monkeypatch.setattr(async_runtime, "DEDUP_TTL", 0)
+    real_fstat = os.fstat
+    fail = []
+
+    def fstat(fd):
+        if fail:
+            fail.pop()
+            raise OSError("transient")
+        return real_fstat(fd)
+
+    async def scenario():
+        runtime = AsyncDetectionRuntime(engine, poll_interval=0.01)
+        runtime.add_source(str(path))
+        await runtime.start()
+        await asyncio.sleep(0.05)
+        os.rename(path, tmp_path / "auth.log.1")
+        path.write_text("sshd: Failed password from 10.0.0.1\n")
+        await _wait_until(lambda: runtime.metrics.get_snapshot()["total_processed"] == 1)
+        monkeypatch.setattr(async_runtime.os, "fstat", fstat)
+        fail.append(True)
+        await _wait_until(lambda: not fail)
+        await asyncio.sleep(0.05)
+        with open(path, "a") as f:
+            f.write("sshd: Failed password from 10.0.0.2\n")
+        await _wait_until(lambda: runtime.metrics.get_snapshot()["total_processed"] == 2)
+        await asyncio.sleep(0.05)
+        await runtime.stop()
+
+    asyncio.run(scenario())
+    assert [ip for batch in engine.batches for ip in batch] == ["10.0.0.1", "10.0.0.2"]
+
+def test_submit_event_from_thread_and_bounded_queue():
+    engine = BatchEngine()
+
+    async def scenario():
+        runtime = AsyncDetectionRuntime(engine, queue_maxsize=2)
+        runtime._consume = lambda: asyncio.sleep(3600)
+        await runtime.start()
+        results = [runtime.submit_event(f"10.0.0.{i}") for i in range(3)]
+        threaded = []
+        t = threading.Thread(target=lambda: threaded.append(runtime.submit_event("10.0.0.9")))
+        t.start()
+        await asyncio.sleep(0.05)
+        runtime.event_queue.get_nowait()
+        runtime.event_queue.task_done()
+        await _wait_until(lambda: threaded)
+        t.join(1)
+        status = runtime.health_status()
+        await runtime.stop(timeout=0.1)
+        return results, threaded, status
+
+    results, threaded, status = asyncio.run(scenario())
+    assert results == [True, True, False]
+    assert threaded == [True]
+    assert status["dropped_events"] == {"queue_full": 1}
+    assert status["queue_size"] == 2
+
+def test_alerts_fan_out_to_async_sinks(monkeypatch):
+    monkeypatch.setattr(alerts, "_configured", True)
+    monkeypatch.setattr(alerts, "_logger", alerts.logging.getLogger("test_async_sinks"))
+    received = []
+
+    async def good_sink(batch):
+        received.extend(a["message"] for a in batch)
+
+    async def bad_sink(batch):
+        raise ConnectionError("down")
+
+    async def scenario():
+        runtime = AsyncDetectionRuntime(BatchEngine())
+        runtime.add_sink("good", good_sink)
+        runtime.add_sink("bad", bad_sink)
+        await runtime.start()
+        alerts.send_alert("in loop", severity="CRITICAL")
+        await asyncio.get_running_loop().run_in_executor(None, alerts.send_alert, "from thread")
+        await _wait_until(lambda: len(received) == 2)
+        await runtime.stop(timeout=0.5)
+        return runtime.health_status()
+
+    status = asyncio.run(scenario())
+    assert received == ["in loop", "from thread"]
+    assert status["sinks"]["good"]["sent"] == 2
+    assert status["sinks"]["bad"]["failures"] >= 1
+    assert alerts._listeners == []
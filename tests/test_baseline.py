@@ -86,4 +86,105 @@ def test_evaluate_anomaly_non_numeric():
     profile = {"mean": 10, "variance": 2}
     event = {"metric": "high"}
     with pytest.raises(TypeError):
-        baseline.evaluate_anomaly(event, profile)
\ No newline at end of file
+        baseline.evaluate_anomaly(event, profile)
+
+def test_p2_estimator_tracks_high_quantile():
+    estimator = baseline.P2QuantileEstimator(0.99)
+    for i in range(10000):
+        estimator.update(i % 1000)
+    assert estimator.count == 10000
+    assert estimator.value() == pytest.approx(990, abs=15)
+
+def test_p2_estimator_small_sample_is_exact():
+    estimator = baseline.P2QuantileEstimator(0.5)
+    for value in [5, 1, 3]:
+        estimator.update(value)
+    assert estimator.value() == 3
+
+def test_p2_estimator_invalid_quantile():
+    with pytest.raises(ValueError):
+        baseline.P2QuantileEstimator(1.5)
+
+def test_quantile_threshold_per_ip():
+    ip = "198.51.100.77"
+    assert baseline.get_quantile_threshold(ip) == baseline.DEFAULT_THRESHOLD
+    for i in range(200):
+        baseline.update_baseline(i % 20, ip=ip)
+    threshold = baseline.get_quantile_threshold(ip)
+    assert 18 <= threshold <= 20 + baseline.QUANTILE_MARGIN
+    assert baseline.get_quantile_threshold("198.51.100.78") == baseline.DEFAULT_THRESHOLD
+
+def test_build_baseline_stream_matches_build_baseline():
+    events = [{"metric": v} for v in (10, 12, 11, 13, 40)]
+    expected = baseline.build_baseline(events)
+    profile = baseline.build_baseline_stream(e["metric"] for e in events)
+    assert profile["mean"] == pytest.approx(expected["mean"])
+    assert profile["variance"] == pytest.approx(expected["variance"])
+
+def test_build_baseline_stream_empty_iterable():
+    with pytest.raises(ValueError, match="empty event list"):
+        baseline.build_baseline_stream(iter([]))
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(baseline, "np", None)
+    return request.param
+
+def test_evaluate_anomalies_mask_matches_single_event(backend):
+    profile = {"mean": 10, "variance": 2}
+    values = [9, 10, 25, -5, 14]
+    mask = baseline.evaluate_anomalies(values, profile)
+    expected = [baseline.evaluate_anomaly({"metric": v}, profile) for v in values]
+    assert len(mask) == len(expected) and [bool(m) for m in mask] == expected
+
+def test_evaluate_anomalies_zero_variance_and_generators(backend):
+    assert list(baseline.evaluate_anomalies([10, 11], {"mean": 10, "variance": 0})) == [False, True]
+    assert baseline.evaluate_anomalies(iter([10, 11]), {"mean": 10, "variance": 0}) == [False, True]
+    assert baseline.build_baseline_stream([1, 3])["mean"] == 2
+
+@pytest.mark.parametrize("bad, error", [(None, TypeError), ("high", TypeError), (float("nan"), ValueError), (float("inf"), ValueError)])
+def test_non_finite_and_non_numeric_values_are_rejected_on_both_backends(backend, bad, error):
+    with pytest.raises(error):
+        baseline.evaluate_anomalies([10, bad], {"mean": 10, "variance": 2})
+    with pytest.raises(error):
+        baseline.build_baseline_stream([10, bad])
+
+def test_evaluate_anomalies_numpy_array():
+    np = pytest.importorskip("numpy")
+    mask = baseline.evaluate_anomalies(np.array([10.0, 30.0]), {"mean": 10, "variance": 2})
+    assert isinstance(mask, np.ndarray) and mask.tolist() == [False, True]
+    with pytest.raises(ValueError):
+        baseline.build_baseline_stream(np.array([1.0, np.nan]))
+
+def test_evaluate_anomalies_invalid_profile():
+    with pytest.raises(KeyError):
+        baseline.evaluate_anomalies([1, 2], {})
+
+def test_seasonal_profile_ewma_bucket():
+    profile = baseline.SeasonalProfile(alpha=0.1)
+    assert profile.threshold(5) is None
+    for _ in range(20):
+        profile.update(5, 4)
+    assert profile.means[5] == pytest.approx(4)
+    assert profile.threshold(5) == pytest.approx(4)
+    assert profile.threshold(6) is None
+
+def test_hour_of_week_range():
+    bucket = baseline.hour_of_week(0)
+    assert 0 <= bucket < baseline.HOURS_PER_WEEK
+
+def test_get_baseline_threshold_uses_current_ip_bucket(monkeypatch):
+    monkeypatch.setattr(baseline, "BASELINE_THRESHOLD_SOURCE", "seasonal")
+    monkeypatch.setattr(baseline, "SEASONAL_KEY_MODE", "ip")
+    ip = "203.0.113.9"
+    now = 1_700_000_000.0
+    for _ in range(baseline.MIN_SAMPLES_FOR_STATS):
+        baseline.update_baseline(3, ip=ip, now=now)
+    assert baseline.get_baseline_threshold(ip, now=now) == pytest.approx(3)
+
+def test_baseline_threshold_defaults_to_sigma_source():
+    assert baseline.BASELINE_THRESHOLD_SOURCE == "sigma"
+    assert baseline.get_baseline_threshold() == baseline._guarded_sigma_threshold()
@@ -0,0 +1,21 @@
+from src.checkpoint import read_checkpoint, write_checkpoint
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    path = str(tmp_path / "state" / "runtime.ckpt")
+    payload = {"engine": {"ip_state": {"10.0.0.1": {"attempts": [1.0, 2.0], "score": 4}}}, "pending": ["10.0.0.2"]}
+    assert write_checkpoint(path, payload) > 0
+    assert read_checkpoint(path) == payload
+
+def test_missing_or_corrupt_checkpoint_is_ignored(tmp_path):
+    path = tmp_path / "runtime.ckpt"
+    assert read_checkpoint(str(path)) is None
+
+    write_checkpoint(str(path), {"pending": ["10.0.0.1"]})
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert read_checkpoint(str(path)) is None
+
+    path.write_bytes(b"HIDS")
+    assert read_checkpoint(str(path)) is None
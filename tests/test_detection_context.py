@@ -0,0 +1,238 @@
+import os
+
+import pytest
+from src import detection_context
+from src.checkpoint import write_checkpoint
+from src.detector import DetectionEngine
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_path(monkeypatch, tmp_path):
+    path = str(tmp_path / "runtime.ckpt")
+    monkeypatch.setattr(detection_context, "CHECKPOINT_PATH", path)
+    return path
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    monkeypatch.setattr(detection_context, "QUEUE_MAXSIZE", 4)
+    monkeypatch.setattr(detection_context, "BACKPRESSURE_THRESHOLD", 3)
+    monkeypatch.setattr(detection_context, "BACKPRESSURE_LOW_WATERMARK", 1)
+    rt = detection_context.DetectionRuntime(DetectionEngine(), num_workers=1)
+    yield rt
+    rt.stop(timeout=0.1)
+
+
+def test_submit_drop_action_counts_drops(runtime, monkeypatch):
+    monkeypatch.setattr(detection_context, "BACKPRESSURE_ACTION", "drop")
+    results = [runtime.submit_event(f"10.0.0.{i}") for i in range(6)]
+    assert results == [True] * 4 + [False] * 2
+    status = runtime.health_status()
+    assert status["dropped_events"] == {"queue_full": 2}
+    assert status["backpressure_active"] is True
+    assert status["queue_capacity"] == 4
+
+def test_submit_delay_action_times_out(runtime, monkeypatch):
+    monkeypatch.setattr(detection_context, "BACKPRESSURE_ACTION", "delay")
+    monkeypatch.setattr(detection_context, "BACKPRESSURE_DELAY_TIMEOUT", 0.01)
+    for i in range(4):
+        assert runtime.submit_event(f"10.0.0.{i}") is True
+    assert runtime.submit_event("10.0.0.9") is False
+    assert runtime.health_status()["dropped_events"] == {"delay_timeout": 1}
+
+def test_runtime_processes_submitted_events(runtime):
+    runtime.start()
+    assert runtime.submit_event("192.0.2.1") is True
+    runtime.event_queue.join()
+    status = runtime.health_status()
+    assert status["metrics"]["total_processed"] == 1
+    assert status["latency"]["queue_wait"]["count"] == 1
+    assert status["latency"]["batch"]["count"] == 1
+    assert status["per_worker"]["DetectionWorker-0"]["total_processed"] == 1
+
+def test_lane_selection_by_denylist_and_engine_score():
+    engine = DetectionEngine()
+    engine.ip_state["203.0.113.5"] = {"score": engine.RISK_THRESHOLD, "attempts": []}
+    rt = detection_context.DetectionRuntime(
+        engine, num_workers=1, ingress_mode="lanes", denylist={"198.51.100.1"}
+    )
+    for ip in ["10.0.0.1", "198.51.100.1", "203.0.113.5", "10.0.0.2"]:
+        assert rt.submit_event(ip) is True
+    lanes = rt.health_status()["lanes"]
+    assert lanes["priority"]["depth"] == 2
+    assert lanes["default"]["depth"] == 2
+    assert rt.event_queue.get_nowait() in {"198.51.100.1", "203.0.113.5"}
+    rt.stop(timeout=0.1)
+
+def test_autoscale_is_off_by_default_for_unlocked_engine():
+    rt = detection_context.DetectionRuntime(DetectionEngine(), num_workers=2)
+    autoscale = rt.health_status()["autoscale"]
+    assert autoscale["enabled"] is False
+    assert autoscale["min_workers"] == autoscale["max_workers"] == autoscale["target_workers"] == 2
+
+def test_autoscale_grows_under_pressure_and_shrinks_when_idle(runtime, monkeypatch):
+    monkeypatch.setattr(detection_context, "SCALE_UP_CHECKS", 2)
+    monkeypatch.setattr(detection_context, "SCALE_DOWN_CHECKS", 2)
+    monkeypatch.setattr(detection_context, "SCALE_COOLDOWN", 10.0)
+    runtime.min_workers, runtime.max_workers = 1, 3
+    # An idle placeholder keeps the queue full until the pool grows.
+    placeholder = detection_context.threading.Thread(target=lambda: None)
+    placeholder.start()
+    runtime._worker_threads[0] = placeholder
+    runtime._worker_stop_events[0] = detection_context.threading.Event()
+    for i in range(3):
+        runtime.event_queue.put(f"10.0.0.{i}", block=False)
+
+    assert runtime._autoscale_check(100.0) is None
+    decision = runtime._autoscale_check(101.0)
+    assert decision["direction"] == "up"
+    assert (decision["from"], decision["to"]) == (1, 2)
+    assert decision["queue_pressure"] >= 1.0
+    assert sorted(runtime._worker_threads) == [0, 1]
+
+    runtime.event_queue.join()
+    runtime._autoscale_check(102.0)
+    # Idle long enough, but still inside the cooldown of the previous change.
+    assert runtime._autoscale_check(103.0) is None
+    decision = runtime._autoscale_check(112.0)
+    assert decision["direction"] == "down"
+    assert runtime.health_status()["autoscale"]["target_workers"] == 1
+    assert list(runtime._worker_threads) == [0]
+
+def test_heartbeat_restart_does_not_deadlock(runtime):
+    runtime._start_single_worker(0)
+    with runtime._heartbeat_lock:
+        runtime._heartbeat_dict[0] = 0.0
+    checker = detection_context.threading.Thread(
+        target=runtime._check_heartbeats, args=(detection_context.HEARTBEAT_INTERVAL * 10,)
+    )
+    checker.start()
+    checker.join(2)
+    assert not checker.is_alive()
+    assert runtime._worker_restart_counts == {0: 1}
+    assert list(runtime._worker_threads) == [0]
+
+def test_spill_mode_overflows_to_disk(monkeypatch, tmp_path):
+    monkeypatch.setattr(detection_context, "QUEUE_MAXSIZE", 4)
+    spill_dir = tmp_path / "spill"
+    monkeypatch.setattr(detection_context, "SPILL_DIR", str(spill_dir))
+    monkeypatch.setattr(detection_context, "BACKPRESSURE_ACTION", "drop")
+    rt = detection_context.DetectionRuntime(DetectionEngine(), num_workers=1, ingress_mode="spill")
+    for i in range(50):
+        assert rt.submit_event(f"10.0.0.{i}") is True
+    status = rt.health_status()
+    assert status["spill"]["memory"] == 4
+    assert status["spill"]["spilled"] == 46
+    assert status["dropped_events"] == {}
+    rt.start()
+    rt.event_queue.join()
+    assert rt.health_status()["metrics"]["total_processed"] == 50
+    rt.stop(timeout=0.1)
+    assert list(spill_dir.iterdir()) == []
+
+def test_stop_drains_queue_before_shutdown(runtime):
+    runtime.start()
+    for i in range(3):
+        assert runtime.submit_event(f"10.0.0.{i}") is True
+    runtime.stop(timeout=1.0, deadline=2.0)
+    assert runtime.health_status()["metrics"]["total_processed"] == 3
+    assert runtime.shutdown_stats["undrained_events"] == 0
+    assert runtime.submit_event("10.0.0.9") is False
+
+def test_checkpoint_restores_engine_state_and_pending_events(checkpoint_path, monkeypatch):
+    monkeypatch.setattr("src.detector.trigger_alert", lambda message, *rule_source: None)
+    engine = DetectionEngine(clock=lambda: 1000.0)
+    engine.process_failed_logins(["203.0.113.7"] * 4)
+    rt = detection_context.DetectionRuntime(engine, num_workers=1, ingress_mode="coalescing")
+    for ip in ["10.0.0.1", "10.0.0.2", "10.0.0.1"]:
+        assert rt.submit_event(ip) is True
+    rt.stop(timeout=0.1)
+    assert rt.shutdown_stats["checkpoint_events"] == 2
+
+    restored_engine = DetectionEngine(clock=lambda: 1001.0)
+    restarted = detection_context.DetectionRuntime(restored_engine, num_workers=1, ingress_mode="coalescing")
+    restarted.start()
+    restarted.event_queue.join()
+    startup = restarted.health_status()["startup"]
+    assert startup["checkpoint_loaded"] is True
+    assert startup["restored_events"] == 2
+    assert startup["restored_ips"] == 1
+    assert startup["ready_seconds"] >= startup["load_seconds"]
+    assert restored_engine.ip_state["203.0.113.7"]["attempts"] == [1000.0] * 4
+    assert restored_engine._baseline_sums["203.0.113.7"] == engine._baseline_sums["203.0.113.7"]
+    assert len(restored_engine.ip_state["10.0.0.1"]["attempts"]) == 2
+    assert restarted.health_status()["metrics"]["total_processed"] == 3
+    restarted.stop(timeout=0.1, drain=False)
+
+def test_failed_checkpoint_restore_starts_empty_and_keeps_checkpoint(checkpoint_path):
+    write_checkpoint(checkpoint_path, {"engine": {"ip_state": {"10.0.0.1": {}}, "baseline_history": 5}, "pending": ["10.0.0.2"]})
+    engine = DetectionEngine()
+    rt = detection_context.DetectionRuntime(engine, num_workers=1)
+    rt.start()
+    startup = rt.health_status()["startup"]
+    assert not os.path.exists(checkpoint_path) and os.path.exists(checkpoint_path + ".failed")
+    rt.stop(timeout=0.1, drain=False)
+
+    assert startup["checkpoint_loaded"] is False and "checkpoint_error" in startup
+    assert startup["restored_events"] == 0
+    assert engine.ip_state == {}
+
+def test_coalescing_ingress_requires_coalesced_engine_api():
+    class SingleOnly:
+        def process_failed_login(self, ip):
+            pass
+
+    with pytest.raises(ValueError):
+        detection_context.DetectionRuntime(SingleOnly(), num_workers=1, ingress_mode="coalescing")
+
+def test_coalesced_checkpoint_restores_into_spill_mode(monkeypatch, tmp_path, checkpoint_path):
+    monkeypatch.setattr(detection_context, "SPILL_DIR", str(tmp_path / "spill"))
+    write_checkpoint(checkpoint_path, {
+        "ingress_mode": "coalescing",
+        "pending": [("10.0.0.1", [1.0, 2.0], 3), "10.0.0.2"],
+    })
+    rt = detection_context.DetectionRuntime(DetectionEngine(), num_workers=1, ingress_mode="spill")
+    rt._restore_checkpoint()
+    order = [rt.event_queue.get_nowait() for _ in range(rt.event_queue.qsize())]
+    rt.event_queue.close()
+
+    assert order == ["10.0.0.1"] * 3 + ["10.0.0.2"]
+    assert rt.startup_stats["restored_events"] == 4
+    assert not os.path.exists(checkpoint_path)
+
+def test_checkpoint_that_cannot_be_enqueued_is_set_aside(monkeypatch, tmp_path, checkpoint_path):
+    monkeypatch.setattr(detection_context, "SPILL_DIR", str(tmp_path / "spill"))
+    write_checkpoint(checkpoint_path, {"pending": [42]})
+    rt = detection_context.DetectionRuntime(DetectionEngine(), num_workers=1, ingress_mode="spill")
+    rt._restore_checkpoint()
+    rt.event_queue.close()
+
+    assert "checkpoint_error" in rt.startup_stats
+    assert os.path.exists(checkpoint_path + ".failed")
+
+def test_spill_restart_restores_checkpointed_events_before_spilled_ones(monkeypatch, tmp_path):
+    monkeypatch.setattr(detection_context, "QUEUE_MAXSIZE", 3)
+    monkeypatch.setattr(detection_context, "SPILL_SEGMENT_RECORDS", 4)
+    monkeypatch.setattr(detection_context, "SPILL_DIR", str(tmp_path / "spill"))
+    events = [f"e{i}" for i in range(10)]
+    rt = detection_context.DetectionRuntime(DetectionEngine(), num_workers=1, ingress_mode="spill")
+    for event in events:
+        assert rt.submit_event(event) is True
+    assert rt.event_queue.get() == "e0"
+    rt.event_queue.task_done()
+    rt.stop(timeout=0.1, drain=False)
+
+    restarted = detection_context.DetectionRuntime(DetectionEngine(), num_workers=1, ingress_mode="spill")
+    restarted._restore_checkpoint()
+    order = [restarted.event_queue.get_nowait() for _ in range(restarted.event_queue.qsize())]
+    assert order == events[1:]
+    restarted.event_queue.close()
+
+def test_runtime_baseline_feeds_per_ip_seasonal_profiles(runtime, monkeypatch):
+    from src import baseline
+    monkeypatch.setattr(baseline, "SEASONAL_KEY_MODE", "ip")
+    ip = "198.51.100.77"
+    for _ in range(baseline.MIN_SAMPLES_FOR_STATS):
+        runtime.update_baseline(4, ip)
+    assert ip in baseline._keyed_seasonal
+    assert runtime.get_threshold(ip) == baseline.get_baseline_threshold(ip)
@@ -69,4 +69,115 @@ def test_analyze_event_consistency_multiple_calls():
 def test_analyze_event_handles_large_score():
     event = {"process": "test", "activity_score": 1_000_000}
     result = detector.analyze_event(event)
-    assert result["detected"] is True
\ No newline at end of file
+    assert result["detected"] is True
+
+def test_analyze_events_batch_mask_and_indices():
+    processes = ["sshd", "miner", "bash", "nc"]
+    scores = [10, 95, 89.9, 90]
+    result = detector.analyze_events_batch(processes, scores)
+    assert result.mask == [False, True, False, True]
+    assert result.indices == [1, 3]
+    assert result.detected == ["miner", "nc"]
+
+@pytest.mark.parametrize("backend", ["numpy", "python"])
+def test_analyze_events_batch_returns_lists_on_both_backends(monkeypatch, backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(detector, "np", None)
+    result = detector.analyze_events_batch(["sshd", "miner"], [10, 95])
+    assert result == ([False, True], [1], ["miner"])
+    assert all(type(field) is list for field in result)
+    assert type(result.mask[1]) is bool and type(result.indices[0]) is int
+
+def test_analyze_events_batch_matches_single_event():
+    processes = ["p%d" % i for i in range(50)]
+    scores = [i * 3 for i in range(50)]
+    mask, _, _ = detector.analyze_events_batch(processes, scores)
+    expected = [
+        detector.analyze_event({"process": p, "activity_score": s})["detected"]
+        for p, s in zip(processes, scores)
+    ]
+    assert [bool(hit) for hit in mask] == expected
+
+def test_analyze_events_batch_length_mismatch():
+    with pytest.raises(ValueError):
+        detector.analyze_events_batch(["a", "b"], [1])
+
+def test_analyze_events_batch_invalid_score(monkeypatch):
+    monkeypatch.setattr(detector, "np", None)
+    with pytest.raises(TypeError):
+        detector.analyze_events_batch(["a"], ["high"])
+
+def test_process_failed_logins_matches_single_event_path(monkeypatch):
+    alerts = {"single": [], "batch": []}
+    ips = ["10.0.0.1", "10.0.0.2", "10.0.0.1"] * 8
+
+    for mode in ("single", "batch"):
+        monkeypatch.setattr(detector, "trigger_alert", lambda message, *rule_source: alerts[mode].append(message))
+        ticks = iter(range(1000))
+        engine = detector.DetectionEngine(clock=lambda: 1000 + next(ticks) / 4)
+        if mode == "single":
+            for ip in ips:
+                engine.process_failed_login(ip)
+        else:
+            engine.process_failed_logins(ips)
+
+    assert alerts["batch"]
+    assert [a.split(" (")[0] for a in alerts["batch"]] == [a.split(" (")[0] for a in alerts["single"]]
+
+def test_coalesced_record_matches_sequential_alerts_with_far_fewer_engine_calls(monkeypatch):
+    from src.event_queue import CoalescedEvent
+
+    timestamps = [1000 + i * 0.5 for i in range(30)]
+    alerts = {"sequential": [], "coalesced": []}
+    calls = {"record": 0, "baseline": 0}
+    record, update_baseline = detector.DetectionEngine._record_failed_login, detector.DetectionEngine._update_baseline
+
+    def counted_record(self, *args):
+        calls["record"] += 1
+        return record(self, *args)
+
+    def counted_baseline(self, *args):
+        calls["baseline"] += 1
+        return update_baseline(self, *args)
+
+    monkeypatch.setattr(detector.DetectionEngine, "_record_failed_login", counted_record)
+    monkeypatch.setattr(detector.DetectionEngine, "_update_baseline", counted_baseline)
+
+    monkeypatch.setattr(detector, "trigger_alert", lambda message, *rule_source: alerts["sequential"].append(message))
+    clock = {"now": 0.0}
+    engine = detector.DetectionEngine(clock=lambda: clock["now"])
+    for ts in timestamps:
+        clock["now"] = ts
+        engine.process_failed_login("10.9.9.9")
+    sequential_state = dict(engine.ip_state["10.9.9.9"])
+    sequential_calls, calls = calls, {"record": 0, "baseline": 0}
+
+    monkeypatch.setattr(detector, "trigger_alert", lambda message, *rule_source: alerts["coalesced"].append(message))
+    engine = detector.DetectionEngine(clock=lambda: timestamps[-1])
+    engine.process_coalesced_events([CoalescedEvent("10.9.9.9", timestamps)])
+
+    kinds = {mode: sorted(a.split(" (")[0] for a in messages) for mode, messages in alerts.items()}
+    assert kinds["coalesced"] == kinds["sequential"]
+    assert sorted(a for a in alerts["coalesced"] if not a.startswith("Behavioural")) == sorted(
+        a for a in alerts["sequential"] if not a.startswith("Behavioural")
+    )
+    assert engine.ip_state["10.9.9.9"]["score"] == sequential_state["score"]
+    assert engine.ip_state["10.9.9.9"]["attempts"] == sequential_state["attempts"]
+    assert sequential_calls == {"record": 30, "baseline": 30}
+    assert calls == {"record": 0, "baseline": 1}
+
+def test_coalesced_attempts_past_the_timestamp_cap_score_without_fake_times():
+    from src.event_queue import CoalescedEvent
+
+    engine = detector.DetectionEngine(clock=lambda: 1010.0)
+    event = CoalescedEvent("10.9.9.8", [990.0, 992.0, 994.0, 1000.0, 1010.0], max_timestamps=2)
+    event.count = 5  # what the coalescer counts once the deque has dropped the oldest three
+    engine.process_coalesced_events([event])
+
+    state = engine.ip_state["10.9.9.8"]
+    assert state["attempts"] == [1000.0, 1010.0]
+    # Three untimed attempts (2 + 2 repeats of 5) = 12, the first kept one as a repeat = 17,
+    # then 10s of decay (-5) and a non-rapid repeat (+5) = 17.
+    assert state["score"] == 17
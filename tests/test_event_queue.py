@@ -0,0 +1,236 @@
+import os
+import queue
+import threading
+import time
+import pytest
+from src.event_queue import (
+    BoundedEventQueue, CoalescingEventQueue, CoalescedEvent, MultiLaneEventQueue, SpillingEventQueue,
+    event_count
+)
+
+
+def test_try_put_drops_when_full():
+    q = BoundedEventQueue(2)
+    assert q.try_put("a") is True
+    assert q.try_put("b") is True
+    assert q.try_put("c") is False
+    assert q.get_drop_counts() == {"queue_full": 1}
+    assert q.qsize() == 2
+
+def test_offer_times_out_and_counts_reason():
+    q = BoundedEventQueue(1)
+    q.put("a")
+    start = time.monotonic()
+    assert q.offer("b", timeout=0.05, reason="delay_timeout") is False
+    assert time.monotonic() - start >= 0.05
+    assert q.get_drop_counts() == {"delay_timeout": 1}
+
+def test_blocking_put_resumes_when_consumer_drains():
+    q = BoundedEventQueue(1)
+    q.put("a")
+    threading.Timer(0.05, q.get).start()
+    q.put("b", timeout=2)
+    assert q.get_nowait() == "b"
+
+def test_watermark_callbacks_fire_once_per_crossing():
+    events = []
+    q = BoundedEventQueue(
+        10, high_watermark=4, low_watermark=1,
+        on_high=lambda size: events.append(("high", size)),
+        on_low=lambda size: events.append(("low", size))
+    )
+    for i in range(6):
+        q.put(i)
+    assert events == [("high", 4)]
+    assert q.above_high_watermark is True
+    for _ in range(5):
+        q.get()
+    assert events == [("high", 4), ("low", 1)]
+    assert q.above_high_watermark is False
+
+def test_get_batch_and_task_done_many():
+    q = BoundedEventQueue(10)
+    for i in range(5):
+        q.put(i)
+    assert q.get_batch(3, timeout=0.1) == [0, 1, 2]
+    assert q.get_batch(10, timeout=0.1) == [3, 4]
+    q.task_done_many(5)
+    q.join()
+    with pytest.raises(queue.Empty):
+        q.get_batch(10, timeout=0.01)
+    with pytest.raises(ValueError):
+        q.task_done_many(1)
+
+def test_invalid_watermarks():
+    with pytest.raises(ValueError):
+        BoundedEventQueue(10, high_watermark=5, low_watermark=5)
+    with pytest.raises(ValueError):
+        BoundedEventQueue(0)
+
+
+def test_coalescing_queue_merges_pending_ips():
+    ticks = iter(range(100))
+    q = CoalescingEventQueue(2, clock=lambda: float(next(ticks)))
+    for ip in ["10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.0.1"]:
+        assert q.try_put(ip) is True
+    assert q.qsize() == 2
+    assert q.try_put("10.0.0.3") is False
+
+    first, second = q.get_batch(10, timeout=0.1)
+    assert (first.ip, first.count, list(first.timestamps)) == ("10.0.0.1", 3, [0.0, 2.0, 3.0])
+    assert (second.ip, second.count) == ("10.0.0.2", 1)
+    q.task_done_many(event_count(first) + event_count(second))
+    q.join()
+
+def test_coalescing_queue_starts_new_record_after_dequeue():
+    q = CoalescingEventQueue(10)
+    q.put("10.0.0.1")
+    q.get()
+    q.put("10.0.0.1")
+    assert q.get().count == 1
+
+def test_coalescing_queue_caps_timestamps_but_keeps_count():
+    q = CoalescingEventQueue(10, max_timestamps=2)
+    for _ in range(5):
+        q.put("10.0.0.1")
+    record = q.get()
+    assert record.count == 5
+    assert len(record.timestamps) == 2
+
+def test_coalescing_queue_accepts_coalesced_records():
+    q = CoalescingEventQueue(10)
+    q.put(CoalescedEvent("10.0.0.1", [1.0, 2.0]))
+    q.put(CoalescedEvent("10.0.0.1", [3.0]))
+    record = q.get()
+    assert record.count == 3
+    q.task_done_many(3)
+    q.join()
+
+
+def test_multilane_weighted_fair_drain():
+    q = MultiLaneEventQueue(
+        100, lanes=(("priority", 3), ("default", 1)),
+        lane_selector=lambda ip: "priority" if ip.startswith("bad") else "default"
+    )
+    for i in range(8):
+        q.put(f"scan{i}")
+    for i in range(3):
+        q.put(f"bad{i}")
+    order = [q.get() for _ in range(11)]
+    assert order[:4].count("scan0") == 1
+    assert sorted(order[:4]) == ["bad0", "bad1", "bad2", "scan0"]
+    assert order[4:] == [f"scan{i}" for i in range(1, 8)]
+
+def test_multilane_unknown_lane_falls_back_to_default():
+    q = MultiLaneEventQueue(10, lanes=(("priority", 2), ("default", 1)), lane_selector=lambda ip: "nope")
+    q.put("x")
+    stats = q.lane_stats()
+    assert stats["default"]["depth"] == 1
+    assert stats["priority"]["depth"] == 0
+    q.get()
+    assert q.lane_stats()["default"]["dequeued"] == 1
+
+def test_multilane_respects_capacity_and_watermarks():
+    highs = []
+    q = MultiLaneEventQueue(3, high_watermark=2, low_watermark=0, on_high=highs.append)
+    assert q.try_put("a") and q.try_put("b") and q.try_put("c")
+    assert q.try_put("d") is False
+    assert highs == [2]
+    assert q.get_batch(5, timeout=0.1) == ["a", "b", "c"]
+
+
+def test_spilling_queue_keeps_order_and_bounds_memory(tmp_path):
+    waits = []
+    q = SpillingEventQueue(1000, str(tmp_path), memory_items=5, segment_records=4, on_dequeue=waits.append)
+    items = [f"10.0.0.{i}" for i in range(30)]
+    for item in items:
+        assert q.try_put(item)
+    stats = q.spill_stats()
+    assert stats["memory"] == 5
+    assert stats["spilled"] == 25
+    assert stats["segments"] == 7
+    assert q.qsize() == 30
+
+    out = []
+    while q.qsize():
+        out.extend(q.get_batch(3))
+        assert q.spill_stats()["memory"] <= 5
+    assert out == items
+    assert len(waits) == 30
+    assert list(tmp_path.iterdir()) == []
+    q.task_done_many(30)
+    q.join()
+
+def test_spilling_queue_interleaves_puts_with_drain(tmp_path):
+    q = SpillingEventQueue(1000, str(tmp_path), memory_items=3, segment_records=2)
+    out = []
+    for i in range(20):
+        q.put(str(i))
+        if i % 3 == 0:
+            out.append(q.get())
+    while q.qsize():
+        out.append(q.get())
+    assert out == [str(i) for i in range(20)]
+    q.put("again")
+    assert q.spill_stats()["spilled"] == 0
+
+def test_spilling_queue_readopts_unread_segments(tmp_path):
+    q = SpillingEventQueue(1000, str(tmp_path), memory_items=2, segment_records=3)
+    for i in range(10):
+        q.put(str(i))
+    assert [q.get() for _ in range(4)] == ["0", "1", "2", "3"]
+    q.close()
+
+    segments = sorted(tmp_path.iterdir())
+    with open(segments[-1], "ab") as f:
+        f.write(b"\x00\x01")
+
+    restored = SpillingEventQueue(1000, str(tmp_path), memory_items=2, segment_records=3)
+    assert restored.qsize() == 6
+    assert [restored.get() for _ in range(6)] == ["4", "5", "6", "7", "8", "9"]
+    restored.task_done_many(6)
+    restored.join()
+
+def test_spilling_queue_syncs_spilled_tail_within_interval(tmp_path):
+    q = SpillingEventQueue(1000, str(tmp_path), memory_items=2, sync_interval=0.01)
+    for i in range(12):
+        q.put(f"10.0.0.{i}")
+    expected = q.spill_stats()["spilled_bytes"]
+    deadline = time.monotonic() + 2
+    while (
+        sum(p.stat().st_size for p in tmp_path.iterdir()) < expected or not q.spill_stats()["syncs"]
+    ) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) == expected
+    assert q.spill_stats()["syncs"] >= 1
+    q.close()
+
+def test_spilling_queue_fsyncs_outside_the_queue_lock(tmp_path, monkeypatch):
+    from src import event_queue
+    q = SpillingEventQueue(1000, str(tmp_path), memory_items=2, segment_records=3, sync_interval=0.01)
+    held = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        held.append(q.mutex.locked())
+        real_fsync(fd)
+
+    monkeypatch.setattr(event_queue.os, "fsync", fsync)
+    for i in range(12):
+        q.put(f"10.0.0.{i}")
+    q.close()
+    assert held and not any(held)
+    assert q.spill_stats()["syncs"] >= 3
+
+def test_spilling_queue_round_trips_payloads_over_64k(tmp_path):
+    q = SpillingEventQueue(10, str(tmp_path), memory_items=1)
+    big = "x" * 70_000
+    for item in ("first", big, "last"):
+        q.put(item)
+    assert [q.get() for _ in range(3)] == ["first", big, "last"]
+
+def test_spilling_queue_rejects_non_str(tmp_path):
+    q = SpillingEventQueue(10, str(tmp_path), memory_items=1)
+    with pytest.raises(TypeError):
+        q.put(42)
+    assert q.qsize() == 0
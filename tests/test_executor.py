@@ -0,0 +1,212 @@
+import functools
+import logging
+import time
+import pytest
+from src import executor
+from src.executor import CircuitBreaker, PipelineExecutor, pipeline_step
+
+
+@pytest.fixture(autouse=True)
+def reset_failure_stats():
+    PipelineExecutor.reset_failure_stats()
+    yield
+    PipelineExecutor.reset_failure_stats()
+
+
+def test_wrap_returns_default_and_logs_failure(caplog):
+    def boom(x):
+        raise ValueError(f"bad {x}")
+
+    guarded = PipelineExecutor.wrap(boom, default="fallback")
+    with caplog.at_level(logging.ERROR, logger="src.executor"):
+        assert guarded(1) == "fallback"
+    record = caplog.records[-1]
+    assert record.function_name == f"{__name__}.test_wrap_returns_default_and_logs_failure.<locals>.boom"
+    assert record.error_type == "ValueError"
+    assert guarded.__name__ == "boom"
+
+def test_wrap_reraises_fatal_and_rejects_non_callable():
+    def stop():
+        raise KeyError("fatal")
+
+    with pytest.raises(KeyError):
+        PipelineExecutor.wrap(stop, fatal_exceptions=(KeyError,))()
+    with pytest.raises(TypeError):
+        PipelineExecutor.wrap(42)
+
+def test_pipeline_step_decorates_methods():
+    class Sink:
+        def __init__(self):
+            self.items = []
+
+        @pipeline_step(default=False)
+        def add(self, item, strict=False):
+            if strict and item is None:
+                raise ValueError("none")
+            self.items.append(item)
+            return True
+
+    sink = Sink()
+    assert sink.add(1) is True
+    assert sink.add(None, strict=True) is False
+    assert sink.items == [1]
+
+def test_positional_wrap_passes_positional_args_only():
+    guarded = PipelineExecutor.wrap(lambda a, b: a + b, default=-1, positional=True)
+    assert guarded(1, 2) == 3
+    assert guarded(1) == -1
+    with pytest.raises(TypeError):
+        guarded(1, b=2)
+
+
+def test_repeated_failures_are_rate_limited_and_summarised(caplog):
+    def locked():
+        raise OSError("database is locked")
+
+    guarded = PipelineExecutor.wrap(locked)
+    with caplog.at_level(logging.ERROR, logger="src.executor"):
+        for _ in range(executor.FAILURE_LOG_BURST + 20):
+            guarded()
+    full = [r for r in caplog.records if r.exc_info]
+    assert len(full) == executor.FAILURE_LOG_BURST
+    assert PipelineExecutor.failure_counts() == {
+        executor._step_name(locked): {"OSError": executor.FAILURE_LOG_BURST + 20}
+    }
+
+    caplog.clear()
+    with caplog.at_level(logging.ERROR, logger="src.executor"):
+        PipelineExecutor.flush_failure_summaries(time.monotonic() + executor.FAILURE_SUMMARY_INTERVAL)
+    assert [r.suppressed for r in caplog.records] == [20]
+    assert "database is locked" in caplog.records[0].getMessage()
+
+def test_summary_is_emitted_by_next_failure_after_interval(caplog, monkeypatch):
+    monkeypatch.setattr(executor, "FAILURE_LOG_BURST", 1)
+    monkeypatch.setattr(executor, "FAILURE_SUMMARY_INTERVAL", 0.05)
+    guarded = PipelineExecutor.wrap(lambda: 1 / 0)
+
+    with caplog.at_level(logging.ERROR, logger="src.executor"):
+        guarded()
+        guarded()
+        guarded()
+        time.sleep(0.06)
+        guarded()
+    summaries = [r for r in caplog.records if getattr(r, "suppressed", None)]
+    assert [r.suppressed for r in summaries] == [2]
+    # The new window logs its first failure in full again.
+    assert sum(1 for r in caplog.records if r.exc_info) == 2
+
+def _failing_step(message):
+    def _inner():
+        raise ValueError(message)
+    return _inner
+
+def _other_failing_step():
+    def _inner():
+        raise ValueError("quiet")
+    return _inner
+
+def test_failures_of_same_named_steps_are_rate_limited_separately(caplog, monkeypatch):
+    monkeypatch.setattr(executor, "FAILURE_LOG_BURST", 1)
+    noisy, quiet = PipelineExecutor.wrap(_failing_step("noisy")), PipelineExecutor.wrap(_other_failing_step())
+    with caplog.at_level(logging.ERROR, logger="src.executor"):
+        for _ in range(10):
+            noisy()
+        quiet()
+    logged = [r.function_name for r in caplog.records if r.exc_info]
+    assert logged == [executor._step_name(noisy), executor._step_name(quiet)]
+    assert logged[0] != logged[1]
+
+def test_failure_stats_are_capped(monkeypatch):
+    monkeypatch.setattr(executor, "MAX_FAILURE_KEYS", 3)
+    for error in (KeyError, ValueError, TypeError, OSError, IndexError):
+        def fail(error=error):
+            raise error("x")
+        PipelineExecutor.execute(fail, log_level=logging.DEBUG)
+    counts = PipelineExecutor.failure_counts()
+    assert len(executor._failure_stats) <= 3
+    assert "IndexError" in counts[executor._step_name(fail)]
+
+def test_step_stats_count_calls_errors_and_sample_latency(monkeypatch):
+    monkeypatch.setattr(executor, "STEP_TIMING_SAMPLE_EVERY", 4)
+    PipelineExecutor.reset_step_stats()
+
+    def classify(value):
+        if value < 0:
+            raise ValueError("negative")
+        return value
+
+    guarded = PipelineExecutor.wrap(classify, default=None, positional=True)
+    for value in range(-2, 10):
+        guarded(value)
+    PipelineExecutor.execute(classify, 1)
+
+    stats = PipelineExecutor.step_stats()[executor._step_name(classify)]
+    assert stats["calls"] == 13
+    assert stats["errors"] == 2
+    # Calls 4, 8 and 12 were timed; failed calls are not.
+    assert stats["latency"]["count"] == 3
+
+def _baseline_step():
+    def _inner():
+        return 1
+    return _inner
+
+def _anomaly_step():
+    def _inner():
+        return 2
+    return _inner
+
+def _inner_add(a, b):
+    return a + b
+
+class _Callable:
+    def __call__(self):
+        return None
+
+def test_step_names_are_qualified_and_bounded():
+    PipelineExecutor.reset_step_stats()
+    PipelineExecutor.execute(_baseline_step())
+    PipelineExecutor.execute(_anomaly_step())
+    for i in range(50):
+        PipelineExecutor.execute(functools.partial(_inner_add, i), 1)
+
+    names = set(PipelineExecutor.step_stats())
+    assert f"{__name__}._baseline_step.<locals>._inner" in names
+    assert f"{__name__}._anomaly_step.<locals>._inner" in names
+    assert PipelineExecutor.step_stats()[f"{__name__}._inner_add"]["calls"] == 50
+    assert executor._step_name(_Callable()) == f"{__name__}._Callable"
+
+
+def test_circuit_breaker_short_circuits_and_probes_with_backoff():
+    now = [0.0]
+    breaker = CircuitBreaker("test.sink", failure_threshold=3, base_backoff=1.0, max_backoff=4.0, clock=lambda: now[0])
+    healthy = [False]
+    calls = []
+
+    def write(item):
+        calls.append(item)
+        if not healthy[0]:
+            raise OSError("disk full")
+        return True
+
+    guarded = PipelineExecutor.wrap(write, default=False, breaker=breaker)
+    for i in range(10):
+        guarded(i)
+    assert calls == [0, 1, 2]
+    assert breaker.status()["state"] == "open"
+    assert breaker.status()["short_circuited"] == 7
+
+    # Failed probes double the backoff up to the cap.
+    for expected_backoff in (2.0, 4.0, 4.0):
+        now[0] = breaker.next_probe
+        guarded("probe")
+        assert breaker.backoff == expected_backoff
+        assert guarded("blocked") is False
+    assert calls.count("probe") == 3 and "blocked" not in calls
+
+    healthy[0] = True
+    now[0] = breaker.next_probe
+    assert guarded("recovered") is True
+    assert breaker.status()["state"] == "closed"
+    assert guarded("next") is True
+    assert PipelineExecutor.breaker_status()["test.sink"]["times_opened"] == 1
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import time
+import pytest
+from src import file_integrity
+
+
+@pytest.fixture
+def alerts_sent(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        file_integrity, "send_alert",
+        lambda message, **kwargs: sent.append((message, kwargs))
+    )
+    return sent
+
+
+@pytest.fixture
+def watched(tmp_path):
+    root = tmp_path / "etc"
+    (root / "sub").mkdir(parents=True)
+    (root / "passwd").write_text("root:x:0:0\n")
+    (root / "sub" / "hosts").write_text("127.0.0.1 localhost\n")
+    return root
+
+
+def _monitor(tmp_path, root, **kwargs):
+    return file_integrity.FileIntegrityMonitor([str(root)], index_path=str(tmp_path / "fim.db"), **kwargs)
+
+
+def _touch(path, content):
+    st = os.stat(path)
+    path.write_text(content)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_first_scan_builds_baseline_without_alerts(tmp_path, watched, alerts_sent):
+    result = _monitor(tmp_path, watched).scan()
+    assert result["baseline"] is True
+    assert result["scanned"] == 2
+    assert alerts_sent == []
+
+
+def test_rescan_without_changes_hashes_nothing(tmp_path, watched, alerts_sent):
+    monitor = _monitor(tmp_path, watched)
+    monitor.scan()
+    result = monitor.scan()
+    assert result["hashed"] == 0
+    assert result["modified"] == result["added"] == result["removed"] == []
+    assert alerts_sent == []
+
+
+def test_detects_modified_added_and_removed(tmp_path, watched, alerts_sent):
+    monitor = _monitor(tmp_path, watched)
+    monitor.scan()
+
+    _touch(watched / "passwd", "root:x:0:0\nevil:x:0:0\n")
+    (watched / "sub" / "new.conf").write_text("x")
+    os.unlink(watched / "sub" / "hosts")
+
+    result = monitor.scan()
+    assert result["modified"] == [str(watched / "passwd")]
+    assert result["added"] == [str(watched / "sub" / "new.conf")]
+    assert result["removed"] == [str(watched / "sub" / "hosts")]
+    severities = {kwargs["metadata"]["change"]: kwargs["severity"] for _, kwargs in alerts_sent}
+    assert severities == {"modified": "CRITICAL", "added": "WARNING", "removed": "WARNING"}
+
+
+def test_metadata_only_change_is_not_reported(tmp_path, watched, alerts_sent):
+    monitor = _monitor(tmp_path, watched)
+    monitor.scan()
+    _touch(watched / "passwd", "root:x:0:0\n")
+    result = monitor.scan()
+    assert result["hashed"] == 1
+    assert result["modified"] == []
+    assert alerts_sent == []
+
+
+def test_index_persists_across_instances(tmp_path, watched, alerts_sent):
+    _monitor(tmp_path, watched).scan()
+    result = _monitor(tmp_path, watched).scan()
+    assert result["baseline"] is False
+    assert result["hashed"] == 0
+
+
+def test_large_files_hashed_via_mmap(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_integrity, "MMAP_THRESHOLD", 16)
+    path = tmp_path / "big.bin"
+    data = os.urandom(4096)
+    path.write_bytes(data)
+    assert file_integrity.hash_file(str(path), len(data)) == hashlib.sha256(data).hexdigest()
+
+
+def test_content_change_with_restored_mtime_is_caught_by_ctime(tmp_path, watched, alerts_sent):
+    monitor = _monitor(tmp_path, watched)
+    monitor.scan()
+    path = watched / "passwd"
+    st = os.stat(path)
+    time.sleep(0.05)
+    path.write_text("evil:x:0:0\n")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert os.stat(path).st_size == st.st_size
+
+    result = monitor.scan()
+    assert result["modified"] == [str(path)]
+
+
+def test_index_without_ctime_column_is_migrated(tmp_path, watched, alerts_sent):
+    conn = sqlite3.connect(str(tmp_path / "fim.db"))
+    conn.execute("CREATE TABLE file_index (path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, hash TEXT)")
+    conn.commit()
+    conn.close()
+    monitor = _monitor(tmp_path, watched)
+    monitor.scan()
+    assert monitor.scan()["hashed"] == 0
+
+
+def test_default_index_lives_under_state_dir():
+    assert os.path.dirname(file_integrity.DEFAULT_INDEX_PATH) == file_integrity.STATE_DIR
@@ -0,0 +1,90 @@
+import logging
+import queue
+import threading
+
+from src import logger as hids_logger
+from src.logger import DeferredQueueHandler, _LogListener
+
+
+class _Capture(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+        self.threads.add(threading.current_thread().name)
+
+
+class _Counted:
+    calls = 0
+
+    def __str__(self):
+        _Counted.calls += 1
+        return "counted"
+
+
+def _pipeline(name, *targets, maxsize=100, level=logging.INFO):
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue, targets, maxsize)
+    log = logging.getLogger(name)
+    log.handlers = [handler]
+    log.setLevel(level)
+    log.propagate = False
+    return log, log_queue, handler
+
+
+def test_records_are_formatted_and_routed_on_the_listener_thread():
+    detection, warnings_only = _Capture(), _Capture(logging.WARNING)
+    log, log_queue, _ = _pipeline("test_logger.routing", detection, warnings_only)
+    listener = _LogListener(log_queue)
+    listener.start()
+    log.info("Detected IP: %s", "10.0.0.1")
+    log.warning("Backpressure: queue size = %d", 1500)
+    listener.stop()
+
+    assert detection.messages == ["Detected IP: 10.0.0.1", "Backpressure: queue size = 1500"]
+    assert warnings_only.messages == ["Backpressure: queue size = 1500"]
+    assert threading.current_thread().name not in detection.threads
+
+def test_disabled_levels_never_format_and_mutable_args_are_formatted_eagerly():
+    log, log_queue, _ = _pipeline("test_logger.gating", _Capture())
+    _Counted.calls = 0
+    log.debug("Detected IP: %s", _Counted())
+    assert _Counted.calls == 0 and log_queue.empty()
+
+    ips = ["10.0.0.1"]
+    log.info("Blocked: %s", ips)
+    ips.append("10.0.0.2")
+    targets, record = log_queue.get_nowait()
+    assert record.msg == "Blocked: ['10.0.0.1']" and record.args is None
+    log.info("Detected IP: %s", "10.0.0.3")
+    assert log_queue.get_nowait()[1].args == ("10.0.0.3",)
+
+def test_full_queue_drops_and_counts():
+    log, log_queue, handler = _pipeline("test_logger.full", _Capture(), maxsize=2)
+    for i in range(5):
+        log.info("event %d", i)
+    assert log_queue.qsize() == 2
+    assert handler.dropped == 3
+
+def test_setup_logger_shares_file_handlers_behind_one_listener():
+    first = hids_logger.setup_logger("test_logger.first")
+    second = hids_logger.setup_logger("test_logger.second")
+    assert len(first.handlers) == len(second.handlers) == 1
+    assert first.handlers[0].targets == second.handlers[0].targets
+    assert set(hids_logger.logging_stats()) == {"queued", "capacity", "dropped"}
+
+def test_logging_after_shutdown_restarts_the_listener():
+    capture = _Capture()
+    log = logging.getLogger("test_logger.restart")
+    hids_logger.attach_queue_handler(log, [capture], logging.INFO)
+    log.propagate = False
+    log.info("before %d", 1)
+    hids_logger.shutdown_logging()
+    assert capture.messages == ["before 1"]
+
+    log.info("after %d", 2)
+    hids_logger.shutdown_logging()
+    assert capture.messages == ["before 1", "after 2"]
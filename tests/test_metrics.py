@@ -0,0 +1,127 @@
+import threading
+from src.metrics import LatencyHistogram, RateCounter, WorkerMetrics
+from src.event_queue import BoundedEventQueue, MultiLaneEventQueue
+
+
+def test_histogram_percentiles_within_bucket_precision():
+    hist = LatencyHistogram()
+    for ms in range(1, 1001):
+        hist.record(ms / 1000)
+    summary = hist.summary()
+    assert summary["count"] == 1000
+    assert abs(summary["p50"] - 0.5) / 0.5 < 0.07
+    assert abs(summary["p99"] - 0.99) / 0.99 < 0.07
+    assert summary["max"] == 1.0
+    assert abs(summary["mean"] - 0.5005) < 1e-6
+
+def test_histogram_small_values_are_exact_and_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(0.000005, count=3)
+    b.record(0.000020)
+    a.merge(b)
+    assert a.total == 4
+    assert a.percentile(50) == 0.000005
+    assert a.percentile(100) == 0.000020
+
+def test_rate_counter_counts_completed_seconds_only():
+    rate = RateCounter(window=60)
+    for second in range(100, 110):
+        rate.add(5, second + 0.5)
+    rate.add(100, 110.2)
+    assert rate.total(10, 110.5) == 50
+    assert rate.total(5, 110.5) == 25
+
+def test_rate_counter_keeps_a_full_window_of_completed_seconds():
+    rate = RateCounter(window=60)
+    for second in range(100, 161):
+        rate.add(1, second + 0.5)
+    assert rate.total(60, 160.5) == 60
+
+def test_worker_metrics_merges_per_thread_recorders():
+    now = [1000.0]
+    metrics = WorkerMetrics(clock=lambda: now[0])
+
+    done, release = threading.Barrier(4), threading.Event()
+
+    def work(n):
+        for _ in range(n):
+            metrics.update(True, 0.002)
+        metrics.update_batch(1, 1, 0.01)
+        done.wait()
+        release.wait()
+
+    # Workers stay alive until the snapshot; exited threads are folded into retired totals.
+    threads = [threading.Thread(target=work, args=(10,), name=f"W{i}") for i in range(3)]
+    for t in threads:
+        t.start()
+    done.wait()
+
+    now[0] = 1001.0
+    snapshot = metrics.get_snapshot()
+    release.set()
+    for t in threads:
+        t.join()
+    assert snapshot["total_processed"] == 36
+    assert snapshot["success_count"] == 33
+    assert snapshot["failure_count"] == 3
+    assert snapshot["latency"]["processing"]["count"] == 30
+    assert snapshot["latency"]["batch"]["count"] == 3
+    assert snapshot["event_rate"]["10s"] == 3.6
+    assert set(snapshot["per_worker"]) == {"W0", "W1", "W2"}
+    assert snapshot["per_worker"]["W0"]["total_processed"] == 12
+
+def test_batch_latency_is_not_spread_over_event_percentiles():
+    metrics = WorkerMetrics(clock=lambda: 1000.0)
+    for _ in range(99):
+        metrics.update(True, 0.001)
+    metrics.update_batch(100, 0, 1.0)
+    latency = metrics.get_snapshot()["latency"]
+    assert latency["processing"]["count"] == 99
+    assert latency["processing"]["p99"] < 0.0011
+    assert latency["batch"]["count"] == 1 and latency["batch"]["max"] == 1.0
+
+def test_dead_thread_recorders_are_folded_into_retired_totals():
+    now = [1000.0]
+    metrics = WorkerMetrics(clock=lambda: now[0])
+    for i in range(20):
+        t = threading.Thread(target=metrics.update_batch, args=(2, 0, 0.01), name=f"Scaled{i}")
+        t.start()
+        t.join()
+    metrics.update(True, 0.001)
+    now[0] = 1001.0
+    snapshot = metrics.get_snapshot()
+    assert len(metrics._recorders) == 1
+    assert snapshot["total_processed"] == 41
+    assert snapshot["latency"]["batch"]["count"] == 20
+    assert snapshot["event_rate"]["10s"] == 4.1
+    assert set(snapshot["per_worker"]) == {threading.current_thread().name}
+
+def test_snapshot_does_not_count_a_recorder_pruned_mid_snapshot_twice():
+    armed = []
+
+    def clock():
+        # get_snapshot reads the clock after copying the registry; a thread registering here
+        # prunes the dead recorder into the retired totals.
+        if armed:
+            armed.pop()
+            t = threading.Thread(target=metrics.record_queue_wait, args=(0.001,))
+            t.start()
+            t.join()
+        return 1000.0
+
+    metrics = WorkerMetrics(clock=clock)
+    t = threading.Thread(target=metrics.update_batch, args=(5, 0, 0.01))
+    t.start()
+    t.join()
+    armed.append(True)
+    assert metrics.get_snapshot()["total_processed"] == 5
+    assert metrics.get_snapshot()["total_processed"] == 5
+
+def test_queues_report_wait_time_on_dequeue():
+    waits = []
+    for q in (BoundedEventQueue(8, on_dequeue=waits.append), MultiLaneEventQueue(8, on_dequeue=waits.append)):
+        q.put("a")
+        q.put("b")
+        assert q.get_batch(8) == ["a", "b"]
+    assert len(waits) == 4
+    assert all(w >= 0 for w in waits)
@@ -0,0 +1,40 @@
+import sqlite3
+import threading
+from src.persistence import PersistenceLayer
+
+
+def test_full_buffer_flushes_without_deadlock(tmp_path):
+    layer = PersistenceLayer(db_path=str(tmp_path / "hids.db"), flush_interval=60, buffer_size=2)
+    t = threading.Thread(
+        target=lambda: [layer.save_ip_state(f"10.0.0.{i}", {"score": i}) for i in range(3)],
+        daemon=True
+    )
+    t.start()
+    t.join(2)
+    assert not t.is_alive()
+    assert layer.load_ip_states() == {f"10.0.0.{i}": {"score": i} for i in range(3)}
+    layer.close()
+
+
+def test_failing_flush_opens_breaker_and_keeps_buffered_writes(tmp_path):
+    layer = PersistenceLayer(db_path=str(tmp_path / "hids.db"), flush_interval=60, buffer_size=1000)
+    real_connect = layer._connect
+    attempts = []
+
+    def broken_connect():
+        attempts.append(1)
+        raise sqlite3.OperationalError("database is locked")
+
+    layer._connect = broken_connect
+    layer.save_ip_state("10.0.0.1", {"score": 1})
+    for _ in range(20):
+        layer._flush_buffers()
+    assert layer._flush_breaker.status()["state"] == "open"
+    assert len(attempts) == layer._flush_breaker.failure_threshold
+    assert "10.0.0.1" in layer._ip_state_buffer
+
+    layer._connect = real_connect
+    layer.close()
+    reopened = PersistenceLayer(db_path=str(tmp_path / "hids.db"), flush_interval=60)
+    assert reopened.load_ip_states() == {"10.0.0.1": {"score": 1}}
+    reopened.close()
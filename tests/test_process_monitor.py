@@ -0,0 +1,102 @@
+import os
+import threading
+import pytest
+from src import process_monitor
+from src.detector import analyze_event
+
+
+def _write_proc(root, pid, utime, stime=0, start_time=1000, rchar=0, wchar=0, name="worker"):
+    pid_dir = root / str(pid)
+    pid_dir.mkdir(exist_ok=True)
+    fields = ["S"] + ["0"] * 10 + [str(utime), str(stime)] + ["0"] * 6 + [str(start_time)] + ["0"] * 20
+    (pid_dir / "stat").write_text(f"{pid} ({name}) " + " ".join(fields) + "\n")
+    (pid_dir / "io").write_text(f"rchar: {rchar}\nwchar: {wchar}\nread_bytes: 0\n")
+    (pid_dir / "status").write_text(f"Name:\t{name}\nUid:\t1000\t1000\t1000\t1000\n")
+    (pid_dir / "cmdline").write_bytes(name.encode() + b"\0--flag\0")
+
+
+@pytest.fixture
+def fake_clock():
+    state = {"now": 100.0}
+    clock = lambda: state["now"]
+    clock.state = state
+    return clock
+
+
+def _collector(root, clock):
+    collector = process_monitor.ProcessActivityCollector(proc_root=str(root), clock=clock)
+    collector.clock_ticks = 100
+    return collector
+
+
+def test_first_sample_only_primes_cache(tmp_path, fake_clock):
+    _write_proc(tmp_path, 42, utime=10)
+    (tmp_path / "self").mkdir()
+    collector = _collector(tmp_path, fake_clock)
+    assert collector.sample() == []
+    assert collector.tracked_processes == 1
+
+
+def test_activity_score_from_deltas(tmp_path, fake_clock):
+    _write_proc(tmp_path, 42, utime=10)
+    collector = _collector(tmp_path, fake_clock)
+    collector.sample()
+
+    _write_proc(tmp_path, 42, utime=60, stime=45, wchar=2 * 1024 * 1024)
+    fake_clock.state["now"] += 1.0
+    events = collector.sample()
+
+    assert len(events) == 1
+    event = events[0]
+    assert event["pid"] == 42
+    assert event["process"] == "worker"
+    assert event["cmdline"] == "worker --flag"
+    assert event["uid"] == 1000
+    assert event["activity_score"] == pytest.approx(95 + 2 * process_monitor.IO_SCORE_WEIGHT)
+    assert analyze_event(event)["detected"] is True
+
+
+def test_static_fields_cached_until_pid_reuse(tmp_path, fake_clock):
+    _write_proc(tmp_path, 7, utime=0, name="orig")
+    collector = _collector(tmp_path, fake_clock)
+    collector.sample()
+
+    (tmp_path / "7" / "cmdline").write_bytes(b"changed\0")
+    fake_clock.state["now"] += 1.0
+    assert collector.sample()[0]["cmdline"] == "orig --flag"
+
+    _write_proc(tmp_path, 7, utime=0, start_time=5000, name="reused")
+    fake_clock.state["now"] += 1.0
+    assert collector.sample() == []
+    fake_clock.state["now"] += 1.0
+    assert collector.sample()[0]["process"] == "reused"
+
+
+def test_exited_processes_are_evicted(tmp_path, fake_clock):
+    _write_proc(tmp_path, 1, utime=0)
+    _write_proc(tmp_path, 2, utime=0)
+    collector = _collector(tmp_path, fake_clock)
+    collector.sample()
+    for name in os.listdir(tmp_path / "2"):
+        os.unlink(tmp_path / "2" / name)
+    os.rmdir(tmp_path / "2")
+    collector.sample()
+    assert collector.tracked_processes == 1
+
+
+def test_run_emits_batches(tmp_path, fake_clock):
+    for pid in range(1, 6):
+        _write_proc(tmp_path, pid, utime=0)
+    collector = _collector(tmp_path, fake_clock)
+    collector.sample()
+    fake_clock.state["now"] += 1.0
+
+    shutdown = threading.Event()
+    batches = []
+
+    def emit(batch):
+        batches.append(batch)
+        shutdown.set()
+
+    collector.run(emit, shutdown, interval=0.0, batch_size=2)
+    assert [len(b) for b in batches] == [2, 2, 1]
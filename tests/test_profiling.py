@@ -0,0 +1,43 @@
+import os
+import threading
+import time
+
+from src.profiling import SamplingProfiler
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_sampling_profiler_writes_folded_stacks(tmp_path):
+    stop = threading.Event()
+    busy = threading.Thread(target=_spin, args=(stop,), name="BusyThread")
+    busy.start()
+    profiler = SamplingProfiler(interval=0.001, output_dir=str(tmp_path))
+    try:
+        assert profiler.start(duration=0.2)
+        assert not profiler.start(duration=0.2)
+        deadline = time.monotonic() + 5
+        while profiler.running and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+        busy.join()
+
+    path = profiler.last_output
+    assert path is not None and os.path.dirname(path) == str(tmp_path)
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    busy_lines = [line for line in lines if line.startswith("BusyThread;")]
+    assert busy_lines and any("_spin (test_profiling.py" in line for line in busy_lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in busy_lines) <= profiler.samples
+    assert profiler.top_functions(1)
+
+def test_stop_ends_profile_early(tmp_path):
+    profiler = SamplingProfiler(interval=0.001, output_dir=str(tmp_path))
+    profiler.start(duration=60)
+    time.sleep(0.05)
+    path = profiler.stop()
+    assert not profiler.running
+    assert path is not None and os.path.exists(path)
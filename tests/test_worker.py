@@ -0,0 +1,131 @@
+import queue
+import threading
+import pytest
+from src import worker
+from src.metrics import WorkerMetrics
+
+
+class BatchEngine:
+    def __init__(self):
+        self.batches = []
+
+    def process_failed_login(self, ip):
+        self.batches.append([ip])
+
+    def process_failed_logins(self, ips):
+        self.batches.append(list(ips))
+
+
+class SingleEngine:
+    def __init__(self, fail_on=None):
+        self.seen = []
+        self.fail_on = fail_on
+
+    def process_failed_login(self, ip):
+        if ip == self.fail_on:
+            raise RuntimeError("boom")
+        self.seen.append(ip)
+
+
+class PartlyFailingBatchEngine(SingleEngine):
+    def process_failed_logins(self, ips):
+        for ip in ips:
+            self.process_failed_login(ip)
+
+
+def _run_worker(engine, items, **kwargs):
+    event_queue = queue.Queue()
+    for item in items:
+        event_queue.put(item)
+    shutdown = threading.Event()
+    metrics = WorkerMetrics()
+    heartbeats = {}
+    t = threading.Thread(
+        target=worker.detection_worker,
+        args=(event_queue, engine, shutdown),
+        kwargs=dict(timeout=0.05, metrics=metrics, heartbeat_dict=heartbeats, worker_id=3, **kwargs),
+        daemon=True
+    )
+    t.start()
+    event_queue.join()
+    shutdown.set()
+    t.join(2)
+    return metrics.get_snapshot(), heartbeats
+
+
+def test_worker_drains_queue_in_batches():
+    engine = BatchEngine()
+    ips = [f"10.0.0.{i}" for i in range(10)]
+    snapshot, heartbeats = _run_worker(engine, ips, batch_size=4)
+    assert engine.batches == [ips[0:4], ips[4:8], ips[8:10]]
+    assert snapshot["total_processed"] == 10
+    assert snapshot["success_count"] == 10
+    assert 3 in heartbeats
+
+def test_worker_skips_invalid_items():
+    engine = BatchEngine()
+    snapshot, _ = _run_worker(engine, ["10.0.0.1", None, 42, "10.0.0.2"])
+    assert engine.batches == [["10.0.0.1", "10.0.0.2"]]
+    assert snapshot["total_processed"] == 2
+
+def test_worker_falls_back_to_single_event_api():
+    engine = SingleEngine(fail_on="10.0.0.2")
+    snapshot, _ = _run_worker(engine, ["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+    assert engine.seen == ["10.0.0.1", "10.0.0.3"]
+    assert snapshot["success_count"] == 2
+    assert snapshot["failure_count"] == 1
+
+def test_bulk_failure_counts_only_the_failing_ip_and_finishes_the_batch():
+    engine = PartlyFailingBatchEngine(fail_on="10.0.0.2")
+    snapshot, _ = _run_worker(engine, [f"10.0.0.{i}" for i in range(5)], batch_size=5)
+    assert engine.seen == ["10.0.0.0", "10.0.0.1", "10.0.0.3", "10.0.0.4"]
+    assert snapshot["success_count"] == 4
+    assert snapshot["failure_count"] == 1
+
+def test_engine_steps_are_wrapped_once_per_worker(monkeypatch):
+    wraps = []
+    real_wrap = worker.PipelineExecutor.wrap
+    monkeypatch.setattr(worker.PipelineExecutor, "wrap", lambda *a, **k: wraps.append(a[0]) or real_wrap(*a, **k))
+    engine = SingleEngine()
+    _run_worker(engine, [f"10.0.0.{i}" for i in range(12)], batch_size=2)
+    assert len(engine.seen) == 12
+    assert len(wraps) == 1
+
+def test_coalesced_records_are_not_expanded_for_engines_without_support():
+    from src.event_queue import CoalescedEvent
+    engine = SingleEngine()
+    assert worker.BatchProcessor(engine).process_coalesced([CoalescedEvent("10.0.0.1", [1.0, 2.0])]) == 0
+    assert engine.seen == []
+
+def test_metrics_update_batch_averages_processing_time():
+    metrics = WorkerMetrics()
+    metrics.update_batch(3, 1, 0.4)
+    snapshot = metrics.get_snapshot()
+    assert snapshot["total_processed"] == 4
+    assert snapshot["failure_count"] == 1
+    assert snapshot["ewma_processing_time"] == pytest.approx(0.1)
+
+def test_worker_processes_coalesced_records(monkeypatch):
+    from src.event_queue import CoalescingEventQueue
+    from src.detector import DetectionEngine
+
+    monkeypatch.setattr("src.detector.trigger_alert", lambda message, *rule_source: None)
+    event_queue = CoalescingEventQueue(100)
+    for _ in range(50):
+        event_queue.put("10.1.1.1")
+    event_queue.put("10.1.1.2")
+    engine = DetectionEngine()
+    shutdown = threading.Event()
+    metrics = WorkerMetrics()
+    t = threading.Thread(
+        target=worker.detection_worker,
+        args=(event_queue, engine, shutdown),
+        kwargs={"timeout": 0.05, "metrics": metrics},
+        daemon=True
+    )
+    t.start()
+    event_queue.join()
+    shutdown.set()
+    t.join(2)
+    assert metrics.get_snapshot()["total_processed"] == 51
+    assert len(engine.ip_state["10.1.1.1"]["attempts"]) == 50